@@ -1,12 +1,23 @@
 from fastapi import APIRouter, HTTPException, Query
-import httpx
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.core.cache import cache_manager
 from app.core.config import settings
-from app.services.hybrid_ai_service import hybrid_ai_service
+from app.core.http_client import upstream_clients
+from app.core.rate_limiter import upstream_limits
 from app.services.worldbank_service import worldbank_service
-from app.services.currency_service import currency_service
+from app.services.currency_service import QUOTE_CURRENCIES, currency_service
+from app.services.fx_history import fx_history
+from app.services.fx_rates import fx_rate_engine
 from app.services.country_service import country_service
-from typing import List, Dict, Any, Optional
+from app.services.country_summary_service import country_summary_service
+from app.services.news_service import news_service
+from app.services.embedding_service import embedding_service
+from app.services.hybrid_smart_service import hybrid_smart_service
+from app.services.ingestion_service import ingestion_scheduler
+from typing import List, Dict, Any, Optional, Tuple
 import asyncio
+import json
 import logging
 from datetime import datetime
 
@@ -22,35 +33,35 @@ async def test_news():
         return {"error": "NewsAPI key not configured"}
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://newsapi.org/v2/everything",
-                params={
-                    'q': 'United States',
-                    'sortBy': 'publishedAt',
-                    'language': 'en',
-                    'pageSize': 1,
-                    'apiKey': settings.news_api_key
-                }
-            )
+        client = upstream_clients.get("news")
+        response = await client.get(
+            "/everything",
+            params={
+                'q': 'United States',
+                'sortBy': 'publishedAt',
+                'language': 'en',
+                'pageSize': 1,
+                'apiKey': settings.news_api_key
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            articles = data.get('articles', [])
             
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get('articles', [])
-                
-                if articles:
-                    article = articles[0]
-                    return {
-                        "success": True,
-                        "article": {
-                            "title": article['title'],
-                            "source": article['source']['name'],
-                            "published_at": article['publishedAt'],
-                            "url": article['url']
-                        }
+            if articles:
+                article = articles[0]
+                return {
+                    "success": True,
+                    "article": {
+                        "title": article['title'],
+                        "source": article['source']['name'],
+                        "published_at": article['publishedAt'],
+                        "url": article['url']
                     }
-            
-            return {"error": "No articles found"}
+                }
+        
+        return {"error": "No articles found"}
                 
     except Exception as e:
         return {"error": f"Failed to fetch news: {str(e)}"}
@@ -73,10 +84,11 @@ async def get_all_countries():
         )
 
 @router.get("/countries/search")
-async def search_countries(q: str = Query(..., min_length=1, description="Search query")):
-    """Search countries by name or code"""
+async def search_countries(q: str = Query(..., min_length=1, description="Search query"),
+                           limit: int = Query(10, ge=1, le=50)):
+    """Search countries by name, code or alias (typo tolerant, best matches first)"""
     try:
-        matches = country_service.search_countries(q)
+        matches = country_service.search_countries(q, limit)
         return {
             "matches": matches,
             "total": len(matches),
@@ -107,6 +119,12 @@ async def get_api_status():
             "status": "operational",
             "total_countries": total_countries,
             "services": services_status,
+            "cache": cache_manager.stats(),
+            "ai_usage": await hybrid_smart_service.get_usage_stats(),
+            "upstream_limits": await upstream_limits.status(),
+            "circuit_breakers": upstream_clients.breaker_status(),
+            "fx_rates": fx_rate_engine.status(),
+            "fx_history": fx_history.status(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -117,6 +135,77 @@ async def get_api_status():
             "timestamp": datetime.now().isoformat()
         }
 
+@router.get("/freshness")
+async def get_data_freshness():
+    """When each country's news, economic and currency data was last refreshed by background ingestion"""
+    return await ingestion_scheduler.get_freshness()
+
+class BatchIntelligenceRequest(BaseModel):
+    country_codes: List[str]
+
+@router.post("/batch")
+async def get_batch_intelligence(request: BatchIntelligenceRequest):
+    """Summaries (sentiment, top headline, GDP, FX) for many countries in one request, e.g. to color the map
+    
+    Streamed as newline-delimited JSON, one object per country as soon as it is ready:
+    cached countries come first, the rest follow as their fetches finish.
+    """
+    if not request.country_codes:
+        raise HTTPException(status_code=400, detail="country_codes must not be empty")
+    if len(request.country_codes) > settings.batch_max_countries:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_countries} countries per request")
+    
+    async def lines():
+        async for summary in country_summary_service.stream_summaries(request.country_codes):
+            yield json.dumps(summary) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/{country_code}/related")
+async def get_related_articles(country_code: str, limit: int = Query(10, ge=1, le=50)):
+    """Articles from other countries most similar to this country's current news (embedding nearest neighbours)"""
+    country_info = country_service.get_country_info(country_code)
+    if not country_info:
+        raise HTTPException(status_code=404, detail=f"Country '{country_code}' not found")
+    
+    news_data = await news_service.get_country_news(country_info['name'], country_code.upper())
+    articles = news_data.get("articles", [])
+    if not articles:
+        return {
+            "country_code": country_code.upper(),
+            "articles": [],
+            "message": news_data.get("message", f"No current news for {country_info['name']} to compare against")
+        }
+    
+    related = await embedding_service.related_articles(country_code, articles, limit)
+    return {"country_code": country_code.upper(), **related}
+
+@router.get("/{country_code}/fx-history")
+async def get_fx_history(
+    country_code: str,
+    days: int = Query(30, ge=1, le=settings.fx_history_max_days),
+    points: int = Query(90, ge=2, le=1000),
+    quotes: Optional[str] = Query(None, description="Comma-separated currency codes, default USD,EUR,GBP,JPY,CNY")
+):
+    """Downsampled history of the country's currency against the quote currencies, for trend sparklines"""
+    country_info = country_service.get_country_info(country_code)
+    if not country_info:
+        raise HTTPException(status_code=404, detail=f"Country '{country_code}' not found")
+    
+    base = currency_service.get_currency(country_code)
+    quote_list = [code.strip().upper() for code in quotes.split(",") if code.strip()] if quotes else list(QUOTE_CURRENCIES)
+    quote_list = [code for code in dict.fromkeys(quote_list) if code != base][:10]
+    if not quote_list:
+        raise HTTPException(status_code=400, detail="No quote currencies other than the country's own")
+    
+    history = await fx_history.get_series(base, quote_list, days, points)
+    return {
+        "country_code": country_code.upper(),
+        "base_currency": base,
+        "days": days,
+        **history
+    }
+
 @router.get("/{country_code}")
 async def get_country_intelligence(country_code: str):
     """Get comprehensive country intelligence including news, economic data, and currency info"""
@@ -155,51 +244,63 @@ async def get_country_intelligence(country_code: str):
             }
         }
         
-        # Fetch data sequentially with better error handling (instead of asyncio.gather)
-        logger.info("📊 Fetching economic data...")
-        try:
-            economic_data = await fetch_economic_data(country_code.upper())
-            if economic_data:
-                response_data["economic_indicators"] = economic_data
-                response_data["data_availability"]["economic"] = True
-                logger.info(f"✅ Economic data: {len(economic_data)} indicators")
-            else:
-                logger.warning("⚠️ No economic data available")
-        except Exception as e:
-            logger.error(f"❌ Economic data failed: {e}")
-        
-        logger.info("💰 Fetching currency data...")
-        try:
-            # Pass the country_code to fetch_currency_data, not the currency
-            currency_data = await fetch_currency_data(country_code.upper())
-            if currency_data and 'error' not in currency_data:
-                response_data["currency_data"] = currency_data
-                response_data["data_availability"]["currency"] = True
-                logger.info(f"✅ Currency data: {currency_data.get('base_currency')}")
-            else:
-                logger.warning(f"⚠️ Currency data issue: {currency_data.get('error', 'Unknown error') if currency_data else 'No data'}")
-        except Exception as e:
-            logger.error(f"❌ Currency data failed: {e}")
+        # Fan out to all sources concurrently. Each source gets its own deadline and
+        # failures are isolated, so the response is built from whatever finished in time.
+        sources = {
+            "economic": (fetch_economic_data(country_code.upper()), settings.economic_fetch_deadline),
+            "currency": (fetch_currency_data(country_code.upper()), settings.currency_fetch_deadline),
+        }
         
         # Check if NewsAPI is configured before fetching news
         if not settings.news_api_key:
             logger.warning("NewsAPI key not configured")
             response_data['news_message'] = "News data unavailable - API key not configured"
         else:
-            logger.info("📰 Fetching news data...")
-            try:
-                news_data = await fetch_news_data(country_info['name'], country_code, settings.news_api_key)
-                if news_data and news_data.get("articles"):
-                    response_data["articles"] = news_data["articles"]
-                    response_data["total_articles"] = len(news_data["articles"])
-                    response_data["data_availability"]["news"] = True
-                    logger.info(f"✅ News data: {len(news_data['articles'])} articles")
-                else:
-                    logger.warning(f"⚠️ No news articles: {news_data.get('message', 'Unknown issue') if news_data else 'No data'}")
-                    if news_data and news_data.get("message"):
-                        response_data['news_message'] = news_data['message']
-            except Exception as e:
-                logger.error(f"❌ News data failed: {e}")
+            sources["news"] = (
+                news_service.get_country_news(country_info['name'], country_code),
+                settings.news_fetch_deadline,
+            )
+        
+        logger.info(f"🚀 Fetching {', '.join(sources)} data concurrently...")
+        outcomes = await asyncio.gather(*(
+            _run_with_deadline(name, coro, deadline)
+            for name, (coro, deadline) in sources.items()
+        ))
+        results = dict(zip(sources, outcomes))
+        response_data["source_status"] = {name: status for name, (status, _) in results.items()}
+        response_data["timed_out_sources"] = [
+            name for name, (status, _) in results.items() if status == "timeout"
+        ]
+        
+        status, economic_data = results["economic"]
+        if economic_data:
+            response_data["economic_indicators"] = economic_data
+            response_data["data_availability"]["economic"] = True
+            logger.info(f"✅ Economic data: {len(economic_data)} indicators")
+        elif status == "ok":
+            logger.warning("⚠️ No economic data available")
+        
+        status, currency_data = results["currency"]
+        if currency_data and 'error' not in currency_data:
+            response_data["currency_data"] = currency_data
+            response_data["data_availability"]["currency"] = True
+            logger.info(f"✅ Currency data: {currency_data.get('base_currency')}")
+        elif status == "ok":
+            logger.warning(f"⚠️ Currency data issue: {currency_data.get('error', 'Unknown error') if currency_data else 'No data'}")
+        
+        if "news" in results:
+            status, news_data = results["news"]
+            if news_data and news_data.get("articles"):
+                response_data["articles"] = news_data["articles"]
+                response_data["total_articles"] = len(news_data["articles"])
+                response_data["data_availability"]["news"] = True
+                logger.info(f"✅ News data: {len(news_data['articles'])} articles")
+            elif status == "timeout":
+                response_data['news_message'] = "News data took too long to load - try again shortly"
+            elif status == "ok":
+                logger.warning(f"⚠️ No news articles: {news_data.get('message', 'Unknown issue') if news_data else 'No data'}")
+                if news_data and news_data.get("message"):
+                    response_data['news_message'] = news_data['message']
         
         # Add helpful message about data availability
         available_data_types = [k for k, v in response_data['data_availability'].items() if v]
@@ -220,187 +321,45 @@ async def get_country_intelligence(country_code: str):
             detail=f"Failed to fetch country intelligence for {country_code}"
         )
 
-async def fetch_news_data(country_name: str, country_code: str, api_key: str) -> Dict[str, Any]:
-    """Fetch and process news data with enhanced error handling"""
+async def _run_with_deadline(name: str, coro, deadline: float) -> Tuple[str, Any]:
+    """Await one intelligence source with its own deadline.
     
+    Returns a (status, result) pair where status is "ok", "timeout" or "error",
+    so one slow or failing source never takes the whole response down with it.
+    """
     try:
-        # Try different search terms for better coverage
-        search_terms = [
-            country_name,
-            f'"{country_name}"',  # Exact match
-        ]
-        
-        # Add alternative country names for better search results
-        country_aliases = {
-            'United States': ['USA', 'America', 'US'],
-            'United Kingdom': ['UK', 'Britain', 'England'],
-            'South Korea': ['Korea'],
-            'North Korea': ['DPRK'],
-            'Czech Republic': ['Czechia'],
-            'United Arab Emirates': ['UAE'],
-            'Saudi Arabia': ['KSA']
-        }
-        
-        if country_name in country_aliases:
-            search_terms.extend(country_aliases[country_name])
-        
-        best_articles = []
-        
-        # Try each search term until we get good results
-        for search_term in search_terms:
-            if len(best_articles) >= 3:  # We have enough articles
-                break
-                
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        "https://newsapi.org/v2/everything",
-                        params={
-                            'q': search_term,
-                            'sortBy': 'publishedAt',
-                            'language': 'en',
-                            'pageSize': 5,  # Get more to filter better ones
-                            'apiKey': api_key,
-                            'from': (datetime.now().replace(day=1)).strftime('%Y-%m-%d'),  # Last month
-                        }
-                    )
-                    
-                    if response.status_code == 429:  # Rate limited
-                        logger.warning(f"NewsAPI rate limited for {country_name}")
-                        return {"articles": [], "message": "News API rate limited - try again later"}
-                    
-                    if response.status_code != 200:
-                        logger.warning(f"NewsAPI error {response.status_code} for {search_term}")
-                        continue
-                    
-                    data = response.json()
-                    articles = data.get('articles', [])
-                    
-                    if not articles:
-                        continue
-                    
-                    # Filter and process articles
-                    for article in articles:
-                        if len(best_articles) >= 3:
-                            break
-                            
-                        # Skip articles without content
-                        if (not article.get('content') or 
-                            article['content'] in ['[Removed]', None] or
-                            len(article.get('content', '')) < 100):
-                            continue
-                        
-                        # Skip articles that don't seem relevant
-                        title_lower = article.get('title', '').lower()
-                        desc_lower = article.get('description', '').lower()
-                        
-                        # Check if article is actually about the country
-                        country_mentioned = (
-                            country_name.lower() in title_lower or
-                            country_name.lower() in desc_lower or
-                            any(alias.lower() in title_lower or alias.lower() in desc_lower 
-                                for alias in country_aliases.get(country_name, []))
-                        )
-                        
-                        if not country_mentioned:
-                            continue
-                        
-                        best_articles.append(article)
-                        
-            except httpx.TimeoutException:
-                logger.warning(f"Timeout fetching news for {search_term}")
-                continue
-            except Exception as e:
-                logger.error(f"Error fetching news for {search_term}: {e}")
-                continue
-        
-        if not best_articles:
-            return {
-                "articles": [], 
-                "message": f"No recent news found for {country_name}. This could be due to limited English-language coverage or recent API restrictions."
-            }
-        
-        # Process articles with AI
-        processed_articles = []
-        
-        for article in best_articles:
-            try:
-                content = article['content'] or article.get('description', '')
-                
-                if len(content) > 50:
-                    # Generate AI analysis
-                    ai_summary = await hybrid_ai_service.generate_layered_summary(content)
-                    sentiment = await hybrid_ai_service.analyze_sentiment(content)
-                    bias_analysis = await hybrid_ai_service.analyze_bias(content, article['source']['name'])
-                    
-                    processed_article = {
-                        "title": article['title'],
-                        "source": article['source']['name'],
-                        "published_at": article['publishedAt'],
-                        "url": article['url'],
-                        "description": article.get('description', ''),
-                        "ai_analysis": {
-                            "summary_tweet": ai_summary.get('tweet', ''),
-                            "summary_bullets": ai_summary.get('bullets', []),
-                            "sentiment": {
-                                "label": sentiment.get('label', 'neutral'),
-                                "score": sentiment.get('compound', 0)
-                            },
-                            "bias": {
-                                "label": bias_analysis.get('bias_label', 'neutral'),
-                                "credibility": bias_analysis.get('credibility_score', 0.5)
-                            }
-                        }
-                    }
-                    
-                    processed_articles.append(processed_article)
-                    
-            except Exception as e:
-                logger.error(f"Error processing article for {country_name}: {e}")
-                continue
-        
-        return {"articles": processed_articles}
-        
+        return "ok", await asyncio.wait_for(coro, timeout=deadline)
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ {name} data timed out after {deadline}s")
+        return "timeout", None
     except Exception as e:
-        logger.error(f"News processing failed for {country_name}: {e}")
-        return {"articles": [], "message": f"News processing failed: {str(e)}"}
+        logger.error(f"❌ {name} data failed: {e}")
+        return "error", None
 
 async def fetch_economic_data(country_code: str) -> Optional[Dict[str, Any]]:
-    """Fetch economic data with error handling"""
-    try:
-        logger.info(f"Fetching economic data for {country_code}")
-        
-        # The worldbank_service.get_country_indicators expects the 3-letter country code (FRA)
-        # not the 2-letter World Bank code (FR)
-        economic_data = await worldbank_service.get_country_indicators(country_code)
-        
-        if economic_data and len(economic_data) > 0:
-            logger.info(f"Successfully fetched {len(economic_data)} economic indicators")
-            return economic_data
-        else:
-            logger.warning(f"No economic data returned for {country_code}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"Economic data fetch failed for {country_code}: {e}")
+    """Fetch economic data, failures raise so _run_with_deadline reports the source as an error"""
+    logger.info(f"Fetching economic data for {country_code}")
+    
+    # The worldbank_service.get_country_indicators expects the 3-letter country code (FRA)
+    # not the 2-letter World Bank code (FR)
+    economic_data = await worldbank_service.get_country_indicators(country_code)
+    
+    if economic_data and len(economic_data) > 0:
+        logger.info(f"Successfully fetched {len(economic_data)} economic indicators")
+        return economic_data
+    else:
+        logger.warning(f"No economic data returned for {country_code}")
         return None
 
 async def fetch_currency_data(country_code: str) -> Optional[Dict[str, Any]]:
-    """Fetch currency data with error handling"""
-    try:
-        # Use country_code instead of currency_code since currency_service expects country_code
-        currency_data = await currency_service.get_exchange_rates(country_code)
-        
-        # Check if there's an error in the response
-        if currency_data and 'error' not in currency_data:
-            return currency_data
-        elif currency_data and 'error' in currency_data:
-            logger.warning(f"Currency service returned error for {country_code}: {currency_data['error']}")
-            return None
-        else:
-            logger.warning(f"No currency data returned for {country_code}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"Currency data fetch failed for {country_code}: {e}")
+    """Fetch currency data, failures raise so _run_with_deadline reports the source as an error"""
+    # Use country_code instead of currency_code since currency_service expects country_code
+    currency_data = await currency_service.get_exchange_rates(country_code)
+    
+    # Check if there's an error in the response
+    if currency_data and 'error' in currency_data:
+        raise RuntimeError(f"Currency service returned error for {country_code}: {currency_data['error']}")
+    if not currency_data:
+        logger.warning(f"No currency data returned for {country_code}")
         return None
+    return currency_data
@@ -5,24 +5,58 @@ A message broker / queue (for background tasks, pub/sub messaging).
 It’s super fast because RAM is much faster than disk-based storage.'''
 # The async Redis client library. Lets you talk to a Redis server without blocking
 import redis.asyncio as redis
-# used to store python objects as strings in Redis, since it only works with binary and text
+# Redis only stores bytes, values are encoded by the pluggable serializer (msgpack/orjson/json + optional compression)
+# json is still used for small control messages like the pub/sub invalidations
 import json
+import logging
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
 #
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
 # holds app configuration, in this case our Redis connection URL
 from app.core.config import settings
+# in-process first tier, hot keys are served from memory without a network round trip
+from app.core.local_cache import LocalCache
+from app.core.serializers import cache_serializer
+# background refreshes yield upstream rate limit to interactive requests (app/core/rate_limiter.py)
+from app.core.throttle import background_priority
+from app.core.metrics import (
+    registry, CACHE_HITS, CACHE_MISSES, CACHE_ERRORS, CACHE_LATENCY, CACHE_PAYLOAD_BYTES,
+    CACHE_LOCAL_ENTRIES, CACHE_LOCAL_BYTES, CACHE_LOCAL_EVICTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+# every worker listens here and drops its local copy of keys other workers changed or deleted
+INVALIDATION_CHANNEL = "cache:invalidate"
 
 class CacheManager:
     def __init__(self):
         # means no connection until you actually need one
         self.redis_client = None
+        self.local = LocalCache(
+            max_entries=settings.local_cache_max_entries,
+            max_bytes=settings.local_cache_max_bytes,
+            ttl_seconds=settings.local_cache_ttl_seconds,
+        )
+        # local evictions already added to the cache_local_evictions_total counter
+        self._evictions_reported = 0
+        # lets a worker ignore its own invalidation messages
+        self.worker_id = uuid.uuid4().hex
+        self._listener_task: Optional[asyncio.Task] = None
+        # keys with a stale-while-revalidate refresh running in this worker, plus the tasks so they aren't garbage collected
+        self._revalidating: Set[str] = set()
+        self._background_tasks: Set[asyncio.Task] = set()
+        # registered Lua scripts by source, redis-py runs them with EVALSHA (EVAL on a cache miss)
+        self._scripts: Dict[str, Any] = {}
     
     async def connect(self):
         # creates redis client using configured URL
         self.redis_client = redis.from_url(
             settings.redis_url,
-            encoding="utf-8",
-            decode_responses=True # tells redis to return strings instead of raw bytes
+            decode_responses=False # raw bytes, values carry a binary serializer header
         )
     # cleanly closes redis connection if it exists
     async def disconnect(self):
@@ -34,16 +68,91 @@ class CacheManager:
         In Redis, it’s stored as a JSON string
         '{"name": "USA", "population": 331000000}'
         When you call get("country:US") → it turns back into a Python dict.'''
+    # A cache outage should never take the API down, so Redis errors are logged and treated as a miss
+    # Two tiers: the in-process LRU first, then Redis (which refills the LRU on a hit)
+    # Every get/set is also recorded in app/core/metrics.py (hits per prefix and tier, latency, payload size)
     async def get(self, key: str) -> Optional[Any]:
+        started = time.perf_counter()
+        prefix = key_prefix(key)
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_HITS.inc(prefix=prefix, tier="local")
+            CACHE_LATENCY.observe(time.perf_counter() - started, operation="get", tier="local")
+            return value
+        
         if not self.redis_client:   # if no client yet auto-connect
             await self.connect()
         
-        data = await self.redis_client.get(key)   # fetches value for key from redis dict
+        try:
+            data = await self.redis_client.get(key)   # fetches value for key from redis dict
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            CACHE_ERRORS.inc(prefix=prefix, operation="get")
+            return None
+        finally:
+            CACHE_LATENCY.observe(time.perf_counter() - started, operation="get", tier="redis")
         if data:
-            return json.loads(data)  # if found, converts it back to python object
+            try:
+                value = cache_serializer.loads(data)  # if found, converts it back to python object
+            except Exception as e:
+                # e.g. written by a newer format version or with a codec we don't have installed
+                logger.warning(f"Cache decode failed for {key}: {e}")
+                CACHE_ERRORS.inc(prefix=prefix, operation="decode")
+                return None
+            CACHE_HITS.inc(prefix=prefix, tier="redis")
+            CACHE_PAYLOAD_BYTES.observe(len(data), prefix=prefix, operation="get")
+            self.local.set(key, value, size_bytes=len(data))
+            return value
+        CACHE_MISSES.inc(prefix=prefix)
         return None
     
 
+    # get() for many keys: the local tier first, then one MGET for the rest instead of a round trip per key
+    # returns {key: value} for the keys that were found
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        found = {}
+        remote = []
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is not None:
+                CACHE_HITS.inc(prefix=key_prefix(key), tier="local")
+                found[key] = value
+            else:
+                remote.append(key)
+        if not remote:
+            CACHE_LATENCY.observe(time.perf_counter() - started, operation="get_many", tier="local")
+            return found
+        
+        if not self.redis_client:
+            await self.connect()
+        
+        try:
+            payloads = await self.redis_client.mget(remote)
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache get_many failed for {len(remote)} keys: {e}")
+            for key in remote:
+                CACHE_ERRORS.inc(prefix=key_prefix(key), operation="get")
+            return found
+        finally:
+            CACHE_LATENCY.observe(time.perf_counter() - started, operation="get_many", tier="redis")
+        for key, data in zip(remote, payloads):
+            prefix = key_prefix(key)
+            if not data:
+                CACHE_MISSES.inc(prefix=prefix)
+                continue
+            try:
+                value = cache_serializer.loads(data)
+            except Exception as e:
+                logger.warning(f"Cache decode failed for {key}: {e}")
+                CACHE_ERRORS.inc(prefix=prefix, operation="decode")
+                continue
+            CACHE_HITS.inc(prefix=prefix, tier="redis")
+            CACHE_PAYLOAD_BYTES.observe(len(data), prefix=prefix, operation="get")
+            self.local.set(key, value, size_bytes=len(data))
+            found[key] = value
+        return found
+    
     # Sets data in cache
     # so in countries.py: await cache_manager.set(cache_key, countries_data, expire=1800)
     # means "cache this list of countries for 30 minutes, then auto-delete it.”
@@ -51,11 +160,172 @@ class CacheManager:
         if not self.redis_client:
             await self.connect()
         
-        await self.redis_client.set(
-            key, 
-            json.dumps(value, default=str), 
-            ex=expire
-        )
+        started = time.perf_counter()
+        prefix = key_prefix(key)
+        data = cache_serializer.dumps(value)
+        CACHE_PAYLOAD_BYTES.observe(len(data), prefix=prefix, operation="set")
+        # keep the decoded form locally, round-tripped through the serializer so it matches what Redis readers see
+        self.local.set(key, cache_serializer.loads(data), size_bytes=len(data), ttl_seconds=expire)
+        try:
+            await self.redis_client.set(key, data, ex=expire)
+            await self._publish_invalidation(key)
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+            CACHE_ERRORS.inc(prefix=prefix, operation="set")
+        finally:
+            CACHE_LATENCY.observe(time.perf_counter() - started, operation="set", tier="redis")
+    
+    # Stale-while-revalidate
+    # Entries written with set_fresh carry two lifetimes:
+    #   soft TTL: until then the value is fresh and served as-is
+    #   hard TTL: soft TTL + Settings.cache_duration_hours, Redis deletes it after this
+    # Between the two the value is stale: get_or_refresh returns it immediately and starts one
+    # background refresh, so no user waits on the upstream just because an entry got old.
+    async def set_fresh(self, key: str, value: Any, soft_ttl: int):
+        hard_ttl = soft_ttl + settings.cache_duration_hours * 3600
+        await self.set(key, {"swr_value": value, "fresh_until": time.time() + soft_ttl}, expire=hard_ttl)
+    
+    # returns (value, is_fresh) or None on a miss
+    async def _get_entry(self, key: str):
+        entry = await self.get(key)
+        if entry is None:
+            return None
+        return _split_entry(entry)
+    
+    # value only if it is still fresh, e.g. to check whether another worker just refreshed a key
+    async def get_fresh(self, key: str) -> Optional[Any]:
+        entry = await self._get_entry(key)
+        if entry and entry[1]:
+            return entry[0]
+        return None
+    
+    # refresh: fetches the value AND stores it with set_fresh, then returns it
+    # miss -> await refresh(); fresh hit -> value; stale hit -> value now, refresh in the background
+    async def get_or_refresh(self, key: str, refresh: Callable[[], Awaitable[Any]]) -> Any:
+        entry = await self._get_entry(key)
+        if entry is None:
+            return await refresh()
+        value, is_fresh = entry
+        if not is_fresh:
+            await self._revalidate(key, refresh)
+        return value
+    
+    # get_or_refresh for many keys with one Redis round trip: found values are returned (stale ones get a
+    # background refresh from refresh_for(key)), misses are left out so the caller can fetch them together
+    async def get_many_or_refresh(self, keys: List[str], refresh_for: Callable[[str], Callable[[], Awaitable[Any]]]) -> Dict[str, Any]:
+        values = {}
+        for key, entry in (await self.get_many(keys)).items():
+            value, is_fresh = _split_entry(entry)
+            if not is_fresh:
+                await self._revalidate(key, refresh_for(key))
+            values[key] = value
+        return values
+    
+    async def _revalidate(self, key: str, refresh: Callable[[], Awaitable[Any]]):
+        if key in self._revalidating:
+            return
+        # one background refresh per key across all workers, the lease expires on its own if we die
+        if not await self.set_if_absent(f"swr:{key}", self.worker_id, expire=settings.swr_refresh_lock_seconds):
+            return
+        self._revalidating.add(key)
+        
+        async def run():
+            try:
+                with background_priority():
+                    await refresh()
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                self._revalidating.discard(key)
+                await self.delete(f"swr:{key}")
+        
+        task = asyncio.create_task(run())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    # Sets the key only if nobody else has it yet (Redis SET NX), returns True if we got it
+    # Used as a simple cross-worker lease, e.g. only one worker runs the ingestion scheduler at a time
+    async def set_if_absent(self, key: str, value: Any, expire: int) -> bool:
+        if not self.redis_client:
+            await self.connect()
+        
+        try:
+            return bool(await self.redis_client.set(key, cache_serializer.dumps(value), ex=expire, nx=True))
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache set_if_absent failed for {key}: {e}")
+            return False
+    
+    # Atomic shared counter (Redis INCRBYFLOAT), returns the new total or None if Redis is unreachable
+    # Bypasses the local tier on purpose: counters like the monthly AI spend must be exact across workers
+    # expire is only applied when the counter is created
+    async def incr_float(self, key: str, amount: float, expire: int) -> Optional[float]:
+        if not self.redis_client:
+            await self.connect()
+        
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.incrbyfloat(key, amount)
+                pipe.expire(key, expire, nx=True)
+                total, _ = await pipe.execute()
+            return float(total)
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache incr_float failed for {key}: {e}")
+            return None
+    
+    async def get_float(self, key: str) -> Optional[float]:
+        """Current value of an incr_float counter (0.0 if it doesn't exist, None if Redis is unreachable)"""
+        if not self.redis_client:
+            await self.connect()
+        
+        try:
+            value = await self.redis_client.get(key)
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache get_float failed for {key}: {e}")
+            return None
+        return float(value) if value is not None else 0.0
+    
+    # Hash helpers for small shared records that several workers update field by field (HSET merges, a plain set()
+    # of the whole value would overwrite what other workers wrote). Values are plain strings, the local tier is skipped
+    async def set_fields(self, key: str, fields: Dict[str, str], expire: int):
+        if not fields:
+            return
+        if not self.redis_client:
+            await self.connect()
+        
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, expire)
+                await pipe.execute()
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache set_fields failed for {key}: {e}")
+    
+    # every field of a set_fields hash ({} if it doesn't exist, None if Redis is unreachable)
+    async def get_fields(self, key: str) -> Optional[Dict[str, str]]:
+        if not self.redis_client:
+            await self.connect()
+        
+        try:
+            fields = await self.redis_client.hgetall(key)
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache get_fields failed for {key}: {e}")
+            return None
+        return {field.decode(): value.decode() for field, value in fields.items()}
+    
+    # Runs a Lua script atomically on Redis, returns its result or None if Redis is unreachable
+    # Used for read-modify-write state shared by every worker, e.g. the upstream rate limiter buckets (app/core/rate_limiter.py)
+    async def run_script(self, script: str, keys: List[str], args: List[Any]) -> Optional[Any]:
+        if not self.redis_client:
+            await self.connect()
+        
+        registered = self._scripts.get(script)
+        if registered is None:
+            registered = self._scripts[script] = self.redis_client.register_script(script)
+        try:
+            return await registered(keys=keys, args=args, client=self.redis_client)
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache script failed for {keys[0] if keys else 'no keys'}: {e}")
+            return None
     
     # delete from cache
     # Lets you manually invalidate cache for a given key.
@@ -64,8 +334,104 @@ class CacheManager:
         if not self.redis_client:
             await self.connect()
         
-        await self.redis_client.delete(key)
+        self.local.pop(key)
+        try:
+            await self.redis_client.delete(key)
+            await self._publish_invalidation(key)
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache delete failed for {key}: {e}")
+    
+    # Cross-worker invalidation: every worker has its own local tier, so a change made by one worker
+    # is broadcast over Redis pub/sub and the others drop their (now stale) local copy
+    async def _publish_invalidation(self, key: str):
+        await self.redis_client.publish(INVALIDATION_CHANNEL, json.dumps({"key": key, "origin": self.worker_id}))
+    
+    # started from the app lifespan, keeps listening (and reconnecting) until stopped
+    def start_invalidation_listener(self):
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen_for_invalidations())
+    
+    async def stop_invalidation_listener(self):
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+    
+    async def _listen_for_invalidations(self):
+        while True:
+            try:
+                if not self.redis_client:
+                    await self.connect()
+                pubsub = self.redis_client.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        payload = json.loads(message["data"])
+                        if payload.get("origin") != self.worker_id:
+                            self.local.pop(payload["key"])
+                finally:
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except (redis.RedisError, OSError) as e:
+                # while disconnected we may miss invalidations, so start over with an empty local tier
+                logger.warning(f"Cache invalidation listener disconnected, retrying: {e}")
+                self.local.clear()
+                await asyncio.sleep(5)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"local": self.local.stats()}
+    
+    # mirrors the local tier's state into metrics right before /metrics renders
+    def collect_metrics(self):
+        stats = self.local.stats()
+        CACHE_LOCAL_ENTRIES.set(stats["entries"])
+        CACHE_LOCAL_BYTES.set(stats["bytes"])
+        # the eviction counter only ever moves forward, by whatever was evicted since the last scrape
+        CACHE_LOCAL_EVICTIONS.inc(stats["evictions"] - self._evictions_reported)
+        self._evictions_reported = stats["evictions"]
+
+    # Distributed lock shared by every worker, used for cross-worker request coalescing (app/core/singleflight.py)
+    # Yields True if we hold the lock, False if it timed out or Redis is unreachable, callers then just carry on without it
+    # timeout: lock auto-expires after this many seconds in case the holder dies
+    # blocking_timeout: how long to wait for another holder to release it
+    @asynccontextmanager
+    async def lock(self, name: str, timeout: float, blocking_timeout: float) -> AsyncIterator[bool]:
+        if not self.redis_client:
+            await self.connect()
+        
+        redis_lock = self.redis_client.lock(f"lock:{name}", timeout=timeout, blocking_timeout=blocking_timeout)
+        try:
+            acquired = await redis_lock.acquire()
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Cache lock failed for {name}: {e}")
+            acquired = False
+        
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await redis_lock.release()
+                except (redis.RedisError, OSError) as e:  # LockError (expired lock) is a RedisError too
+                    logger.warning(f"Cache unlock failed for {name}: {e}")
+
+# (value, is_fresh) for a cached value, unwrapping set_fresh entries
+def _split_entry(entry: Any):
+    if isinstance(entry, dict) and "fresh_until" in entry:
+        return entry["swr_value"], time.time() < entry["fresh_until"]
+    return entry, False  # written with plain set(), treat it as stale so it gets refreshed
+
+# groups keys for metrics without exploding label cardinality: "intel:news:USA" -> "intel:news", "countries:all" -> "countries"
+def key_prefix(key: str) -> str:
+    return key.rsplit(":", 1)[0] if ":" in key else key
 
 # creates global instance of cache manager
 # this is what you import and use everywhere (from app.core.cache import cache_manager).
 cache_manager = CacheManager()
+registry.add_collector(cache_manager.collect_metrics)
@@ -0,0 +1,175 @@
+"""
+Circuit breakers and adaptive timeouts for upstream APIs
+
+Every pooled upstream client (app/core/http_client.py) sends its requests through
+CircuitBreakerTransport, which wraps the real transport:
+    - adaptive timeout: the read timeout is the observed p99 latency times
+      Settings.adaptive_timeout_multiplier, between adaptive_timeout_min and the upstream's
+      configured timeout (which is now only the ceiling). Timed out requests are not samples,
+      so an outage can't inflate the timeout; an upstream that just got slower is caught by
+      the half-open probe below, which gets the full ceiling and records its real latency.
+    - circuit breaker: after breaker_failure_threshold consecutive failures (timeouts,
+      connection errors, 5xx) the circuit opens and requests fail in microseconds with
+      CircuitOpenError instead of waiting out a timeout. After breaker_open_seconds one probe
+      request is let through (half-open): success closes the circuit, failure opens it again.
+CircuitOpenError is an httpx.TransportError, so callers' existing error handling applies and
+they fall back to cached / stored data the same way they do for any failed call.
+State is per worker, shown at /api/v1/news/status and in /metrics.
+"""
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import registry, LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+UPSTREAM_LATENCY = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream request latency by upstream and outcome",
+    ("upstream", "outcome"), LATENCY_BUCKETS + (2.5, 5.0, 10.0, 30.0)
+)
+UPSTREAM_REJECTED = registry.counter(
+    "upstream_circuit_rejections_total", "Requests failed fast because the upstream's circuit was open", ("upstream",)
+)
+UPSTREAM_CIRCUIT_STATE = registry.gauge(
+    "upstream_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half open, 2 open)", ("upstream",)
+)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """The upstream's circuit is open, the request was not sent"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, max_timeout: float):
+        self.name = name
+        self.max_timeout = max_timeout
+        self._set_state(CLOSED)
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        # recent latencies (seconds) of requests that got an answer, for the p99
+        self._latencies: deque = deque(maxlen=settings.adaptive_timeout_window)
+        self.stats = {"requests": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def timeout(self, probe: bool = False) -> float:
+        """Read timeout for the next request"""
+        if probe or len(self._latencies) < settings.adaptive_timeout_min_samples:
+            return self.max_timeout
+        return min(self.max_timeout, max(settings.adaptive_timeout_min, self.p99() * settings.adaptive_timeout_multiplier))
+
+    def p99(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError if the request may not go out, returns True if it is the half-open probe"""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= settings.breaker_open_seconds:
+            self._set_state(HALF_OPEN)
+        if self.state == CLOSED:
+            return False
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.stats["rejected"] += 1
+        UPSTREAM_REJECTED.inc(upstream=self.name)
+        retry_in = max(0.0, settings.breaker_open_seconds - (time.monotonic() - self.opened_at))
+        raise CircuitOpenError(f"{self.name} circuit is {self.state}, retry in {retry_in:.0f}s")
+
+    def record_success(self, latency: float, probe: bool):
+        self.stats["requests"] += 1
+        self._latencies.append(latency)
+        self.consecutive_failures = 0
+        if probe:
+            self._probe_in_flight = False
+        if self.state != CLOSED:
+            logger.info(f"{self.name} circuit closed, upstream answered in {latency:.2f}s")
+            self._set_state(CLOSED)
+
+    def record_failure(self, probe: bool):
+        self.stats["requests"] += 1
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        if probe:
+            self._probe_in_flight = False
+        if probe or (self.state == CLOSED and self.consecutive_failures >= settings.breaker_failure_threshold):
+            self._open()
+
+    def release_probe(self, probe: bool):
+        """The probe never finished (cancelled), let the next request probe instead"""
+        if probe:
+            self._probe_in_flight = False
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self.stats["opened"] += 1
+        logger.warning(f"{self.name} circuit opened after {self.consecutive_failures} consecutive failures, "
+                       f"failing fast for {settings.breaker_open_seconds:.0f}s")
+        self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        self.state = state
+        UPSTREAM_CIRCUIT_STATE.set(STATE_VALUES[state], upstream=self.name)
+
+    def status(self) -> Dict[str, Any]:
+        p99 = self.p99()
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "timeout_seconds": round(self.timeout(), 3),
+            "p99_latency_seconds": round(p99, 3) if p99 is not None else None,
+            "samples": len(self._latencies),
+            **self.stats,
+        }
+
+
+class CircuitBreakerTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport with a CircuitBreaker: fail fast while open, adaptive read timeout, outcome recording"""
+
+    def __init__(self, breaker: CircuitBreaker, transport: httpx.AsyncBaseTransport):
+        self.breaker = breaker
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        probe = self.breaker.before_request()
+        request.extensions["timeout"] = {**request.extensions.get("timeout", {}), "read": self.breaker.timeout(probe)}
+        started = time.perf_counter()
+        finished = False
+        try:
+            response = await self._transport.handle_async_request(request)
+            finished = True
+        except httpx.TimeoutException:
+            finished = True
+            self.breaker.record_failure(probe)
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, upstream=self.breaker.name, outcome="timeout")
+            raise
+        except httpx.TransportError:
+            finished = True
+            self.breaker.record_failure(probe)
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, upstream=self.breaker.name, outcome="error")
+            raise
+        finally:
+            if not finished:
+                self.breaker.release_probe(probe)
+
+        # latency to the response headers, the part the read timeout has to cover
+        latency = time.perf_counter() - started
+        if response.status_code >= 500:
+            self.breaker.record_failure(probe)
+            UPSTREAM_LATENCY.observe(latency, upstream=self.breaker.name, outcome="5xx")
+        else:
+            self.breaker.record_success(latency, probe)
+            UPSTREAM_LATENCY.observe(latency, upstream=self.breaker.name, outcome="ok")
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
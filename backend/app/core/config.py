@@ -25,6 +25,34 @@ class Settings(BaseSettings):
     world_bank_api_url: str = "https://api.worldbank.org/v2"
     news_api_url: str = "https://newsapi.org/v2"
     bbc_rss_url: str = "http://feeds.bbci.co.uk/news/rss.xml"
+    currency_api_url: str = "https://api.exchangerate-api.com/v4"
+    openai_api_url: str = "https://api.openai.com/v1"  # point both at scripts/llm_stub_server.py for offline load tests
+    anthropic_api_url: str = "https://api.anthropic.com/v1"
+    
+    # Upstream HTTP client pool (see app/core/http_client.py)
+    upstream_max_connections: int = 20  # per upstream host
+    upstream_max_keepalive_connections: int = 10
+    upstream_keepalive_expiry: float = 30.0
+    upstream_connect_timeout: float = 5.0
+    upstream_http2: bool = True
+    # read timeout ceilings, the actual timeout adapts to observed latency (see below)
+    news_api_timeout: float = 30.0
+    world_bank_timeout: float = 15.0
+    currency_api_timeout: float = 15.0
+    llm_api_timeout: float = 60.0
+    
+    # Circuit breakers and adaptive timeouts per upstream (app/core/circuit_breaker.py)
+    breaker_failure_threshold: int = 5  # consecutive timeouts / connection errors / 5xx that open the circuit
+    breaker_open_seconds: float = 30.0  # how long an open circuit fails fast before one probe request goes through
+    adaptive_timeout_multiplier: float = 3.0  # read timeout = observed p99 latency x this, capped by the timeouts above
+    adaptive_timeout_min: float = 2.0
+    adaptive_timeout_min_samples: int = 20  # the configured timeout is used until this many requests were seen
+    adaptive_timeout_window: int = 200  # recent requests the p99 is taken over
+    
+    # LLM provider adapters (app/services/llm_providers.py)
+    llm_max_retries: int = 3  # on 429 / 5xx / timeouts, exponential backoff with full jitter
+    llm_retry_base_delay: float = 0.5
+    llm_max_concurrency: int = 4  # per provider and worker, bounds complete_batch fan-out
     
     # AI Configuration
     ai_provider: str = "free"
@@ -33,16 +61,105 @@ class Settings(BaseSettings):
     max_monthly_ai_budget: int = 50
     showcase_countries: str = "USA,CHN,GBR,DEU,JPN"
     
+    # Premium AI tier (app/services/hybrid_smart_service.py), spend is shared across workers through Redis
+    premium_countries: str = "USA,CHN,GBR,DEU,JPN"  # always get premium analysis while budget remains
+    enable_premium_features: bool = False  # premium bias analysis for every country
+    premium_sample_percent: int = 10  # share of other articles sent to premium, picked by content hash
+    premium_ai_calls_per_minute: int = 30  # across all workers
+    premium_ai_concurrency: int = 2  # per worker
+    premium_ai_queue_timeout: float = 5.0  # seconds a call waits for a premium slot before using the free tier
+    
     # Model Settings
     openai_model_basic: str = "gpt-3.5-turbo"
     openai_model_premium: str = "gpt-4"
     anthropic_model: str = "claude-3-sonnet-20240229"
     
+    # Article analysis batches (app/services/hybrid_ai_service.py)
+    ai_sentiment_backend: str = "keyword"  # keyword (lexicon counts), or opt in to vader / transformer
+    ai_sentiment_model: str = "distilbert-base-uncased-finetuned-sst-2-english"  # used by the transformer backend
+    ai_batch_size: int = 16  # texts per model forward pass
+    ai_worker_threads: int = 2  # analysis runs here so the event loop never blocks on CPU work
+    lexicon_dir: Optional[str] = None  # keyword lexicons for sentiment / bias, None = app/data/lexicons
+    
+    # Article embeddings for related-article search (app/services/embedding_service.py)
+    enable_embeddings: bool = True
+    embedding_model: str = "all-MiniLM-L6-v2"  # sentence-transformers model fetched by scripts/download_models.py
+    embedding_dimensions: int = 384  # must match news_articles.embedding (migration 005)
+    embedding_batch_size: int = 32
+    embedding_index_max_items: int = 50000  # in-process fallback index when pgvector isn't available
+    
     # Performance Settings
     enable_aggressive_caching: bool = True
     cache_duration_hours: int = 24
     max_tokens_per_request: int = 2000
     
+    # Economic indicator store (economic_indicators table)
+    economic_data_stale_days: int = 7  # refresh stored World Bank data in the background after this
+    indicator_store_timeout: float = 2.0  # seconds before a store read gives up and we go to the API (also bounds store writes)
+    indicator_store_retry_seconds: int = 60  # how long to skip the store after a database error
+    
+    # Redis value encoding (app/core/serializers.py), "auto" picks the best installed option
+    cache_serializer: str = "auto"  # msgpack, orjson or json
+    cache_compression: str = "auto"  # zstd, lz4, zlib or none
+    cache_compression_threshold: int = 4096  # bytes, smaller payloads are stored uncompressed
+    
+    # In-process cache tier in front of Redis (app/core/local_cache.py)
+    local_cache_max_entries: int = 2048
+    local_cache_max_bytes: int = 32 * 1024 * 1024
+    local_cache_ttl_seconds: int = 60  # upper bound on staleness if an invalidation message is missed
+    
+    # Stale-while-revalidate lifetimes per source (soft TTL), data is then served stale for up to
+    # cache_duration_hours more while one background refresh runs
+    news_cache_ttl_minutes: int = 30
+    currency_cache_ttl_hours: int = 1  # also how long the shared FX rate table stays fresh
+    worldbank_cache_ttl_days: int = 1
+    swr_refresh_lock_seconds: int = 60
+    
+    # Request coalescing (app/core/singleflight.py)
+    enable_distributed_single_flight: bool = True  # also coalesce across workers with a Redis lock
+    single_flight_lock_seconds: int = 30  # lock auto-expiry if the fetching worker dies
+    single_flight_wait_seconds: float = 20.0  # how long other workers wait before fetching themselves
+    
+    # Background ingestion (app/services/ingestion_service.py)
+    enable_background_ingestion: bool = True  # set false when running scripts/run_ingestion.py separately
+    ingestion_tick_seconds: int = 60
+    ingestion_concurrency: int = 4
+    ingestion_economic_interval_hours: int = 24
+    ingestion_currency_interval_minutes: int = 60
+    ingestion_news_interval_minutes: int = 360  # 0 disables news ingestion; each cycle refreshes only the stalest countries its share of news_api_daily_quota covers
+    news_api_min_interval_seconds: float = 1.0
+    
+    # Upstream rate limits and daily quotas shared by every worker (app/core/rate_limiter.py)
+    # rate is a token bucket refill per minute, burst its size; daily quotas reset at midnight UTC, 0 = no quota
+    news_api_rate_per_minute: float = 30.0
+    news_api_burst: int = 5
+    news_api_daily_quota: int = 100  # NewsAPI developer plan
+    world_bank_rate_per_minute: float = 120.0
+    world_bank_burst: int = 10
+    world_bank_daily_quota: int = 0
+    currency_api_rate_per_minute: float = 60.0
+    currency_api_burst: int = 10
+    currency_api_daily_quota: int = 0
+    upstream_interactive_reserve: float = 0.2  # share of each burst and daily quota background refresh may not use
+    upstream_max_wait_seconds: float = 3.0  # longest an interactive request queues for a token before serving cached data
+    upstream_background_max_wait_seconds: float = 120.0
+    upstream_limited_cooldown_seconds: float = 60.0  # how long every worker backs off after a 429 without Retry-After
+    
+    # FX rate table (app/services/fx_rates.py): one base table, cross rates computed locally
+    fx_base_currency: str = "USD"
+    fx_table_reload_seconds: int = 60  # how often each worker checks Redis for a newer table (and Postgres for new history)
+    fx_history_memory_days: int = 30  # snapshots kept in each worker's ring buffer, older ranges are read from Postgres
+    fx_history_max_days: int = 366  # longest range /{country_code}/fx-history serves
+
+    # Per-source deadlines (seconds) for the country intelligence fan-out
+    economic_fetch_deadline: float = 8.0
+    currency_fetch_deadline: float = 5.0
+    news_fetch_deadline: float = 20.0
+    
+    # Multi-country summaries, POST /api/v1/news/batch (app/services/country_summary_service.py)
+    batch_max_countries: int = 250
+    batch_news_fetch_limit: int = 3  # NewsAPI fetches per batch request, for countries with no cached or stored news
+    
     # Feature Flags
     enable_real_time_analysis: bool = False
     enable_advanced_bias_detection: bool = False
@@ -0,0 +1,96 @@
+"""
+Shared, pooled HTTP clients for upstream APIs
+
+Creating an httpx.AsyncClient per request means every call pays a fresh TCP + TLS
+handshake. Instead we keep one long-lived client per upstream host, created in the
+FastAPI lifespan (see app/main.py) and closed on shutdown, so connections are kept
+alive and reused across requests. Each client's requests go through the upstream's circuit
+breaker with an adaptive read timeout (app/core/circuit_breaker.py); the timeouts configured
+below are the ceilings.
+Example: client = upstream_clients.get("worldbank"); await client.get("/country/US")
+"""
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitBreakerTransport
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2]); fall back to HTTP/1.1 without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class UpstreamClients:
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        # outlive the clients, so a recreated client keeps its upstream's state and latency history
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def _upstreams(self) -> Dict[str, Dict[str, object]]:
+        """Base URL and read timeout for every upstream we talk to"""
+        return {
+            "worldbank": {"base_url": settings.world_bank_api_url, "timeout": settings.world_bank_timeout},
+            "news": {"base_url": settings.news_api_url, "timeout": settings.news_api_timeout},
+            "currency": {"base_url": settings.currency_api_url, "timeout": settings.currency_api_timeout},
+            "openai": {"base_url": settings.openai_api_url, "timeout": settings.llm_api_timeout},
+            "anthropic": {"base_url": settings.anthropic_api_url, "timeout": settings.llm_api_timeout},
+        }
+
+    def _build_client(self, base_url: str, timeout: float, breaker: Optional[CircuitBreaker] = None, **kwargs) -> httpx.AsyncClient:
+        http2 = HTTP2_AVAILABLE and settings.upstream_http2
+        # each client talks to exactly one host, so these limits are per host
+        limits = httpx.Limits(
+            max_connections=settings.upstream_max_connections,
+            max_keepalive_connections=settings.upstream_max_keepalive_connections,
+            keepalive_expiry=settings.upstream_keepalive_expiry,
+        )
+        client_timeout = httpx.Timeout(timeout, connect=settings.upstream_connect_timeout)
+        if breaker is None:
+            return httpx.AsyncClient(base_url=base_url, http2=http2, limits=limits, timeout=client_timeout, **kwargs)
+        transport = CircuitBreakerTransport(breaker, httpx.AsyncHTTPTransport(http2=http2, limits=limits))
+        return httpx.AsyncClient(base_url=base_url, transport=transport, timeout=client_timeout, **kwargs)
+    
+    def _breaker(self, name: str, timeout: float) -> CircuitBreaker:
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = self.breakers[name] = CircuitBreaker(name, max_timeout=timeout)
+        return breaker
+    
+    def _create(self, name: str, config: Dict[str, Any]) -> httpx.AsyncClient:
+        return self._build_client(config["base_url"], config["timeout"], breaker=self._breaker(name, config["timeout"]))
+
+    async def start(self):
+        """Create one pooled client per upstream (called from the app lifespan)"""
+        for name, config in self._upstreams().items():
+            if name not in self._clients:
+                self._clients[name] = self._create(name, config)
+        logger.info(f"Upstream HTTP clients ready: {', '.join(self._clients)} (http2={HTTP2_AVAILABLE and settings.upstream_http2})")
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Get the shared client for an upstream, creating it lazily (e.g. in scripts without a lifespan)"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            config = self._upstreams().get(name)
+            if config is None:
+                raise KeyError(f"Unknown upstream '{name}'")
+            client = self._create(name, config)
+            self._clients[name] = client
+        return client
+
+    def breaker_status(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit state, current timeout and latency per upstream used so far by this worker"""
+        return {name: breaker.status() for name, breaker in self.breakers.items()}
+    
+    async def close(self):
+        """Close every pooled connection (called on app shutdown)"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Global instance, import it anywhere: from app.core.http_client import upstream_clients
+upstream_clients = UpstreamClients()
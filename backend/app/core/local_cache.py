@@ -0,0 +1,78 @@
+"""
+In-process LRU + TTL cache, the first tier in front of Redis (see app/core/cache.py)
+
+A Redis get is a network round trip plus a JSON decode; for hot keys like countries:all
+that is pure overhead. This tier keeps recently used, already-decoded values in memory,
+bounded by entry count and approximate byte size, and evicts the least recently used.
+Values are shared with callers, so treat anything returned from the cache as read-only.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, expires_at, size_bytes), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self.expirations += 1
+            self.misses += 1
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, size_bytes: int, ttl_seconds: Optional[float] = None):
+        """Store a decoded value, size_bytes is its encoded size (used for the byte limit)"""
+        if size_bytes > self.max_bytes:
+            # never let one huge payload flush the whole tier
+            self.pop(key)
+            return
+        self.pop(key)
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self._entries[key] = (value, time.monotonic() + ttl, size_bytes)
+        self._bytes += size_bytes
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,171 @@
+"""
+Minimal in-process metrics with Prometheus text exposition (served at /metrics, see app/main.py)
+
+Counters, gauges and histograms with labels, enough to see whether the cache is helping
+(hit ratio per key prefix, get/set latency, payload sizes) and to tune TTLs against real
+traffic. Each uvicorn worker keeps its own numbers and only the worker that answers a scrape
+is exported, so every sample carries a worker="<pid>" label; aggregate across workers in the
+query, e.g. sum without (worker) (rate(cache_hits_total[5m])).
+Example: CACHE_HITS.inc(prefix="intel:news", tier="local")
+"""
+import math
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self, const_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        raise NotImplementedError
+
+    def render(self, const_labels: Optional[Dict[str, str]] = None) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples(const_labels))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self, const_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, const_labels)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def samples(self, const_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, const_labels)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # per label set: (cumulative bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        counts = state[0]
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                counts[i] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self, const_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            for upper, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, {**(const_labels or {}), "le": _format_value(upper)})
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labelnames, key, const_labels)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        # called right before rendering, for gauges that mirror state kept elsewhere
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        for collector in self._collectors:
+            collector()
+        # read at render time, not import time, so workers forked from a preloaded app get their own pid
+        const_labels = {"worker": str(os.getpid())}
+        return "\n".join(metric.render(const_labels) for metric in self._metrics.values()) + "\n"
+
+
+# Global registry, every module registers its metrics here
+registry = MetricsRegistry()
+
+# Cache metrics (recorded in app/core/cache.py)
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CACHE_HITS = registry.counter("cache_hits_total", "Cache hits by key prefix and tier (local or redis)", ("prefix", "tier"))
+CACHE_MISSES = registry.counter("cache_misses_total", "Cache misses (not found in any tier) by key prefix", ("prefix",))
+CACHE_ERRORS = registry.counter("cache_errors_total", "Redis or decode errors by key prefix and operation", ("prefix", "operation"))
+CACHE_LATENCY = registry.histogram(
+    "cache_operation_duration_seconds", "Cache get/set latency by operation and the tier that answered",
+    ("operation", "tier"), LATENCY_BUCKETS
+)
+CACHE_PAYLOAD_BYTES = registry.histogram(
+    "cache_payload_bytes", "Encoded payload size by key prefix and operation", ("prefix", "operation"), SIZE_BUCKETS
+)
+CACHE_LOCAL_ENTRIES = registry.gauge("cache_local_entries", "Entries currently held in the in-process cache tier")
+CACHE_LOCAL_BYTES = registry.gauge("cache_local_bytes", "Approximate bytes held in the in-process cache tier")
+CACHE_LOCAL_EVICTIONS = registry.counter("cache_local_evictions_total", "LRU evictions from the in-process tier")
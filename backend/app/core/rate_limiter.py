@@ -0,0 +1,265 @@
+"""
+Upstream rate limits and daily quotas, shared by every worker through Redis
+
+One token bucket per upstream (NewsAPI, World Bank, exchangerate-api), refilled at
+`rate_per_minute` up to `burst`, plus a per-UTC-day request counter checked against
+`daily_quota`. Both live in Redis and are updated by one Lua script, so concurrent requests
+from all workers can't overshoot the limit between a check and a take.
+
+Interactive requests (someone clicked a country) go ahead of background refresh (ingestion,
+stale-while-revalidate): background work runs inside `background_priority()` (app/core/throttle.py), queues behind
+interactive callers in this worker, and may not touch the share of the burst and the daily
+quota held back by Settings.upstream_interactive_reserve.
+
+Once a quota is spent (or the upstream answered 429), the limiter remembers until when, so
+callers get UpstreamLimitExceeded straight away without a Redis or upstream round trip and
+can serve what's cached instead.
+Example:
+    try:
+        await upstream_limits.acquire("news")
+    except UpstreamLimitExceeded:
+        return cached
+Without Redis each worker falls back to its own bucket and counter.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.throttle import BACKGROUND, INTERACTIVE, current_priority
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamLimitExceeded(Exception):
+    """Raised instead of making a call the upstream would refuse; retry_after is in seconds"""
+
+    def __init__(self, upstream: str, reason: str, retry_after: float):
+        super().__init__(f"{upstream} {reason}, retry in {retry_after:.0f}s")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# KEYS: bucket hash, daily counter, blocked marker
+# ARGV: now (s), rate (tokens/s), burst, daily quota (0 = none), reserve share, background (0/1), counter ttl (s)
+# Returns {allowed (0/1), wait in ms (-1 = daily quota spent, -2 = blocked), requests used today}
+TAKE_SCRIPT = """
+local blocked = redis.call('PTTL', KEYS[3])
+if blocked > 0 then
+  return {0, -2, blocked}
+end
+local now, rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local quota, reserve, background = tonumber(ARGV[4]), tonumber(ARGV[5]), ARGV[6] == '1'
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+if quota > 0 then
+  local allowed = quota
+  if background then allowed = math.floor(quota * (1 - reserve)) end
+  if used >= allowed then
+    return {0, -1, used}
+  end
+end
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local need = 1
+if background then need = 1 + burst * reserve end
+local ttl = math.ceil(burst / rate * 1000) + 1000
+if tokens < need then
+  redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+  redis.call('PEXPIRE', KEYS[1], ttl)
+  return {0, math.ceil((need - tokens) / rate * 1000), used}
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ttl)
+if quota > 0 then
+  used = redis.call('INCR', KEYS[2])
+  redis.call('EXPIRE', KEYS[2], ARGV[7])
+end
+return {1, 0, used}
+"""
+
+
+def _seconds_until_utc_midnight() -> float:
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+class UpstreamRateLimiter:
+    """Token bucket + daily quota for one upstream, with interactive-first queueing in this worker"""
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int, daily_quota: int = 0):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.daily_quota = daily_quota
+        # local state: when the upstream is known to refuse calls, and the fallback bucket without Redis
+        self._blocked_until = 0.0
+        self._block_reason = ""
+        self._local_tokens = float(self.burst)
+        self._local_refilled = time.monotonic()
+        self._local_used: Tuple[str, int] = ("", 0)
+        # waiting callers as (priority, arrival) in a heap, only the first one takes from the bucket
+        self._waiters: List[Tuple[int, int]] = []
+        self._arrivals = itertools.count()
+        self._changed = asyncio.Condition()
+        self.stats = {"granted": 0, "waited": 0, "rejected": 0, "upstream_429": 0}
+
+    def _keys(self) -> List[str]:
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        return [f"ratelimit:{self.name}:bucket", f"ratelimit:{self.name}:day:{day}", f"ratelimit:{self.name}:blocked"]
+
+    def check(self):
+        """Raise UpstreamLimitExceeded if this worker already knows the upstream will refuse (no I/O)"""
+        remaining = self._blocked_until - time.monotonic()
+        if remaining > 0:
+            self.stats["rejected"] += 1
+            raise UpstreamLimitExceeded(self.name, self._block_reason, remaining)
+
+    def _block(self, reason: str, seconds: float):
+        self._blocked_until = time.monotonic() + seconds
+        self._block_reason = reason
+        logger.warning(f"{self.name}: {reason}, refusing calls for {seconds:.0f}s")
+
+    async def acquire(self, max_wait: Optional[float] = None):
+        """Wait for a token (interactive callers first), or raise UpstreamLimitExceeded when the daily
+        quota is spent, the upstream is blocking us, or no token frees up within max_wait seconds"""
+        self.check()
+        priority = current_priority()
+        if max_wait is None:
+            max_wait = settings.upstream_max_wait_seconds if priority == INTERACTIVE else settings.upstream_background_max_wait_seconds
+        deadline = time.monotonic() + max_wait
+        ticket = (priority, next(self._arrivals))
+        heapq.heappush(self._waiters, ticket)
+        waited = False
+        try:
+            while True:
+                async with self._changed:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: self._waiters[0] == ticket),
+                        max(deadline - time.monotonic(), 0)
+                    )
+                allowed, wait = await self._take(priority == BACKGROUND)
+                if allowed:
+                    self.stats["granted"] += 1
+                    self.stats["waited"] += waited
+                    return
+                if time.monotonic() + wait > deadline:
+                    self.stats["rejected"] += 1
+                    raise UpstreamLimitExceeded(self.name, "rate limit reached", wait)
+                waited = True
+                await asyncio.sleep(wait)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            raise UpstreamLimitExceeded(self.name, "rate limit queue full", max_wait)
+        finally:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def _take(self, background: bool) -> Tuple[bool, float]:
+        """(allowed, seconds until a token is due), raises UpstreamLimitExceeded if the quota is spent"""
+        reserve = settings.upstream_interactive_reserve
+        result = await cache_manager.run_script(
+            TAKE_SCRIPT, self._keys(),
+            [time.time(), self.rate, self.burst, self.daily_quota, reserve, int(background), 2 * 86400]
+        )
+        if result is None:
+            return self._take_local(background, reserve)
+
+        allowed, wait_ms, value = (int(part) for part in result)
+        if wait_ms == -2:
+            self._block("blocked after a 429", value / 1000)
+            self.check()
+        if wait_ms == -1:
+            if background and value < self.daily_quota:
+                # only the interactive reserve is left, background work stops without blocking interactive callers
+                raise UpstreamLimitExceeded(self.name, "daily quota reserved for interactive requests", _seconds_until_utc_midnight())
+            self._block(f"daily quota of {self.daily_quota} requests spent", _seconds_until_utc_midnight())
+            self.check()
+        return bool(allowed), wait_ms / 1000
+
+    def _take_local(self, background: bool, reserve: float) -> Tuple[bool, float]:
+        """Same rules as TAKE_SCRIPT for this worker alone, used while Redis is unreachable"""
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        used = self._local_used[1] if self._local_used[0] == day else 0
+        if self.daily_quota:
+            allowed = int(self.daily_quota * (1 - reserve)) if background else self.daily_quota
+            if used >= allowed:
+                raise UpstreamLimitExceeded(self.name, "daily quota spent (this worker)", _seconds_until_utc_midnight())
+
+        now = time.monotonic()
+        self._local_tokens = min(self.burst, self._local_tokens + (now - self._local_refilled) * self.rate)
+        self._local_refilled = now
+        need = 1 + self.burst * reserve if background else 1
+        if self._local_tokens < need:
+            return False, (need - self._local_tokens) / self.rate
+        self._local_tokens -= 1
+        self._local_used = (day, used + 1)
+        return True, 0.0
+
+    async def report_limited(self, retry_after: Optional[str] = None):
+        """The upstream answered 429 anyway (quota used up elsewhere, or our limits are too generous):
+        stop every worker calling it for Retry-After seconds (or the configured cooldown)"""
+        self.stats["upstream_429"] += 1
+        try:
+            seconds = float(retry_after)
+        except (TypeError, ValueError):
+            seconds = settings.upstream_limited_cooldown_seconds
+        self._block("upstream returned 429", seconds)
+        await cache_manager.set(self._keys()[2], True, expire=max(1, int(seconds)))
+
+    async def status(self) -> Dict[str, Any]:
+        used = await cache_manager.get_float(self._keys()[1])
+        return {
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "daily_quota": self.daily_quota or None,
+            "used_today": int(used) if used is not None else None,
+            "blocked_for_seconds": max(0, round(self._blocked_until - time.monotonic())),
+            "queued": len(self._waiters),
+            **self.stats,
+        }
+
+
+class UpstreamLimits:
+    def __init__(self):
+        self._limiters: Dict[str, UpstreamRateLimiter] = {}
+
+    def _configs(self) -> Dict[str, Dict[str, float]]:
+        """Limits per upstream, named like the pooled clients in app/core/http_client.py"""
+        return {
+            "news": {"rate_per_minute": settings.news_api_rate_per_minute, "burst": settings.news_api_burst,
+                     "daily_quota": settings.news_api_daily_quota},
+            "worldbank": {"rate_per_minute": settings.world_bank_rate_per_minute, "burst": settings.world_bank_burst,
+                          "daily_quota": settings.world_bank_daily_quota},
+            "currency": {"rate_per_minute": settings.currency_api_rate_per_minute, "burst": settings.currency_api_burst,
+                         "daily_quota": settings.currency_api_daily_quota},
+        }
+
+    def get(self, name: str) -> UpstreamRateLimiter:
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            config = self._configs().get(name)
+            if config is None:
+                raise KeyError(f"Unknown upstream '{name}'")
+            limiter = self._limiters[name] = UpstreamRateLimiter(name, **config)
+        return limiter
+
+    async def acquire(self, name: str, max_wait: Optional[float] = None):
+        await self.get(name).acquire(max_wait)
+
+    async def status(self) -> Dict[str, Any]:
+        return {name: await self.get(name).status() for name in self._configs()}
+
+
+# Global instance, import it anywhere: from app.core.rate_limiter import upstream_limits
+upstream_limits = UpstreamLimits()
@@ -0,0 +1,174 @@
+"""
+Pluggable serializers for values stored in Redis (used by app/core/cache.py)
+
+Every value is written as: 4-byte header + (optionally compressed) payload
+    header = MAGIC, FORMAT_VERSION, codec id, compression id
+so a reader always knows how an entry was written, even after Settings.cache_serializer
+or Settings.cache_compression change. Entries from before this layer are plain JSON text
+with no header (they start with '{', '[', ... never MAGIC) and are still readable.
+
+Codecs:
+    msgpack - compact binary, keeps datetime / date / Decimal / UUID types via msgpack extensions
+    orjson  - fast JSON, unsupported types become strings (like the old json.dumps(default=str))
+    json    - stdlib fallback when neither optional package is installed
+Compression (only for payloads above Settings.cache_compression_threshold bytes):
+    zstd (pip install zstandard), lz4 (pip install lz4), zlib (stdlib fallback)
+"""
+import json
+import uuid
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Tuple
+
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # optional, falls back to orjson / json
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+MAGIC = 0xB6  # not a valid first byte of UTF-8 JSON text, so legacy entries can't be mistaken for it
+FORMAT_VERSION = 1
+
+CODEC_IDS = {"json": 0, "orjson": 1, "msgpack": 2}
+COMPRESSION_IDS = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+
+# msgpack extension type codes for the Python types JSON can't represent
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_DECIMAL = 3
+EXT_UUID = 4
+
+
+def _msgpack_default(obj: Any):
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode())
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(obj).encode())
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, obj.bytes)
+    return str(obj)
+
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    if code == EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return date.fromisoformat(data.decode())
+    if code == EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == EXT_UUID:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+def _codecs() -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    codecs = {
+        "json": (
+            lambda value: json.dumps(value, default=str).encode(),
+            json.loads,
+        ),
+    }
+    if orjson is not None:
+        codecs["orjson"] = (
+            lambda value: orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS),
+            orjson.loads,
+        )
+    if msgpack is not None:
+        codecs["msgpack"] = (
+            lambda value: msgpack.packb(value, default=_msgpack_default, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False),
+        )
+    return codecs
+
+
+def _compressors() -> Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {
+        "none": (lambda data: data, lambda data: data),
+        "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    }
+    if zstandard is not None:
+        compressors["zstd"] = (
+            zstandard.ZstdCompressor(level=3).compress,
+            zstandard.ZstdDecompressor().decompress,
+        )
+    if lz4_frame is not None:
+        compressors["lz4"] = (lz4_frame.compress, lz4_frame.decompress)
+    return compressors
+
+
+class CacheSerializer:
+    def __init__(self, codec: str = "auto", compression: str = "auto", compression_threshold: int = 4096):
+        self._codecs = _codecs()
+        self._compressors = _compressors()
+        self.codec = self._pick(codec, self._codecs, ("msgpack", "orjson", "json"))
+        self.compression = self._pick(compression, self._compressors, ("zstd", "lz4", "zlib"))
+        self.compression_threshold = compression_threshold
+
+    @staticmethod
+    def _pick(requested: str, available: Dict[str, Any], preference: Tuple[str, ...]) -> str:
+        if requested in available:
+            return requested
+        # "auto", or the requested optional package isn't installed: best available option
+        return next(name for name in preference if name in available)
+
+    def dumps(self, value: Any) -> bytes:
+        encode, _ = self._codecs[self.codec]
+        payload = encode(value)
+        compression = "none"
+        if self.compression != "none" and len(payload) >= self.compression_threshold:
+            compress, _ = self._compressors[self.compression]
+            payload = compress(payload)
+            compression = self.compression
+        header = bytes((MAGIC, FORMAT_VERSION, CODEC_IDS[self.codec], COMPRESSION_IDS[compression]))
+        return header + payload
+
+    def loads(self, data: bytes) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] != MAGIC:
+            return json.loads(data)  # legacy entry written as plain JSON text
+
+        version, codec_id, compression_id = data[1], data[2], data[3]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache format version {version}")
+        codec = _name_for(CODEC_IDS, codec_id)
+        compression = _name_for(COMPRESSION_IDS, compression_id)
+        if codec not in self._codecs or compression not in self._compressors:
+            raise ValueError(f"Cache entry needs {codec}/{compression}, which is not installed")
+
+        payload = self._compressors[compression][1](data[4:])
+        return self._codecs[codec][1](payload)
+
+
+def _name_for(ids: Dict[str, int], value: int) -> str:
+    for name, known in ids.items():
+        if known == value:
+            return name
+    return f"unknown({value})"
+
+
+# Global instance configured from Settings
+cache_serializer = CacheSerializer(
+    codec=settings.cache_serializer,
+    compression=settings.cache_compression,
+    compression_threshold=settings.cache_compression_threshold,
+)
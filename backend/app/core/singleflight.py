@@ -0,0 +1,70 @@
+"""
+Request coalescing (single-flight) for upstream fetches
+
+When a country trends, dozens of requests for the same code arrive at once. Without
+coalescing each one calls NewsAPI / World Bank / the FX API independently. With it,
+the first caller for a key (e.g. "news:USA") starts the fetch and everyone else awaits
+that same in-flight result.
+Example: await single_flight.do("news:USA", lambda: fetch(...), recheck=lambda: cache_manager.get(key))
+
+Within a process this uses a shared asyncio task per key. Across uvicorn workers it
+optionally takes a Redis lock (CacheManager.lock): the worker that gets the lock fetches
+and fills the cache, the others wait for the lock and then call `recheck` to pick the
+result up from the cache instead of fetching again.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0  # callers that joined an existing fetch instead of starting one
+
+    async def do(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        recheck: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Any:
+        """Run `fetch` once per key no matter how many callers ask concurrently
+
+        `recheck` (optional) reads the result another worker may have stored, it enables
+        cross-worker coalescing through a Redis lock.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._lead(key, fetch, recheck))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: a caller hitting its own deadline must not cancel the fetch other callers are awaiting
+        return await asyncio.shield(task)
+
+    async def _lead(self, key: str, fetch, recheck) -> Any:
+        if recheck is None or not settings.enable_distributed_single_flight:
+            return await fetch()
+
+        async with cache_manager.lock(
+            f"singleflight:{key}",
+            timeout=settings.single_flight_lock_seconds,
+            blocking_timeout=settings.single_flight_wait_seconds,
+        ) as acquired:
+            if acquired:
+                # another worker may have finished the same fetch while we waited for the lock
+                result = await recheck()
+                if result:
+                    self.coalesced += 1
+                    return result
+            return await fetch()
+
+
+# Global instance
+single_flight = SingleFlight()
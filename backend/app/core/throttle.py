@@ -0,0 +1,75 @@
+"""
+In-process throttle for calls to a rate-limited upstream
+
+At most `concurrency` calls in flight and `min_interval` seconds between call starts, so a burst
+is queued and spread out instead of hitting the upstream (or the AI budget) all at once.
+Example: async with throttle.slot(): await client.get(...)
+
+Also home to the upstream call priority: work that nobody is waiting on (ingestion, stale-while-
+revalidate refreshes) runs inside background_priority(), and the shared rate limiter
+(app/core/rate_limiter.py) lets interactive calls go first.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+INTERACTIVE, BACKGROUND = 0, 1
+
+_priority: ContextVar[int] = ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def background_priority():
+    """Upstream calls made inside this block (and tasks started from it) queue behind interactive ones"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class UpstreamThrottle:
+    """At most `concurrency` calls in flight to one upstream, and `min_interval` seconds between call starts"""
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._min_interval = min_interval
+        self._next_start = 0.0
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        """Wait for our turn; with a timeout, raises asyncio.TimeoutError instead of queueing longer than that"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        await self._acquire(timeout)
+        try:
+            async with self._lock:
+                wait = self._next_start - time.monotonic()
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    raise asyncio.TimeoutError()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = time.monotonic() + self._min_interval
+            yield
+        finally:
+            self._semaphore.release()
+
+    async def _acquire(self, timeout: Optional[float]):
+        if timeout is None:
+            await self._semaphore.acquire()  # gives the permit back itself if cancelled while waiting
+            return
+        # wait_for can time out (or be cancelled) right after the acquire went through, and that permit
+        # would never be released; shielded, we can tell the two apart and hand a won permit back
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait_for(asyncio.shield(acquire), timeout)
+        except BaseException:
+            if not acquire.cancel() and not acquire.cancelled() and acquire.exception() is None:
+                self._semaphore.release()
+            raise
@@ -6,9 +6,33 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core.cache import cache_manager
+from app.core.http_client import upstream_clients
+from app.core.metrics import registry
+from app.services.ingestion_service import ingestion_scheduler
+from app.services.hybrid_ai_service import hybrid_ai_service
+
+
+# lifespan runs once when the server starts (code before yield) and once when it stops (code after yield)
+# we use it for app-scoped resources like the pooled upstream HTTP clients, so they are shared by every request
+# the ingestion scheduler also lives here, it keeps every country's data warm in the background
+# sentiment models are loaded here too, once, instead of on the first request that needs them
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstream_clients.start()
+    await hybrid_ai_service.start()
+    cache_manager.start_invalidation_listener()
+    if settings.enable_background_ingestion:
+        ingestion_scheduler.start()
+    yield
+    await ingestion_scheduler.stop()
+    await cache_manager.stop_invalidation_listener()
+    await cache_manager.disconnect()
+    await upstream_clients.close()
 
 
 # here we initialize fastapi app]
@@ -19,6 +43,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS - Allow everything for now
@@ -74,6 +99,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "cors": "enabled"}
 
+# Prometheus scrape endpoint: cache hit/miss counters, latency histograms, payload sizes (see app/core/metrics.py)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # useful for the frontend to test connectivity to the backend API
 @app.get("/api/v1/ping")
 async def ping():
@@ -0,0 +1,23 @@
+# Mirrors the economic_indicators table from database/migrations (001 + 002)
+# Rows are written by app/services/indicator_store.py with raw INSERT ... ON CONFLICT upserts
+from sqlalchemy import Column, String, DECIMAL, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+class EconomicIndicator(Base):
+    __tablename__ = "economic_indicators"
+    # one value per country, indicator and date, this is the ON CONFLICT target for upserts
+    __table_args__ = (UniqueConstraint("country_id", "indicator_type", "date"),)
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    country_id = Column(UUID(as_uuid=True), ForeignKey("countries.id"))
+    indicator_type = Column(String(100), nullable=False)  # e.g. GDP
+    indicator_name = Column(String(255), nullable=False)  # World Bank code, e.g. NY.GDP.MKTP.CD
+    value = Column(DECIMAL(20, 6))
+    unit = Column(String(50))
+    date = Column(Date, nullable=False)
+    source = Column(String(255))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,36 @@
+# Mirrors the news_articles table from database/migrations (001 + 003 + 004 + 005 + 007)
+# Rows are written by app/services/article_store.py with raw INSERT ... ON CONFLICT upserts
+# The embedding VECTOR(384) column is left out, it needs the pgvector SQLAlchemy type
+from sqlalchemy import Column, String, Text, DECIMAL, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+class NewsArticle(Base):
+    __tablename__ = "news_articles"
+    # one row per country and article, this is the ON CONFLICT target for upserts
+    __table_args__ = (UniqueConstraint("country_id", "url_hash"),)
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    country_id = Column(UUID(as_uuid=True), ForeignKey("countries.id"), index=True)
+    title = Column(Text, nullable=False)
+    content = Column(Text)
+    description = Column(Text)
+    summary_short = Column(String(280))  # tweet-length summary
+    summary_medium = Column(Text)  # bullets, one per line
+    summary_long = Column(Text)
+    source = Column(String(255), nullable=False)
+    source_url = Column(Text)
+    url_hash = Column(String(64))  # sha256 of source_url
+    author = Column(String(255))
+    bias_score = Column(DECIMAL(3, 2))  # -1 liberal .. 1 conservative
+    credibility_score = Column(DECIMAL(3, 2))
+    emotional_tone = Column(DECIMAL(3, 2))  # sentiment compound score
+    sentiment_label = Column(String(10))  # positive / negative / neutral, as the analysis labelled it
+    impact_score = Column(DECIMAL(3, 2))
+    content_hash = Column(String(64), index=True)  # analysis cache key, see app/services/analysis_cache.py
+    analysis_version = Column(String(100))
+    published_at = Column(DateTime(timezone=True), index=True)
+    scraped_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
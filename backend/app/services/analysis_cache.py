@@ -0,0 +1,182 @@
+"""
+Content-addressed cache for AI article analyses (summary, sentiment, bias)
+
+The same NewsAPI article shows up for several countries and on every view, so analyses are
+keyed by a hash of the normalized article text + source and the analysis version (model /
+tier that produced it) instead of by country. Lookups go Redis first, then the analysis
+columns of news_articles (summary_short, summary_medium, bias_score, credibility_score,
+emotional_tone, sentiment_label); only misses are sent to the model. Bumping the version re-analyzes.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, text
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_TTL_SECONDS = 30 * 24 * 3600
+
+# NewsAPI truncates content and appends e.g. "… [+2715 chars]", which differs between responses
+TRUNCATION_MARKER = re.compile(r"\s*(…|\.\.\.)?\s*\[\+\d+ chars\]\s*$")
+
+LOAD_SQL = text("""
+    SELECT DISTINCT ON (content_hash)
+        content_hash, summary_short, summary_medium, bias_score, credibility_score, emotional_tone, sentiment_label
+    FROM news_articles
+    WHERE content_hash IN :hashes AND analysis_version = :version AND summary_short IS NOT NULL
+    ORDER BY content_hash, scraped_at DESC
+""").bindparams(bindparam("hashes", expanding=True))
+
+# rows already stored for this content (e.g. analyzed by an older model version) pick up the new analysis
+UPDATE_SQL = text("""
+    UPDATE news_articles
+    SET summary_short = :summary_short, summary_medium = :summary_medium, bias_score = :bias_score,
+        credibility_score = :credibility_score, emotional_tone = :emotional_tone, sentiment_label = :sentiment_label,
+        analysis_version = :version
+    WHERE content_hash = :content_hash AND analysis_version IS DISTINCT FROM :version
+""")
+
+# bias_score column is a -1..1 scale, labels map onto it
+BIAS_SCORES = {"liberal": Decimal("-1.00"), "neutral": Decimal("0.00"), "conservative": Decimal("1.00")}
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+# rows stored before sentiment_label existed: VADER's thresholds, which every backend's labels agree with
+LEGACY_NEUTRAL_BAND = 0.05
+
+
+def content_hash(content: str, source: str) -> str:
+    normalized = TRUNCATION_MARKER.sub("", content or "")
+    normalized = " ".join(normalized.lower().split())
+    return hashlib.sha256(f"{(source or '').lower()}\n{normalized}".encode()).hexdigest()
+
+
+def to_columns(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Analysis -> news_articles column values"""
+    summary = analysis["summary"]
+    return {
+        "summary_short": (summary.get("tweet") or "")[:280],
+        "summary_medium": "\n".join(summary.get("bullets", [])),
+        "bias_score": BIAS_SCORES.get(analysis["bias"].get("bias_label"), Decimal("0.00")),
+        "credibility_score": _score(analysis["bias"].get("credibility_score", 0.5)),
+        "emotional_tone": _score(analysis["sentiment"].get("compound", 0)),
+        "sentiment_label": analysis["sentiment"].get("label"),
+    }
+
+
+def from_columns(summary_short, summary_medium, bias_score, credibility_score, emotional_tone,
+                 sentiment_label=None) -> Dict[str, Any]:
+    """news_articles column values -> the analysis shape SimpleAIService returns"""
+    compound = float(emotional_tone or 0)
+    bias = float(bias_score or 0)
+    if sentiment_label not in SENTIMENT_LABELS:
+        sentiment_label = (
+            "positive" if compound >= LEGACY_NEUTRAL_BAND else "negative" if compound <= -LEGACY_NEUTRAL_BAND else "neutral"
+        )
+    return {
+        "summary": {
+            "tweet": summary_short,
+            "bullets": summary_medium.split("\n") if summary_medium else [],
+            "brief": summary_short,
+        },
+        "sentiment": {
+            "label": sentiment_label,
+            "compound": compound,
+        },
+        "bias": {
+            "bias_label": "liberal" if bias < 0 else "conservative" if bias > 0 else "neutral",
+            "credibility_score": float(credibility_score) if credibility_score is not None else 0.5,
+        },
+    }
+
+
+def _score(value: float) -> Decimal:
+    # DECIMAL(3,2) holds -9.99..9.99, analyses are always within -1..1
+    return Decimal(str(round(max(-1.0, min(1.0, float(value))), 2)))
+
+
+class AnalysisCache:
+    def __init__(self):
+        # same backoff as the indicator store: skip the database for a while after an error
+        self._unavailable_until = 0.0
+
+    @property
+    def db_available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _mark_unavailable(self, error: Exception):
+        logger.warning(f"news_articles unavailable for analysis lookups, using Redis only: {error}")
+        self._unavailable_until = time.monotonic() + settings.indicator_store_retry_seconds
+
+    @staticmethod
+    def cache_key(version: str, digest: str) -> str:
+        return f"analysis:{version}:{digest}"
+
+    async def get_many(self, hashes: List[str], version: str) -> Dict[str, Dict[str, Any]]:
+        """Cached analyses for the given content hashes, misses are left out"""
+        cached = await asyncio.gather(*(cache_manager.get(self.cache_key(version, digest)) for digest in hashes))
+        found = {digest: analysis for digest, analysis in zip(hashes, cached) if analysis is not None}
+
+        missing = [digest for digest in dict.fromkeys(hashes) if digest not in found]
+        if missing:
+            stored = await self._load(missing, version)
+            for digest, analysis in stored.items():
+                # promote to Redis so the next view doesn't touch Postgres
+                await cache_manager.set(self.cache_key(version, digest), analysis, expire=ANALYSIS_TTL_SECONDS)
+            found.update(stored)
+        return found
+
+    async def set_many(self, analyses: Dict[str, Dict[str, Any]], version: str):
+        """Remember fresh analyses {content_hash: analysis}"""
+        if not analyses:
+            return
+        await asyncio.gather(*(
+            cache_manager.set(self.cache_key(version, digest), analysis, expire=ANALYSIS_TTL_SECONDS)
+            for digest, analysis in analyses.items()
+        ))
+        await self._store(analyses, version)
+
+    async def _load(self, hashes: List[str], version: str) -> Dict[str, Dict[str, Any]]:
+        if not self.db_available:
+            return {}
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await asyncio.wait_for(
+                    session.execute(LOAD_SQL, {"hashes": hashes, "version": version}),
+                    timeout=settings.indicator_store_timeout
+                )
+                rows = result.all()
+        except Exception as e:
+            self._mark_unavailable(e)
+            return {}
+        return {row[0]: from_columns(*row[1:]) for row in rows}
+
+    async def _store(self, analyses: Dict[str, Dict[str, Any]], version: str):
+        if not self.db_available:
+            return
+        rows = [
+            {"content_hash": digest, "version": version, **to_columns(analysis)}
+            for digest, analysis in analyses.items()
+        ]
+        async def write():
+            async with AsyncSessionLocal() as session:
+                await session.execute(UPDATE_SQL, rows)
+                await session.commit()
+
+        try:
+            # bounded like the reads, callers await this on the response path
+            await asyncio.wait_for(write(), timeout=settings.indicator_store_timeout)
+        except Exception as e:
+            self._mark_unavailable(e)
+
+
+# Global instance
+analysis_cache = AnalysisCache()
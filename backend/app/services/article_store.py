@@ -0,0 +1,303 @@
+"""
+Postgres-backed store for processed news articles (the news_articles table)
+
+Every NewsAPI refresh is bulk-upserted here with its AI analysis, one row per (country,
+article URL). NewsService then serves repeat views from Postgres when the Redis entry is
+gone, and falls back to the last stored articles when NewsAPI is rate limited or down.
+Reads use idx_news_articles_country_id / idx_news_articles_published_at; embeddings written by
+app/services/embedding_service.py are searched through the pgvector cosine index.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.analysis_cache import from_columns, to_columns
+from app.services.indicator_store import ENSURE_COUNTRY_SQL, country_row
+
+logger = logging.getLogger(__name__)
+
+LOAD_SQL = text("""
+    SELECT na.title, na.source, na.published_at, na.source_url, na.description, na.scraped_at,
+        na.summary_short, na.summary_medium, na.bias_score, na.credibility_score, na.emotional_tone, na.sentiment_label
+    FROM news_articles na
+    JOIN countries c ON c.id = na.country_id
+    WHERE c.iso_code = :iso_code
+    ORDER BY na.published_at DESC
+    LIMIT :limit
+""")
+
+# same columns as LOAD_SQL, the latest :limit articles of each country in one query
+LOAD_MANY_SQL = text("""
+    SELECT iso_code, title, source, published_at, source_url, description, scraped_at,
+        summary_short, summary_medium, bias_score, credibility_score, emotional_tone, sentiment_label
+    FROM (
+        SELECT c.iso_code, na.title, na.source, na.published_at, na.source_url, na.description, na.scraped_at,
+            na.summary_short, na.summary_medium, na.bias_score, na.credibility_score, na.emotional_tone, na.sentiment_label,
+            ROW_NUMBER() OVER (PARTITION BY na.country_id ORDER BY na.published_at DESC) AS position
+        FROM news_articles na
+        JOIN countries c ON c.id = na.country_id
+        WHERE c.iso_code IN :codes
+    ) ranked
+    WHERE position <= :limit
+    ORDER BY iso_code, position
+""").bindparams(bindparam("codes", expanding=True))
+
+UPSERT_SQL = text("""
+    INSERT INTO news_articles (
+        id, country_id, title, description, source, source_url, url_hash, published_at, scraped_at,
+        summary_short, summary_medium, bias_score, credibility_score, emotional_tone, sentiment_label, content_hash, analysis_version
+    )
+    SELECT :id, c.id, :title, :description, :source, :source_url, :url_hash, :published_at, NOW(),
+        :summary_short, :summary_medium, :bias_score, :credibility_score, :emotional_tone, :sentiment_label, :content_hash, :analysis_version
+    FROM countries c
+    WHERE c.iso_code = :iso_code
+    ON CONFLICT (country_id, url_hash)
+    DO UPDATE SET title = EXCLUDED.title, description = EXCLUDED.description, scraped_at = NOW(),
+        summary_short = EXCLUDED.summary_short, summary_medium = EXCLUDED.summary_medium,
+        bias_score = EXCLUDED.bias_score, credibility_score = EXCLUDED.credibility_score,
+        emotional_tone = EXCLUDED.emotional_tone, sentiment_label = EXCLUDED.sentiment_label,
+        content_hash = EXCLUDED.content_hash,
+        analysis_version = EXCLUDED.analysis_version
+""")
+
+# pgvector accepts the '[x,y,...]' text form, so vectors are cast in SQL and no extra driver package is needed
+STORE_EMBEDDING_SQL = text("""
+    UPDATE news_articles na
+    SET embedding = CAST(:embedding AS vector)
+    FROM countries c
+    WHERE c.id = na.country_id AND c.iso_code = :iso_code AND na.url_hash = :url_hash
+""")
+
+# <=> is cosine distance, served by the ivfflat vector_cosine_ops index
+NEAREST_SQL = text("""
+    SELECT c.iso_code, na.title, na.source, na.published_at, na.source_url, na.description,
+        1 - (na.embedding <=> CAST(:embedding AS vector)) AS similarity
+    FROM news_articles na
+    JOIN countries c ON c.id = na.country_id
+    WHERE na.embedding IS NOT NULL AND c.iso_code <> :iso_code
+    ORDER BY na.embedding <=> CAST(:embedding AS vector)
+    LIMIT :limit
+""")
+
+
+@dataclass
+class StoredArticles:
+    articles: List[Dict[str, Any]]  # same shape as NewsService.fetch_country_news articles
+    fetched_at: datetime  # most recent refresh across the country's articles
+
+    @property
+    def is_stale(self) -> bool:
+        age = datetime.now(timezone.utc) - self.fetched_at
+        return age > timedelta(minutes=settings.news_cache_ttl_minutes)
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256((url or "").encode()).hexdigest()
+
+
+def vector_literal(vector) -> str:
+    return "[" + ",".join(f"{float(x):.6f}" for x in vector) + "]"
+
+
+def _format_published_at(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat().replace("+00:00", "Z") if value else None
+
+
+def _parse_published_at(value: Optional[str]) -> Optional[datetime]:
+    # NewsAPI sends ISO 8601 with a trailing Z
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _stored_articles(rows) -> StoredArticles:
+    """LOAD_SQL rows (newest first) in the NewsService article shape"""
+    articles = []
+    for title, source, published_at, url, description, _, *analysis_columns in rows:
+        analysis = from_columns(*analysis_columns)
+        articles.append({
+            "title": title,
+            "source": source,
+            "published_at": _format_published_at(published_at),
+            "url": url,
+            "description": description or '',
+            "ai_analysis": {
+                "summary_tweet": analysis["summary"]["tweet"],
+                "summary_bullets": analysis["summary"]["bullets"],
+                "sentiment": {
+                    "label": analysis["sentiment"]["label"],
+                    "score": analysis["sentiment"]["compound"]
+                },
+                "bias": {
+                    "label": analysis["bias"]["bias_label"],
+                    "credibility": analysis["bias"]["credibility_score"]
+                }
+            }
+        })
+    return StoredArticles(articles=articles, fetched_at=max(row[5] for row in rows))
+
+
+class ArticleStore:
+    def __init__(self):
+        # when the database is unreachable we skip it for a while instead of paying a timeout per request
+        self._unavailable_until = 0.0
+        # same for vector search alone (e.g. the pgvector extension isn't installed)
+        self._vector_search_unavailable_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _mark_unavailable(self, error: Exception):
+        logger.warning(f"Article store unavailable, serving news from NewsAPI only: {error}")
+        self._unavailable_until = time.monotonic() + settings.indicator_store_retry_seconds
+
+    async def load(self, country_code: str, limit: int = 3) -> Optional[StoredArticles]:
+        """Most recent stored articles for a country, None if there are none"""
+        if not self.available:
+            return None
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await asyncio.wait_for(
+                    session.execute(LOAD_SQL, {"iso_code": country_code.upper(), "limit": limit}),
+                    timeout=settings.indicator_store_timeout
+                )
+                rows = result.all()
+        except Exception as e:
+            self._mark_unavailable(e)
+            return None
+        return _stored_articles(rows) if rows else None
+
+    async def load_many(self, country_codes: List[str], limit: int = 3) -> Dict[str, StoredArticles]:
+        """load() for many countries in one query, countries without stored articles are left out"""
+        codes = [code.upper() for code in country_codes]
+        if not codes or not self.available:
+            return {}
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await asyncio.wait_for(
+                    session.execute(LOAD_MANY_SQL, {"codes": codes, "limit": limit}),
+                    timeout=settings.indicator_store_timeout
+                )
+                rows = result.all()
+        except Exception as e:
+            self._mark_unavailable(e)
+            return {}
+
+        rows_by_country: Dict[str, list] = {}
+        for iso_code, *row in rows:
+            rows_by_country.setdefault(iso_code, []).append(row)
+        return {code: _stored_articles(country_rows) for code, country_rows in rows_by_country.items()}
+
+    async def upsert(self, country_code: str, articles: List[Dict[str, Any]]):
+        """Bulk-upsert processed articles (NewsService.fetch_country_news shape) for one country"""
+        country = country_row(country_code)
+        if not country or not articles or not self.available:
+            return
+
+        rows = []
+        for article in articles:
+            ai_analysis = article["ai_analysis"]
+            columns = to_columns({
+                "summary": {"tweet": ai_analysis["summary_tweet"], "bullets": ai_analysis["summary_bullets"]},
+                "sentiment": {"label": ai_analysis["sentiment"]["label"], "compound": ai_analysis["sentiment"]["score"]},
+                "bias": {"bias_label": ai_analysis["bias"]["label"], "credibility_score": ai_analysis["bias"]["credibility"]},
+            })
+            rows.append({
+                "id": uuid.uuid4(),
+                "iso_code": country_code.upper(),
+                "title": article["title"],
+                "description": article.get("description"),
+                "source": article["source"],
+                "source_url": article["url"],
+                "url_hash": url_hash(article["url"]),
+                "published_at": _parse_published_at(article.get("published_at")),
+                "content_hash": ai_analysis.get("content_hash"),
+                "analysis_version": ai_analysis.get("version"),
+                **columns,
+            })
+
+        async def write():
+            async with AsyncSessionLocal() as session:
+                await session.execute(ENSURE_COUNTRY_SQL, [country])
+                # a list of parameter dicts runs as one batched executemany
+                await session.execute(UPSERT_SQL, rows)
+                await session.commit()
+
+        try:
+            # bounded like the reads, callers await this on the response path
+            await asyncio.wait_for(write(), timeout=settings.indicator_store_timeout)
+            logger.info(f"Stored {len(rows)} news articles for {country_code.upper()}")
+        except Exception as e:
+            self._mark_unavailable(e)
+
+    async def store_embeddings(self, country_code: str, url_hashes: List[str], vectors) -> bool:
+        """Write article embeddings (rows must already be upserted), False if they couldn't be stored"""
+        if not self.available or time.monotonic() < self._vector_search_unavailable_until:
+            return False
+        rows = [
+            {"iso_code": country_code.upper(), "url_hash": digest, "embedding": vector_literal(vector)}
+            for digest, vector in zip(url_hashes, vectors)
+        ]
+        async def write():
+            async with AsyncSessionLocal() as session:
+                await session.execute(STORE_EMBEDDING_SQL, rows)
+                await session.commit()
+
+        try:
+            await asyncio.wait_for(write(), timeout=settings.indicator_store_timeout)
+            return True
+        except Exception as e:
+            self._mark_vector_search_unavailable(e)
+            return False
+
+    async def nearest(self, vector, exclude_country: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Closest stored articles from other countries by cosine similarity, None if pgvector isn't usable"""
+        if not self.available or time.monotonic() < self._vector_search_unavailable_until:
+            return None
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await asyncio.wait_for(
+                    session.execute(NEAREST_SQL, {
+                        "embedding": vector_literal(vector),
+                        "iso_code": exclude_country.upper(),
+                        "limit": limit,
+                    }),
+                    timeout=settings.indicator_store_timeout
+                )
+                rows = result.all()
+        except Exception as e:
+            self._mark_vector_search_unavailable(e)
+            return None
+        return [
+            {
+                "country_code": iso_code,
+                "title": title,
+                "source": source,
+                "published_at": _format_published_at(published_at),
+                "url": url,
+                "description": description or '',
+                "similarity": round(float(similarity), 4),
+            }
+            for iso_code, title, source, published_at, url, description, similarity in rows
+        ]
+
+    def _mark_vector_search_unavailable(self, error: Exception):
+        logger.warning(f"pgvector search unavailable, using the in-process index: {error}")
+        self._vector_search_unavailable_until = time.monotonic() + settings.indicator_store_retry_seconds
+
+
+# Global instance
+article_store = ArticleStore()
@@ -0,0 +1,246 @@
+"""
+Prebuilt search index for country lookup (used by CountryService.search_countries)
+
+Built once from the country table. Every searchable term (name, ISO3 code, ISO2 / World Bank
+code, aliases) is normalized (lowercase, accents and punctuation stripped) and indexed three ways:
+    - prefix map: every prefix of the term and of each word in it -> entries, pre-sorted by rank,
+      so a query is one dict lookup plus reading the first `limit` distinct entries
+    - infix map: every substring of up to INFIX_GRAM characters -> entries, for matches inside a
+      word ("ger" -> Niger, Algeria), the same substring matches the old linear scan returned;
+      longer queries are looked up by their rarest gram and confirmed against the terms
+    - trigram map over the distinct words: for typos ("germny", "phillipines"), words sharing
+      trigrams with the query (its longest word) are checked with a bounded edit distance and
+      their entries read from the prefix map
+Ranking: exact term match, then prefix of the whole term, then prefix of a later word, then
+substring matches; ties go to codes before names before aliases, then shorter terms. Fuzzy
+matches (by edit distance) are only used when nothing contains the query.
+"""
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+# Longer queries are looked up by their first MAX_PREFIX characters and then filtered
+MAX_PREFIX = 16
+# Fuzzy matching only starts at this query length, shorter queries are prefix-only
+MIN_FUZZY_LENGTH = 3
+# Vocabulary words checked with edit distance per query (bounds fuzzy cost as the index grows)
+MAX_FUZZY_CANDIDATES = 16
+# Minimum trigram Jaccard similarity for a fuzzy candidate, keeps "stan" from matching "states"
+MIN_FUZZY_SIMILARITY = 0.3
+# Substring lengths the infix map is keyed by
+INFIX_GRAM = 3
+
+# Term kinds, lower ranks first on ties
+KIND_RANK = {"code": 0, "name": 1, "alias": 2}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII words separated by single spaces ("Côte d'Ivoire" -> "cote d ivoire")"""
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", ascii_text.lower()).strip()
+
+
+def _trigrams(term: str) -> List[str]:
+    padded = f" {term} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance with adjacent transpositions, anything above limit returns limit + 1
+
+    Only the diagonal band |i - j| <= limit is filled in, so the cost is len(a) * (2 * limit + 1)
+    instead of len(a) * len(b)."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+def _ranked_bucket(ranked: List[Tuple[tuple, int]]) -> List[int]:
+    """Distinct entries in rank order"""
+    bucket, seen = [], set()
+    for _, entry in sorted(ranked):
+        if entry not in seen:
+            seen.add(entry)
+            bucket.append(entry)
+    return bucket
+
+
+def _allowed_typos(query: str) -> int:
+    return 1 if len(query) < 7 else 2
+
+
+class CountrySearchIndex:
+    def __init__(self, entries: Iterable[Tuple[str, Dict[str, List[str]]]]):
+        """entries: (key, {"code": [...], "name": [...], "alias": [...]}) pairs, key is what search returns"""
+        self.keys: List[str] = []
+        self._entry_terms: List[List[str]] = []
+        prefixes: Dict[str, List[Tuple[Tuple[int, int, int], int]]] = {}
+        infixes: Dict[str, List[Tuple[Tuple[int, int], int]]] = {}
+        # distinct words, what fuzzy matching compares against (each word once, however many
+        # entries share it: "region", "france", ...)
+        vocabulary = set()
+
+        for key, terms_by_kind in entries:
+            entry = len(self.keys)
+            self.keys.append(key)
+            self._entry_terms.append([])
+            for kind, texts in terms_by_kind.items():
+                for text in texts:
+                    term = normalize(text)
+                    if not term:
+                        continue
+                    self._entry_terms[entry].append(term)
+                    self._index_prefixes(prefixes, term, kind, entry)
+                    self._index_infixes(infixes, term, kind, entry)
+                    if kind != "code":  # codes are too short to misspell recognizably
+                        vocabulary.update(term.split(" "))
+
+        # each bucket holds distinct entries in rank order, so a lookup only reads what it returns
+        self._prefixes: Dict[str, List[int]] = {prefix: _ranked_bucket(ranked) for prefix, ranked in prefixes.items()}
+        self._infixes: Dict[str, List[int]] = {gram: _ranked_bucket(ranked) for gram, ranked in infixes.items()}
+
+        self._vocabulary: List[str] = sorted(vocabulary)
+        self._trigram_counts: List[int] = []
+        self._trigram_index: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self._vocabulary):
+            word_trigrams = set(_trigrams(word))
+            self._trigram_counts.append(len(word_trigrams))
+            for trigram in word_trigrams:
+                self._trigram_index.setdefault(trigram, []).append(word_id)
+
+    @staticmethod
+    def _index_prefixes(prefixes, term: str, kind: str, entry: int):
+        # prefixes of the whole term, then of each later word ("kingdom" finds "united kingdom")
+        word_starts = [0] + [i + 1 for i, char in enumerate(term) if char == " "]
+        for position, start in enumerate(word_starts):
+            suffix = term[start:]
+            for end in range(1, min(len(suffix), MAX_PREFIX) + 1):
+                prefix = suffix[:end]
+                match_rank = 0 if prefix == term else (1 if position == 0 else 2)
+                prefixes.setdefault(prefix, []).append(((match_rank, KIND_RANK[kind], len(term)), entry))
+
+    @staticmethod
+    def _index_infixes(infixes, term: str, kind: str, entry: int):
+        grams = {term[start:start + size] for size in range(1, INFIX_GRAM + 1) for start in range(len(term) - size + 1)}
+        for gram in grams:
+            infixes.setdefault(gram, []).append(((KIND_RANK[kind], len(term)), entry))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        """Keys of the best matching entries, best first"""
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        results = self._prefix_matches(query, limit)
+        if len(results) < limit:
+            # then whatever contains the query elsewhere ("ger": Germany first, then Niger, Algeria)
+            seen = set(results)
+            results += [entry for entry in self._infix_matches(query, limit + len(seen)) if entry not in seen][:limit - len(results)]
+        # fuzzy only when nothing contains the query, i.e. a typo.
+        # Several words ("unted kingdm"): the longest one is the most distinctive
+        if not results:
+            word = max(query.split(" "), key=len)
+            if len(word) >= MIN_FUZZY_LENGTH:
+                results = self._fuzzy_matches(word, limit)
+        return [self.keys[entry] for entry in results]
+
+    def _prefix_matches(self, query: str, limit: int) -> List[int]:
+        bucket = self._prefixes.get(query[:MAX_PREFIX], [])
+        if len(query) <= MAX_PREFIX:
+            return bucket[:limit]
+        # rare long query: confirm the rest of it against the entry's terms
+        matches = []
+        for entry in bucket:
+            if any(query in term for term in self._entry_terms[entry]):
+                matches.append(entry)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def _infix_matches(self, query: str, limit: int) -> List[int]:
+        if len(query) <= INFIX_GRAM:
+            return self._infixes.get(query, [])[:limit]
+        # the rarest gram of the query has the fewest entries to confirm
+        grams = [query[start:start + INFIX_GRAM] for start in range(len(query) - INFIX_GRAM + 1)]
+        bucket = min((self._infixes.get(gram, []) for gram in grams), key=len)
+        matches = []
+        for entry in bucket:
+            if any(query in term for term in self._entry_terms[entry]):
+                matches.append(entry)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def _fuzzy_matches(self, query: str, limit: int) -> List[int]:
+        query_trigrams = set(_trigrams(query))
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigram_index.get(trigram, ()))
+
+        allowed = _allowed_typos(query)
+        # each typo breaks at most 3 trigrams, words sharing fewer can't be within the allowed distance
+        min_shared = max(1, len(query_trigrams) - 3 * allowed)
+        # most similar words by trigram Jaccard, raw shared counts would favour long words
+        candidates = heapq.nlargest(
+            MAX_FUZZY_CANDIDATES,
+            ((count / (len(query_trigrams) + self._trigram_counts[word_id] - count), word_id)
+             for word_id, count in shared.items() if count >= min_shared)
+        )
+        candidates = [(similarity, word_id) for similarity, word_id in candidates if similarity >= MIN_FUZZY_SIMILARITY]
+        close_words = []
+        for similarity, word_id in candidates:
+            word = self._vocabulary[word_id]
+            distance, partial = self._closest_distance(query, word, allowed)
+            if distance <= allowed:
+                close_words.append((distance, partial, -similarity, word))
+
+        # closest whole words first, then words the query only starts like, each contributing
+        # its entries in prefix-bucket rank order
+        matches, seen = [], set()
+        for *_, word in sorted(close_words):
+            for entry in self._prefixes.get(word[:MAX_PREFIX], ()):
+                if entry not in seen:
+                    seen.add(entry)
+                    matches.append(entry)
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+    @staticmethod
+    def _closest_distance(query: str, word: str, allowed: int) -> Tuple[int, bool]:
+        """(distance, partial): distance from the query to the word, or to its same-length prefix
+        (the user may still be typing, partial=True); 0 when the query appears inside the word"""
+        if query in word:
+            return 0, query != word
+        distance = _edit_distance(query, word, allowed)
+        if distance and len(word) > len(query):
+            prefix_distance = _edit_distance(query, word[:len(query)], allowed)
+            if prefix_distance < distance:
+                return prefix_distance, True
+        return distance, False
@@ -2,6 +2,18 @@
 Comprehensive country service with all world countries
 """
 from typing import Dict, List, Any, Optional
+from app.services.country_search import CountrySearchIndex
+
+# Other names people search for and news outlets use (also NewsAPI search terms, see news_service)
+COUNTRY_ALIASES = {
+    'USA': ['USA', 'America', 'US'],
+    'GBR': ['UK', 'Britain', 'England'],
+    'KOR': ['Korea'],
+    'PRK': ['DPRK'],
+    'CZE': ['Czechia'],
+    'ARE': ['UAE'],
+    'SAU': ['KSA'],
+}
 
 class CountryService:
     def __init__(self):
@@ -133,6 +145,21 @@ class CountryService:
             'ARM': {'name': 'Armenia', 'coords': [45.0382, 40.0691], 'currency': 'AMD', 'wb_code': 'AM'},
             'AZE': {'name': 'Azerbaijan', 'coords': [47.5769, 40.1431], 'currency': 'AZN', 'wb_code': 'AZ'},
         }
+        
+        # built once here, searches never scan the country table
+        self.search_index = self.build_search_index(self.countries)
+    
+    @staticmethod
+    def build_search_index(countries: Dict[str, Dict[str, Any]]) -> CountrySearchIndex:
+        """Index names, ISO3 codes, ISO2 / World Bank codes and aliases"""
+        return CountrySearchIndex(
+            (code, {
+                'code': [code, data['wb_code']],
+                'name': [data['name']],
+                'alias': COUNTRY_ALIASES.get(code, []),
+            })
+            for code, data in countries.items()
+        )
     
     def get_all_countries(self) -> List[Dict[str, Any]]:
         """Get list of all supported countries"""
@@ -150,21 +177,20 @@ class CountryService:
         """Get information for a specific country"""
         return self.countries.get(country_code.upper())
     
-    def search_countries(self, query: str) -> List[Dict[str, Any]]:
-        """Search countries by name"""
-        query_lower = query.lower()
-        matches = []
-        
-        for code, data in self.countries.items():
-            if (query_lower in data['name'].lower() or 
-                query_lower in code.lower()):
-                matches.append({
-                    'code': code,
-                    'name': data['name'],
-                    'coords': data['coords']
-                })
-        
-        return matches
+    def get_aliases(self, country_code: str) -> List[str]:
+        """Alternative names for a country (empty if it has none)"""
+        return COUNTRY_ALIASES.get(country_code.upper(), [])
+    
+    def search_countries(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Search countries by name, code or alias, best matches first (tolerates typos)"""
+        return [
+            {
+                'code': code,
+                'name': self.countries[code]['name'],
+                'coords': self.countries[code]['coords']
+            }
+            for code in self.search_index.search(query, limit)
+        ]
     
     def get_wb_code(self, country_code: str) -> Optional[str]:
         """Get World Bank country code"""
@@ -0,0 +1,171 @@
+"""
+Per-country summaries for many countries at once (POST /api/v1/news/batch, the map view)
+
+A summary is what the map needs per country: overall news sentiment, the top headline, GDP and
+the USD exchange rate. Instead of one full intelligence request per country:
+    - FX comes from the in-memory rate table (app/services/fx_rates.py), no I/O per country
+    - cached news and economic entries for every requested country are read with one MGET
+      (stale ones are served and refreshed in the background, like a single-country view)
+    - economic misses are loaded together: one indicator store query, then batched World Bank
+      calls for whatever the store doesn't have (WorldBankService.get_indicators_for_countries)
+    - news misses are read from the article store (news_articles, one query, stale or not).
+      Only the first Settings.batch_news_fetch_limit countries with no stored news at all go to
+      NewsAPI, at background priority. The rest come back without news: one map render over a
+      cold cache must not spend the whole daily quota (background ingestion fills them in over time)
+Summaries are yielded as each country completes: cached countries first, the rest as their
+fetches finish, so the caller can stream them.
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.throttle import background_priority
+from app.services.article_store import article_store
+from app.services.country_service import country_service
+from app.services.fx_rates import FXRateTable, fx_rate_engine
+from app.services.news_service import news_service
+from app.services.worldbank_service import worldbank_service
+
+logger = logging.getLogger(__name__)
+
+
+class CountrySummaryService:
+    async def stream_summaries(self, country_codes: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one summary per distinct requested code, in completion order"""
+        codes = list(dict.fromkeys(code.strip().upper() for code in country_codes if code.strip()))
+        countries = {}
+        for code in codes:
+            info = country_service.get_country_info(code)
+            if info:
+                countries[code] = info
+            else:
+                yield {"country_code": code, "error": f"Country '{code}' not found"}
+        if not countries:
+            return
+
+        table = await fx_rate_engine.get_table()
+        news_enabled = bool(settings.news_api_key)
+
+        # one round trip for every cached entry, stale ones are refreshed in the background
+        news_keys = {news_service.cache_key(code): code for code in countries} if news_enabled else {}
+        economic_keys = {worldbank_service.cache_key(code): code for code in countries}
+        cached = await cache_manager.get_many_or_refresh(
+            [*news_keys, *economic_keys],
+            lambda key: self._refresh_for(key, news_keys, economic_keys, countries)
+        )
+        news = {news_keys[key]: value for key, value in cached.items() if key in news_keys}
+        economic = {economic_keys[key]: value for key, value in cached.items() if key in economic_keys}
+
+        pending = []
+        for code, info in countries.items():
+            if code in economic and (code in news or not news_enabled):
+                yield self._summary(code, info, news.get(code), economic[code], table)
+            else:
+                pending.append(code)
+        if not pending:
+            return
+
+        missing_economic = [code for code in pending if code not in economic]
+        economic_task = asyncio.create_task(self._load_economic(missing_economic)) if missing_economic else None
+        if news_enabled:
+            missing_news = [code for code in pending if code not in news]
+            stored = await article_store.load_many(missing_news, limit=news_service.ARTICLES_PER_COUNTRY)
+            news.update({code: {"articles": entry.articles} for code, entry in stored.items()})
+            fetch_news = set([code for code in missing_news if code not in stored][:settings.batch_news_fetch_limit])
+        else:
+            fetch_news = set()
+
+        async def complete(code: str) -> Dict[str, Any]:
+            news_data = news.get(code)
+            if code in fetch_news:
+                news_data = await self._load_news(code, countries[code]['name'])
+            economic_data = economic.get(code)
+            if economic_data is None and economic_task is not None:
+                economic_data = (await asyncio.shield(economic_task)).get(code)
+            return self._summary(code, countries[code], news_data, economic_data, table)
+
+        tasks = [asyncio.create_task(complete(code)) for code in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # the client went away mid-stream: stop fetching for it (shared fetches finish on their own)
+            for task in [*tasks, economic_task]:
+                if task is not None and not task.done():
+                    task.cancel()
+
+    @staticmethod
+    def _refresh_for(key: str, news_keys: Dict[str, str], economic_keys: Dict[str, str], countries: Dict[str, Any]):
+        """The background refresh for a stale cached entry, the same one a single-country view would start"""
+        if key in news_keys:
+            code = news_keys[key]
+            return lambda: news_service.load_or_refresh_country_news(countries[code]['name'], code)
+        code = economic_keys[key]
+        return lambda: worldbank_service.refresh_cached_indicators([code])
+
+    @staticmethod
+    async def _load_economic(country_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Indicators for every country missing from the cache, in as few store / World Bank calls as possible"""
+        try:
+            results = await asyncio.wait_for(
+                worldbank_service.get_indicators_for_countries(country_codes),
+                timeout=settings.economic_fetch_deadline
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Economic data for {len(country_codes)} countries timed out after {settings.economic_fetch_deadline}s")
+            return {}
+        except Exception as e:
+            logger.error(f"Economic data for {len(country_codes)} countries failed: {e}")
+            return {}
+        await worldbank_service.cache_indicators(results)
+        return results
+
+    @staticmethod
+    async def _load_news(country_code: str, country_name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with background_priority():
+                return await asyncio.wait_for(
+                    news_service.get_country_news(country_name, country_code),
+                    timeout=settings.news_fetch_deadline
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"News for {country_code} timed out after {settings.news_fetch_deadline}s")
+        except Exception as e:
+            logger.error(f"News for {country_code} failed: {e}")
+        return None
+
+    @staticmethod
+    def _summary(code: str, info: Dict[str, Any], news_data: Optional[Dict[str, Any]],
+                 economic_data: Optional[Dict[str, Any]], table: Optional[FXRateTable]) -> Dict[str, Any]:
+        articles = (news_data or {}).get("articles") or []
+        scores = [article["ai_analysis"]["sentiment"]["score"] for article in articles
+                  if article.get("ai_analysis", {}).get("sentiment", {}).get("score") is not None]
+        sentiment = None
+        if scores:
+            score = sum(scores) / len(scores)
+            # same thresholds as the per-article VADER labels
+            label = 'positive' if score >= 0.05 else 'negative' if score <= -0.05 else 'neutral'
+            sentiment = {"label": label, "score": round(score, 4), "articles": len(scores)}
+
+        top_headline = None
+        if articles:
+            article = articles[0]
+            top_headline = {key: article.get(key) for key in ("title", "source", "url", "published_at")}
+
+        gdp = (economic_data or {}).get("GDP")
+        currency = info.get('currency', 'USD')
+        usd_rate = table.rate(currency, 'USD') if table is not None else None
+        return {
+            "country_code": code,
+            "country": info['name'],
+            "sentiment": sentiment,
+            "top_headline": top_headline,
+            "gdp": {"value": gdp['value'], "year": gdp['year']} if gdp else None,
+            "fx": {"currency": currency, "usd_rate": usd_rate, "last_updated": table.date} if usd_rate is not None else None,
+        }
+
+
+# Global instance
+country_summary_service = CountrySummaryService()
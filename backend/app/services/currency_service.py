@@ -1,52 +1,39 @@
 """
 Currency exchange rate service
 """
-import httpx
 from typing import Dict, Any
-from datetime import datetime
 from app.services.country_service import country_service
+from app.services.fx_rates import fx_rate_engine
+
+# Currencies shown for every country, in this order
+QUOTE_CURRENCIES = ('USD', 'EUR', 'GBP', 'JPY', 'CNY')
 
 class CurrencyService:
-    def __init__(self):
-        # Using a free exchange rate API
-        self.base_url = "https://api.exchangerate-api.com/v4"
+    """Exchange rates for a country's currency, cross rates from the shared FX table (app/services/fx_rates.py)"""
     
     async def get_exchange_rates(self, country_code: str) -> Dict[str, Any]:
-        """Get current exchange rates for country currency"""
-        
-        country_info = country_service.get_country_info(country_code)
-        currency = country_info.get('currency', 'USD') if country_info else 'USD'
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/latest/{currency}",
-                    timeout=15
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        'base_currency': currency,
-                        'usd_rate': data['rates'].get('USD', 1.0),
-                        'eur_rate': data['rates'].get('EUR', 1.0),
-                        'last_updated': data.get('date'),
-                        'rates': {
-                            'USD': data['rates'].get('USD'),
-                            'EUR': data['rates'].get('EUR'),
-                            'GBP': data['rates'].get('GBP'),
-                            'JPY': data['rates'].get('JPY'),
-                            'CNY': data['rates'].get('CNY')
-                        }
-                    }
-        
-        except Exception as e:
-            print(f"Currency API error for {country_code}: {e}")
+        """Get current exchange rates for country currency, computed locally without an upstream call"""
+        currency = self.get_currency(country_code)
+        table = await fx_rate_engine.get_table()
+        if table is None or currency not in table:
             return {
                 'base_currency': currency,
                 'usd_rate': 1.0,
-                'error': str(e)
+                'error': f"No exchange rates available for {currency}"
             }
+        
+        rates = table.cross_rates(currency, QUOTE_CURRENCIES)
+        return {
+            'base_currency': currency,
+            'usd_rate': rates['USD'] or 1.0,
+            'eur_rate': rates['EUR'] or 1.0,
+            'last_updated': table.date,
+            'rates': rates
+        }
+    
+    def get_currency(self, country_code: str) -> str:
+        country_info = country_service.get_country_info(country_code)
+        return country_info.get('currency', 'USD') if country_info else 'USD'
 
 # Global instance
 currency_service = CurrencyService()
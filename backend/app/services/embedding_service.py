@@ -0,0 +1,192 @@
+"""
+Article embeddings and related-article search
+
+Article title + description are batch-encoded on CPU with a locally downloaded
+sentence-transformers model (Settings.embedding_model, fetched by scripts/download_models.py)
+after every news refresh, stored in news_articles.embedding and searched through pgvector's
+cosine ivfflat index. When pgvector (or Postgres) isn't available, related articles come
+from an in-process NumPy brute-force index filled by the same refreshes.
+Throughput numbers: python scripts/benchmark_embeddings.py
+"""
+import asyncio
+import importlib.util
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.article_store import article_store, url_hash
+
+logger = logging.getLogger(__name__)
+
+# sentence-transformers pulls in torch, so it is only imported when the model is first needed
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+
+# related_articles fetches this many times `limit` candidates before removing duplicate URLs
+RELATED_OVERFETCH = 2
+
+
+class NumpyVectorIndex:
+    """Brute-force cosine search over L2-normalized vectors (a dot product per stored vector)
+
+    One matrix multiply scans ~10k vectors in well under a millisecond, plenty for the
+    articles a single process sees; pgvector's ivfflat index is the scalable path.
+    """
+
+    def __init__(self, dimensions: int, max_items: int):
+        self.dimensions = dimensions
+        self.max_items = max_items
+        self._vectors = np.zeros((1024, dimensions), dtype=np.float32)  # grows by doubling
+        self._keys: List[str] = []
+        self._items: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, keys: List[str], vectors: np.ndarray, items: List[Dict[str, Any]]):
+        for key, vector, item in zip(keys, vectors, items):
+            position = self._positions.get(key)
+            if position is None:
+                if len(self._keys) >= self.max_items:
+                    self._drop_oldest(len(self._keys) // 2)
+                position = len(self._keys)
+                if position == len(self._vectors):
+                    self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+                self._keys.append(key)
+                self._items.append(item)
+                self._positions[key] = position
+            else:
+                self._items[position] = item
+            self._vectors[position] = vector
+
+    def _drop_oldest(self, count: int):
+        size = len(self._keys)
+        self._vectors[:size - count] = self._vectors[count:size]
+        self._keys = self._keys[count:]
+        self._items = self._items[count:]
+        self._positions = {key: i for i, key in enumerate(self._keys)}
+
+    def search(self, vector: np.ndarray, limit: int,
+               exclude: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        size = len(self._keys)
+        if size == 0:
+            return []
+        scores = self._vectors[:size] @ vector
+        # over-fetch so excluded items don't leave us short, then sort only the candidates
+        candidates = min(size, limit * 4 if exclude else limit)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        results = []
+        for position in top[np.argsort(-scores[top])]:
+            item = self._items[position]
+            if exclude and exclude(item):
+                continue
+            results.append((float(scores[position]), item))
+            if len(results) >= limit:
+                break
+        return results
+
+
+class EmbeddingService:
+    def __init__(self):
+        # encoding is CPU-bound, one thread keeps the model single-instance and the event loop free
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embeddings")
+        self._model = None
+        self._model_failed = False
+        self._background_tasks = set()
+        self.index = NumpyVectorIndex(settings.embedding_dimensions, settings.embedding_index_max_items)
+
+    @property
+    def available(self) -> bool:
+        return settings.enable_embeddings and SENTENCE_TRANSFORMERS_AVAILABLE and not self._model_failed
+
+    def _load_model(self):
+        if self._model is None and not self._model_failed:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(settings.embedding_model, device="cpu")
+            except Exception as e:
+                self._model_failed = True
+                logger.error(f"Could not load embedding model {settings.embedding_model}: {e}")
+        return self._model
+
+    def _encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        model = self._load_model()
+        if model is None:
+            return None
+        vectors = model.encode(
+            texts, batch_size=settings.embedding_batch_size,
+            normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False
+        )
+        return vectors.astype(np.float32)
+
+    async def encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        """L2-normalized embeddings, one row per text (None when no model is available)"""
+        if not texts or not self.available:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._encode, texts)
+
+    @staticmethod
+    def article_text(article: Dict[str, Any]) -> str:
+        return f"{article.get('title') or ''}. {article.get('description') or ''}".strip()
+
+    def schedule_index(self, country_code: str, articles: List[Dict[str, Any]]):
+        """Embed freshly fetched articles without delaying the response"""
+        if not self.available or not articles:
+            return
+        task = asyncio.create_task(self.index_articles(country_code, articles))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def index_articles(self, country_code: str, articles: List[Dict[str, Any]]):
+        vectors = await self.encode([self.article_text(article) for article in articles])
+        if vectors is None:
+            return
+        code = country_code.upper()
+        hashes = [url_hash(article['url']) for article in articles]
+        self.index.add(
+            [f"{code}:{digest}" for digest in hashes],
+            vectors,
+            [{**article, "country_code": code} for article in articles]
+        )
+        await article_store.store_embeddings(code, hashes, vectors)
+
+    async def related_articles(self, country_code: str, articles: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+        """Articles from other countries closest to the centroid of this country's current articles"""
+        vectors = await self.encode([self.article_text(article) for article in articles])
+        if vectors is None:
+            return {"articles": [], "backend": None, "message": "Embedding model not available"}
+        query = vectors.mean(axis=0)
+        query /= np.linalg.norm(query) or 1.0
+
+        code = country_code.upper()
+        # over-fetch so there are still `limit` left after dropping the same story stored under several countries
+        candidates = limit * RELATED_OVERFETCH
+        related = await article_store.nearest(query, exclude_country=code, limit=candidates)
+        backend = "pgvector"
+        if related is None:
+            backend = "numpy"
+            related = [
+                {**item, "similarity": round(score, 4)}
+                for score, item in self.index.search(query, candidates, exclude=lambda item: item["country_code"] == code)
+            ]
+        return {"articles": _dedupe_by_url(related)[:limit], "backend": backend}
+
+
+def _dedupe_by_url(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # the same story is often stored under several countries
+    seen = set()
+    unique = []
+    for article in articles:
+        if article.get("url") in seen:
+            continue
+        seen.add(article.get("url"))
+        unique.append(article)
+    return unique
+
+
+# Global instance
+embedding_service = EmbeddingService()
@@ -0,0 +1,319 @@
+"""
+FX rate history: every scheduled rate table snapshot, for currency trend sparklines
+
+Each snapshot is the whole base table from app/services/fx_rates.py, stored column-wise as
+aligned currency / rate arrays instead of one row per currency:
+    - Postgres fx_rate_snapshots (migration 006), partitioned by month on captured_at. Range
+      queries read one array element per row for the requested currencies and only scan the
+      months they cover.
+    - FXRingBuffer in each worker: the last Settings.fx_history_memory_days of snapshots as a
+      float32 (snapshots x currencies) matrix. It is loaded from Postgres once, then new
+      snapshots are picked up incrementally, so ranges inside that window never query Postgres.
+Background ingestion appends a snapshot after each FX refresh (IngestionScheduler._refresh_currency),
+skipping tables identical to the previous one (the upstream publishes new rates about once a day).
+Series leave the service downsampled to at most `points` bucket means.
+"""
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.fx_rates import FXRateTable, fx_rate_engine
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = text("""
+    INSERT INTO fx_rate_snapshots (captured_at, base_currency, rate_date, currencies, rates)
+    VALUES (:captured_at, :base_currency, :rate_date, :currencies, :rates)
+    ON CONFLICT (captured_at) DO NOTHING
+""")
+
+# whole snapshots, to fill the ring buffer
+LOAD_SNAPSHOTS_SQL = text("""
+    SELECT captured_at, currencies, rates
+    FROM fx_rate_snapshots
+    WHERE captured_at > :since
+    ORDER BY captured_at
+""")
+
+# only the requested currencies' rates per snapshot, in :codes order (NULL where a snapshot lacks one)
+LOAD_RANGE_SQL = text("""
+    SELECT s.captured_at,
+        (SELECT array_agg(s.rates[array_position(s.currencies, u.code)] ORDER BY u.ord)
+         FROM unnest(CAST(:codes AS VARCHAR[])) WITH ORDINALITY AS u(code, ord)) AS picked
+    FROM fx_rate_snapshots s
+    WHERE s.captured_at >= :start AND s.captured_at < :end
+    ORDER BY s.captured_at
+""")
+
+
+def _month_partition_sql(moment: datetime) -> Tuple[str, text]:
+    """(partition name, CREATE statement) for the month containing moment (UTC)"""
+    start = datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+    end = datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1, tzinfo=timezone.utc)
+    name = f"fx_rate_snapshots_{start:%Y_%m}"
+    return name, text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF fx_rate_snapshots "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+class FXRingBuffer:
+    """The last `capacity` snapshots as a float32 matrix, one column per currency seen so far"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.index: Dict[str, int] = {}
+        self.times = np.zeros(self.capacity, dtype=np.float64)  # unix seconds, ascending in ring order
+        self.rates = np.full((self.capacity, 0), np.nan, dtype=np.float32)
+        self.size = 0
+        self._next = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _order(self) -> np.ndarray:
+        """Row positions oldest first"""
+        return np.arange(self._next - self.size, self._next) % self.capacity
+
+    @property
+    def oldest(self) -> Optional[float]:
+        return float(self.times[self._order()[0]]) if self.size else None
+
+    @property
+    def latest(self) -> Optional[float]:
+        return float(self.times[(self._next - 1) % self.capacity]) if self.size else None
+
+    def latest_rates(self) -> Optional[Dict[str, float]]:
+        if not self.size:
+            return None
+        row = self.rates[(self._next - 1) % self.capacity]
+        return {code: float(row[i]) for code, i in self.index.items() if not np.isnan(row[i])}
+
+    def append(self, captured_at: float, currencies: Sequence[str], rates: Sequence[float]):
+        """Add a snapshot newer than every stored one, overwriting the oldest when full"""
+        new = [code for code in currencies if code not in self.index]
+        if new:
+            for code in new:
+                self.index[code] = len(self.index)
+            self.rates = np.hstack([self.rates, np.full((self.capacity, len(new)), np.nan, dtype=np.float32)])
+        row = np.full(self.rates.shape[1], np.nan, dtype=np.float32)
+        row[[self.index[code] for code in currencies]] = rates
+        self.rates[self._next] = row
+        self.times[self._next] = captured_at
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def series(self, base: str, quotes: Sequence[str], start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, values) for snapshots in [start, end) oldest first, values[:, k] = units of
+        quotes[k] per 1 base (NaN where a snapshot lacks either currency)"""
+        order = self._order()
+        lo, hi = np.searchsorted(self.times[order], [start, end])
+        rows = order[lo:hi]
+        picked = np.full((len(rows), len(quotes) + 1), np.nan, dtype=np.float64)
+        for k, code in enumerate([base, *quotes]):
+            column = self.index.get(code)
+            if column is not None:
+                picked[:, k] = self.rates[rows, column]
+        return self.times[rows], picked[:, 1:] / picked[:, :1]
+
+
+def downsample(times: np.ndarray, values: np.ndarray, start: float, end: float, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean per equal-width time bucket between start and end (NaNs ignored), empty buckets dropped;
+    returns each bucket's mean snapshot time with its values"""
+    if len(times) <= points:
+        return times, values
+    buckets = np.minimum(((times - start) / (end - start) * points).astype(np.intp), points - 1)
+    counts = np.bincount(buckets, minlength=points)
+    keep = counts > 0
+    bucket_times = np.bincount(buckets, weights=times, minlength=points)[keep] / counts[keep]
+    means = np.empty((int(keep.sum()), values.shape[1]), dtype=np.float64)
+    for k in range(values.shape[1]):
+        valid = ~np.isnan(values[:, k])
+        sums = np.bincount(buckets[valid], weights=values[valid, k], minlength=points)[keep]
+        present = np.bincount(buckets[valid], minlength=points)[keep]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means[:, k] = np.where(present > 0, sums / np.maximum(present, 1), np.nan)
+    return bucket_times, means
+
+
+class FXHistory:
+    def __init__(self):
+        # when the database is unreachable we skip it for a while instead of paying a timeout per request
+        self._unavailable_until = 0.0
+        interval_minutes = max(settings.ingestion_currency_interval_minutes, 1)
+        self._ring = FXRingBuffer(math.ceil(settings.fx_history_memory_days * 1440 / interval_minutes) + 1)
+        # the ring holds every stored snapshot since this time (inf until it was loaded from Postgres)
+        self._loaded_from = float("inf")
+        self._synced_at = float("-inf")
+        self._sync_lock = asyncio.Lock()
+        self._partitions: Set[str] = set()
+        self.stats = {"recorded": 0, "unchanged": 0, "memory_queries": 0, "database_queries": 0}
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _mark_unavailable(self, error: Exception):
+        logger.warning(f"FX history store unavailable, serving in-memory history only: {error}")
+        self._unavailable_until = time.monotonic() + settings.indicator_store_retry_seconds
+
+    def _covered_from(self) -> float:
+        """Oldest time the ring buffer answers for on its own"""
+        if len(self._ring) == self._ring.capacity:
+            return max(self._loaded_from, self._ring.oldest)
+        return self._loaded_from
+
+    async def record(self, table: FXRateTable):
+        """Append a rate table snapshot (called by ingestion after each FX refresh)"""
+        await self._sync()
+        latest = self._ring.latest
+        if latest is not None and table.fetched_at <= latest:
+            return
+        rates = table.rates.astype(np.float32)
+        previous = self._ring.latest_rates()
+        if previous is not None and previous == dict(zip(table.currencies, rates.tolist())):
+            self.stats["unchanged"] += 1
+            return
+
+        self._ring.append(table.fetched_at, table.currencies, rates)
+        self.stats["recorded"] += 1
+        if not self.available:
+            return
+
+        captured_at = datetime.fromtimestamp(table.fetched_at, timezone.utc)
+        partition, create_sql = _month_partition_sql(captured_at)
+
+        async def write():
+            async with AsyncSessionLocal() as session:
+                if partition not in self._partitions:
+                    await session.execute(create_sql)
+                await session.execute(INSERT_SQL, {
+                    "captured_at": captured_at,
+                    "base_currency": table.base,
+                    "rate_date": datetime.strptime(table.date, "%Y-%m-%d").date() if table.date else None,
+                    "currencies": table.currencies,
+                    "rates": rates.tolist(),
+                })
+                await session.commit()
+
+        try:
+            # bounded like the other store writes, this runs inside the ingestion loop
+            await asyncio.wait_for(write(), timeout=settings.indicator_store_timeout)
+            self._partitions.add(partition)
+        except Exception as e:
+            self._mark_unavailable(e)
+
+    async def _sync(self):
+        """Pick up snapshots other workers stored since the last look, at most every fx_table_reload_seconds"""
+        if time.monotonic() - self._synced_at < settings.fx_table_reload_seconds:
+            return
+        async with self._sync_lock:
+            if time.monotonic() - self._synced_at < settings.fx_table_reload_seconds:
+                return
+            self._synced_at = time.monotonic()
+            window_start = time.time() - settings.fx_history_memory_days * 86400
+            first_load = self._loaded_from == float("inf")
+            since = window_start if first_load else max(self._ring.latest or window_start, window_start)
+
+            rows = await self._load_snapshots(since)
+            if rows is None:
+                # no database: the current rate table is the best history this worker can keep
+                table = await fx_rate_engine.get_table()
+                if table is not None and (self._ring.latest is None or table.fetched_at > self._ring.latest):
+                    self._ring.append(table.fetched_at, table.currencies, table.rates.astype(np.float32))
+                return
+
+            if first_load:
+                # replaces whatever was kept in memory while the database was unreachable
+                self._ring = FXRingBuffer(self._ring.capacity)
+                self._loaded_from = window_start
+            for captured_at, currencies, rates in rows:
+                timestamp = captured_at.timestamp()
+                if self._ring.latest is None or timestamp > self._ring.latest:
+                    self._ring.append(timestamp, currencies, rates)
+
+    async def _load_snapshots(self, since: float) -> Optional[List[Tuple[datetime, List[str], List[float]]]]:
+        if not self.available:
+            return None
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await asyncio.wait_for(
+                    session.execute(LOAD_SNAPSHOTS_SQL, {"since": datetime.fromtimestamp(since, timezone.utc)}),
+                    timeout=settings.indicator_store_timeout
+                )
+                return result.all()
+        except Exception as e:
+            self._mark_unavailable(e)
+            return None
+
+    async def _load_range(self, base: str, quotes: Sequence[str], start: float, end: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Same as FXRingBuffer.series, read from Postgres"""
+        if not self.available:
+            return None
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await asyncio.wait_for(
+                    session.execute(LOAD_RANGE_SQL, {
+                        "codes": [base, *quotes],
+                        "start": datetime.fromtimestamp(start, timezone.utc),
+                        "end": datetime.fromtimestamp(end, timezone.utc),
+                    }),
+                    timeout=settings.indicator_store_timeout
+                )
+                rows = result.all()
+        except Exception as e:
+            self._mark_unavailable(e)
+            return None
+
+        times = np.array([captured_at.timestamp() for captured_at, _ in rows], dtype=np.float64)
+        picked = np.array([picked for _, picked in rows], dtype=np.float64).reshape(len(rows), len(quotes) + 1)
+        return times, picked[:, 1:] / picked[:, :1]
+
+    async def get_series(self, base: str, quotes: Sequence[str], days: int, points: int) -> Dict[str, Any]:
+        """Rates of each quote currency per 1 base over the last `days`, downsampled to at most `points`"""
+        end = time.time()
+        start = end - days * 86400
+        await self._sync()
+
+        source = "memory"
+        series = None
+        if start < self._covered_from():
+            series = await self._load_range(base, quotes, start, end)
+            if series is not None:
+                source = "database"
+        if series is None:
+            # older than the ring buffer and no database: the part of the range kept in memory
+            series = self._ring.series(base, quotes, start, end)
+        self.stats[f"{source}_queries"] += 1
+
+        times, values = downsample(*series, start, end, points)
+        return {
+            "source": source,
+            "timestamps": [datetime.fromtimestamp(t, timezone.utc).isoformat() for t in times],
+            "rates": {
+                quote: [None if np.isnan(value) else float(f"{value:.6g}") for value in values[:, k]]
+                for k, quote in enumerate(quotes)
+            },
+        }
+
+    def status(self) -> Dict[str, Any]:
+        covered_from = self._covered_from()
+        return {
+            "snapshots_in_memory": len(self._ring),
+            "memory_capacity": self._ring.capacity,
+            "memory_covers_days": round((time.time() - covered_from) / 86400, 1) if covered_from != float("inf") else None,
+            "currencies": len(self._ring.index),
+            **self.stats,
+        }
+
+
+# Global instance
+fx_history = FXHistory()
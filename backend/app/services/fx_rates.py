@@ -0,0 +1,168 @@
+"""
+FX rate engine: one base rate table, every cross rate computed locally
+
+exchangerate-api's `/latest/{base}` already returns the rate of every currency it knows against
+the base, so one call per refresh interval is enough for any pair:
+    rate(A -> B) = rates[B] / rates[A]      (rates[X] = units of X per 1 base currency)
+The table is kept as a float64 NumPy vector plus a currency -> index dict (~160 currencies,
+a few KB), fetched by background ingestion (or the first request on a cold start), stored in
+Redis so every worker shares one upstream call, and reloaded by each worker from there at most
+every Settings.fx_table_reload_seconds. Request handlers only read the in-memory table.
+Example:
+    table = await fx_rate_engine.get_table()
+    table.cross_rates("JPY", ["USD", "EUR"])  # {"USD": 0.0067, "EUR": 0.0062}
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.http_client import upstream_clients
+from app.core.rate_limiter import upstream_limits
+from app.core.singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "intel:fx:table"
+
+
+class FXRateTable:
+    """One snapshot of rates against a single base currency, immutable once built"""
+
+    def __init__(self, base: str, rates: Dict[str, float], date: Optional[str] = None,
+                 fetched_at: Optional[float] = None):
+        # drop anything that can't be divided by (missing, zero or non-numeric upstream values)
+        usable = {code: float(rate) for code, rate in rates.items() if isinstance(rate, (int, float)) and rate > 0}
+        usable[base] = 1.0
+        self.base = base
+        self.date = date
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.currencies: List[str] = sorted(usable)
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(self.currencies)}
+        self.rates = np.array([usable[code] for code in self.currencies], dtype=np.float64)
+
+    def __contains__(self, currency: str) -> bool:
+        return currency in self.index
+
+    def __len__(self) -> int:
+        return len(self.currencies)
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Units of to_currency per 1 from_currency, None if either is unknown"""
+        i, j = self.index.get(from_currency), self.index.get(to_currency)
+        if i is None or j is None:
+            return None
+        return float(self.rates[j] / self.rates[i])
+
+    def cross_rates(self, base: str, quotes: Iterable[str]) -> Dict[str, Optional[float]]:
+        """{quote: units of quote per 1 base}, unknown quotes map to None"""
+        quotes = list(quotes)
+        i = self.index.get(base)
+        if i is None:
+            return {quote: None for quote in quotes}
+        positions = np.array([self.index.get(quote, -1) for quote in quotes], dtype=np.intp)
+        values = self.rates[positions] / self.rates[i]
+        return {quote: (float(value) if position >= 0 else None)
+                for quote, position, value in zip(quotes, positions, values)}
+
+    def matrix(self, currencies: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Full cross-rate matrix, matrix[i, j] = units of currencies[j] per 1 currencies[i]
+        (all known currencies by default, unknown ones are skipped)"""
+        if currencies is None:
+            rates = self.rates
+        else:
+            rates = self.rates[[self.index[code] for code in currencies if code in self.index]]
+        return rates[np.newaxis, :] / rates[:, np.newaxis]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain form for the cache, from_dict rebuilds the table"""
+        return {
+            "base": self.base,
+            "date": self.date,
+            "fetched_at": self.fetched_at,
+            "currencies": self.currencies,
+            "rates": self.rates.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FXRateTable":
+        return cls(data["base"], dict(zip(data["currencies"], data["rates"])), data.get("date"), data.get("fetched_at"))
+
+
+class FXRateEngine:
+    def __init__(self):
+        self._table: Optional[FXRateTable] = None
+        self._checked_at = float("-inf")  # monotonic time this worker last looked for a newer shared table
+        self.stats = {"refreshes": 0, "refresh_failures": 0, "reloads": 0}
+
+    async def get_table(self) -> Optional[FXRateTable]:
+        """The current table, None only if there has never been one and the upstream can't be reached"""
+        if time.monotonic() - self._checked_at < settings.fx_table_reload_seconds:
+            return self._table
+
+        # the shared copy: fresh -> as is; stale -> as is plus one background refresh; miss -> one
+        # fetch per worker group (single flight), everyone else waits for it
+        data = await cache_manager.get_or_refresh(CACHE_KEY, lambda: single_flight.do(
+            "fx:table", self._refresh_data, recheck=lambda: cache_manager.get_fresh(CACHE_KEY)
+        ))
+        # stamped on failure too: during an upstream outage the old table (or None) is served for
+        # fx_table_reload_seconds instead of every call trying the upstream again
+        self._checked_at = time.monotonic()
+        if data:
+            if self._table is None or data["fetched_at"] != self._table.fetched_at:
+                self._table = FXRateTable.from_dict(data)
+                self.stats["reloads"] += 1
+        return self._table
+
+    async def refresh(self) -> Optional[FXRateTable]:
+        """Fetch the base table from the API, share it through the cache and use it in this worker"""
+        data = await self._refresh_data()
+        if data:
+            self._table = FXRateTable.from_dict(data)
+            self._checked_at = time.monotonic()
+        return self._table if data else None
+
+    async def _refresh_data(self) -> Optional[Dict[str, Any]]:
+        table = await self.fetch_table()
+        if table is None:
+            return None
+        data = table.to_dict()
+        await cache_manager.set_fresh(CACHE_KEY, data, soft_ttl=settings.currency_cache_ttl_hours * 3600)
+        return data
+
+    async def fetch_table(self) -> Optional[FXRateTable]:
+        """One `/latest/{base}` call, None on any failure (the previous table stays in use)"""
+        base = settings.fx_base_currency
+        try:
+            # raises UpstreamLimitExceeded when rate limited, handled like any other failure below
+            await upstream_limits.acquire("currency")
+            response = await upstream_clients.get("currency").get(f"/latest/{base}")
+            if response.status_code == 429:
+                await upstream_limits.get("currency").report_limited(response.headers.get("retry-after"))
+            response.raise_for_status()
+            data = response.json()
+            table = FXRateTable(base, data["rates"], data.get("date"))
+        except Exception as e:
+            self.stats["refresh_failures"] += 1
+            logger.warning(f"FX rate table refresh failed: {e}")
+            return None
+        self.stats["refreshes"] += 1
+        logger.info(f"FX rate table refreshed: {len(table)} currencies against {base}")
+        return table
+
+    def status(self) -> Dict[str, Any]:
+        table = self._table
+        return {
+            "base": table.base if table else settings.fx_base_currency,
+            "currencies": len(table) if table else 0,
+            "date": table.date if table else None,
+            "age_seconds": round(time.time() - table.fetched_at) if table else None,
+            **self.stats,
+        }
+
+
+# Global instance, import it anywhere: from app.services.fx_rates import fx_rate_engine
+fx_rate_engine = FXRateEngine()
@@ -2,15 +2,109 @@
 Simple AI service that works with our current setup
 """
 import asyncio
-from typing import Dict, List, Any
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
 import random
 
+from app.core.config import settings
+from app.services.analysis_cache import analysis_cache, content_hash
+from app.services.keyword_scorer import KeywordScorer
+from app.services.sentiment_backends import KeywordSentimentBackend, SentimentBackend, load_sentiment_backend
+
+logger = logging.getLogger(__name__)
+
 class SimpleAIService:
     def __init__(self):
         self.available = True
+        # CPU-bound analysis runs in this pool; threads rather than processes because a loaded
+        # model can't be shared across processes cheaply and torch releases the GIL during inference
+        self._executor = ThreadPoolExecutor(max_workers=settings.ai_worker_threads, thread_name_prefix="ai-analysis")
+        # picked from Settings.ai_sentiment_backend (app/services/sentiment_backends.py), loaded once by start()
+        self.sentiment_backend: Optional[SentimentBackend] = None
+        self._start_lock = asyncio.Lock()
+        # keyword lexicons (app/data/lexicons) compiled once, each text is scored in a single pass
+        self._text_scorer = KeywordScorer.from_files("sentiment", "bias")
+        self._source_scorer = KeywordScorer.from_file("sources")
+    
+    ANALYSIS_REVISION = 3  # bump when the summary / scoring logic changes so cached analyses are redone
+    
+    @property
+    def analysis_version(self) -> str:
+        """Identifies what produced an analysis, part of the analysis cache key"""
+        return f"simple-{self.ANALYSIS_REVISION}:{self.sentiment_backend.version}"
+    
+    async def start(self):
+        """Load the sentiment backend on the worker pool (called from the app lifespan, so the
+        first request doesn't pay for model loading; later calls are no-ops)"""
+        async with self._start_lock:
+            if self.sentiment_backend is None:
+                loop = asyncio.get_running_loop()
+                self.sentiment_backend = await loop.run_in_executor(
+                    self._executor, load_sentiment_backend, settings.ai_sentiment_backend
+                )
+    
+    async def analyze_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Summary, sentiment and bias for a whole batch of articles at once
+        
+        Each article is {"content": str, "source": str}; results come back in the same order as
+        {"summary": ..., "sentiment": ..., "bias": ...} with the same shapes as the single-text methods.
+        Articles analyzed before (same content and source, same analysis_version) come from the
+        analysis cache, only the rest reach the model.
+        """
+        if not articles:
+            return []
+        await self.start()  # no-op once the lifespan has loaded the backend
+        loop = asyncio.get_running_loop()
+        version = self.analysis_version
+        hashes = [content_hash(article.get("content") or "", article.get("source") or "") for article in articles]
+        cached = await analysis_cache.get_many(hashes, version)
+        
+        # duplicates within the batch are analyzed once too
+        to_analyze = {digest: article for digest, article in zip(hashes, articles) if digest not in cached}
+        if to_analyze:
+            fresh = await loop.run_in_executor(self._executor, self._analyze_batch, list(to_analyze.values()))
+            fresh_by_hash = dict(zip(to_analyze, fresh))
+            await analysis_cache.set_many(fresh_by_hash, version)
+            cached.update(fresh_by_hash)
+        return [cached[digest] for digest in hashes]
+    
+    def _analyze_batch(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        texts = [article.get("content") or "" for article in articles]
+        # one keyword pass per text covers both sentiment and bias lexicons
+        counts = [self._text_scorer.count(text) for text in texts]
+        sentiments = self._sentiments(texts, counts)
+        return [
+            {
+                "summary": self._summarize(text),
+                "sentiment": sentiment,
+                "bias": self._bias(text, article.get("source") or "", text_counts),
+            }
+            for article, text, text_counts, sentiment in zip(articles, texts, counts, sentiments)
+        ]
+    
+    def _sentiments(self, texts: List[str], counts: Optional[List[Dict[str, int]]] = None) -> List[Dict[str, Any]]:
+        try:
+            return self.sentiment_backend.score_batch(texts, keyword_counts=counts)
+        except Exception as e:
+            logger.error(f"{self.sentiment_backend.name} sentiment failed, using keyword scoring: {e}")
+            return [self._keyword_sentiment(text_counts) for text_counts in counts or map(self._text_scorer.count, texts)]
     
     async def generate_layered_summary(self, text: str) -> Dict[str, Any]:
         """Generate a simple summary"""
+        return self._summarize(text)
+    
+    async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
+        """Sentiment with the configured backend"""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        return (await loop.run_in_executor(self._executor, self._sentiments, [text]))[0]
+    
+    async def analyze_bias(self, text: str, source: str) -> Dict[str, Any]:
+        """Simple bias analysis"""
+        return self._bias(text, source)
+    
+    def _summarize(self, text: str) -> Dict[str, Any]:
         # For now, just truncate the text to create a summary
         words = text.split()
         
@@ -35,44 +129,18 @@ class SimpleAIService:
             "brief": text[:200] + "..." if len(text) > 200 else text
         }
     
-    async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
-        """Simple sentiment analysis"""
-        # Simple keyword-based sentiment
-        positive_words = ['good', 'great', 'excellent', 'positive', 'success', 'growth', 'up', 'rise']
-        negative_words = ['bad', 'terrible', 'negative', 'crisis', 'down', 'fall', 'decline', 'problem']
-        
-        text_lower = text.lower()
-        pos_count = sum(1 for word in positive_words if word in text_lower)
-        neg_count = sum(1 for word in negative_words if word in text_lower)
-        
-        if pos_count > neg_count:
-            label = 'positive'
-            score = 0.6 + (pos_count * 0.1)
-        elif neg_count > pos_count:
-            label = 'negative' 
-            score = -(0.6 + (neg_count * 0.1))
-        else:
-            label = 'neutral'
-            score = 0.0
-        
-        return {
-            "label": label,
-            "compound": max(-1.0, min(1.0, score))  # Keep between -1 and 1
-        }
+    @staticmethod
+    def _keyword_sentiment(counts: Dict[str, int]) -> Dict[str, Any]:
+        return KeywordSentimentBackend._score(counts['positive'], counts['negative'])
     
-    async def analyze_bias(self, text: str, source: str) -> Dict[str, Any]:
-        """Simple bias analysis"""
+    def _bias(self, text: str, source: str, counts: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
         # Simple source-based credibility
-        trusted_sources = ['reuters', 'ap', 'bbc', 'npr', 'pbs', 'wall street journal']
-        credibility = 0.9 if any(ts in source.lower() for ts in trusted_sources) else 0.7
+        credibility = 0.9 if self._source_scorer.count(source)['trusted'] else 0.7
         
         # Simple bias detection
-        liberal_keywords = ['progressive', 'reform', 'climate', 'diversity']
-        conservative_keywords = ['traditional', 'security', 'freedom', 'defense']
-        
-        text_lower = text.lower()
-        liberal_count = sum(1 for word in liberal_keywords if word in text_lower)
-        conservative_count = sum(1 for word in conservative_keywords if word in text_lower)
+        counts = counts or self._text_scorer.count(text)
+        liberal_count = counts['liberal']
+        conservative_count = counts['conservative']
         
         if conservative_count > liberal_count:
             bias_label = 'conservative'
@@ -1,147 +1,353 @@
 """
 Smart Hybrid AI Service - Cost-aware scaling
 Uses free models for bulk processing, paid APIs for premium countries/features
+
+The free tier is SimpleAIService (app/services/hybrid_ai_service.py). Premium calls are:
+    - picked deterministically: premium countries, premium bias analysis when enabled, and a
+      fixed share of other articles chosen by content hash (the same article always gets the same tier)
+    - made through the provider adapters in app/services/llm_providers.py (OpenAI / Anthropic)
+    - paid for up front: the worst-case cost is reserved in a per-month Redis counter
+      (INCRBYFLOAT, shared by every worker), then settled to the actual token cost or refunded if the call fails
+    - queued and rate-limited: per-worker concurrency + spacing, and a per-minute cap across workers
+    - batched: a feature's qualifying articles go to the provider as one complete_batch call
+Anything that can't get budget, a rate slot or a queue slot in time falls back to the free tier.
+NewsService sends every article batch through analyze_articles; premium calls are only made on the
+hybrid / openai_premium tiers (Settings.ai_provider, see scripts/scale_ai_service.py) with an API key set.
 """
 import asyncio
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
-from app.services.free_ai_service import free_ai_service
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from datetime import datetime
+from app.services.analysis_cache import analysis_cache, content_hash
+from app.services.hybrid_ai_service import hybrid_ai_service as free_ai_service
 from app.core.cache import cache_manager
 from app.core.config import settings
-import os
+from app.core.throttle import UpstreamThrottle
+from app.services.llm_providers import LLMProvider, LLMResult, estimate_cost, get_llm_provider, llm_providers
+
+logger = logging.getLogger(__name__)
+
+# deployment tiers that send qualifying articles to the paid APIs, "free" never does
+PREMIUM_TIERS = ("hybrid", "openai_premium")
+
+# Completion budget per feature, also what the cost reservation is based on
+PREMIUM_MAX_TOKENS = {
+    "summarization": 300,
+    "sentiment": 60,
+    "bias_analysis": 150,
+}
+
+SYSTEM_PROMPT = "You analyze news articles for a country intelligence dashboard. Reply with a single JSON object and nothing else."
+
+SUMMARY_PROMPT = """Summarize this news article.
+Return {{"tweet": "<one sentence, at most 280 characters>", "bullets": ["<three short key points>"], "brief": "<two or three sentences>"}}
+
+Article:
+{text}"""
+
+SENTIMENT_PROMPT = """Rate the overall sentiment of this news article.
+Return {{"label": "positive" | "negative" | "neutral", "compound": <-1.0 to 1.0>, "confidence": <0.0 to 1.0>}}
+
+Article:
+{text}"""
+
+BIAS_PROMPT = """Assess the political bias and credibility of this news article from {source}.
+Return {{"bias_label": "liberal" | "conservative" | "neutral", "credibility_score": <0.0 to 1.0>,
+"political_framing": "<short phrase>", "emotional_manipulation": "low" | "medium" | "high",
+"factual_accuracy_score": <0.0 to 1.0>, "source_reputation": "low" | "medium" | "high"}}
+
+Article:
+{text}"""
 
 class HybridSmartService:
     def __init__(self):
-        self.monthly_budget = float(os.getenv('MAX_MONTHLY_AI_BUDGET', '50'))
-        self.current_month_spend = 0.0  # Track via database in production
+        self.monthly_budget = float(settings.max_monthly_ai_budget)
         
         # Countries that get premium AI treatment
-        self.premium_countries = os.getenv('PREMIUM_COUNTRIES', 'USA,CHN,GBR,DEU,JPN').split(',')
+        self.premium_countries = [code.strip().upper() for code in settings.premium_countries.split(',') if code.strip()]
         
         # Feature tiers
-        self.premium_features_enabled = os.getenv('ENABLE_PREMIUM_FEATURES', 'false').lower() == 'true'
+        self.premium_features_enabled = settings.enable_premium_features
         
         # Initialize paid services if keys available
         self.openai_available = bool(settings.openai_api_key)
         self.anthropic_available = bool(settings.anthropic_api_key)
+        
+        # queue for premium calls in this worker: a burst waits its turn instead of spending the budget at once
+        self._premium_throttle = UpstreamThrottle(
+            settings.premium_ai_concurrency, 60.0 / max(settings.premium_ai_calls_per_minute, 1)
+        )
     
-    async def generate_layered_summary(self, text: str, country_code: str = None) -> Dict[str, Any]:
-        """Generate summary using cost-aware model selection"""
+    @property
+    def enabled(self) -> bool:
+        return settings.ai_provider in PREMIUM_TIERS and (self.openai_available or self.anthropic_available)
+    
+    @property
+    def analysis_version(self) -> str:
+        """Version premium-upgraded analyses are cached and stored under, free ones keep SimpleAIService's"""
+        models = ":".join(provider.model for provider in llm_providers.values())
+        return f"{free_ai_service.analysis_version}+premium:{models}"
+    
+    async def analyze_articles(self, articles: List[Dict[str, Any]], country_code: str = None) -> List[Dict[str, Any]]:
+        """SimpleAIService.analyze_articles, with qualifying articles upgraded to premium where budget allows
         
-        # Check if this qualifies for premium processing
-        use_premium = self._should_use_premium(country_code, "summarization")
+        Results have the same shapes plus "version", the analysis_version that produced each one.
+        Upgrades are cached like free analyses, so an article is paid for once per premium version.
+        """
+        analyses = await free_ai_service.analyze_articles(articles)
+        free_version = free_ai_service.analysis_version
+        if not self.enabled or not articles:
+            return [{**analysis, "version": free_version} for analysis in analyses]
         
-        if use_premium and self.openai_available:
-            try:
-                return await self._generate_premium_summary(text, country_code)
-            except Exception as e:
-                print(f"Premium service failed, falling back to free: {e}")
+        version = self.analysis_version
+        hashes = [content_hash(article.get("content") or "", article.get("source") or "") for article in articles]
+        upgraded = await analysis_cache.get_many(hashes, version)
+        pending = {
+            digest: (article, analysis)
+            for digest, article, analysis in zip(hashes, articles, analyses) if digest not in upgraded
+        }
+        if pending:
+            results = await self._upgrade_batch(list(pending.values()), country_code)
+            # articles that got nothing premium (no budget, queue full) aren't cached, so they're retried next time
+            fresh = {digest: result for digest, result in zip(pending, results) if result is not None}
+            await analysis_cache.set_many(fresh, version)
+            upgraded.update(fresh)
+        return [
+            {**upgraded[digest], "version": version} if digest in upgraded else {**analysis, "version": free_version}
+            for digest, analysis in zip(hashes, analyses)
+        ]
+    
+    async def _upgrade_batch(self, items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                             country_code: Optional[str]) -> List[Optional[Dict[str, Any]]]:
+        """(article, free analysis) pairs with every feature that got a premium result replaced, None where none did
+        
+        Each feature's qualifying articles go to its provider as one complete_batch call.
+        """
+        texts = [article.get("content") or "" for article, _ in items]
+        
+        async def run(feature: str, provider: Optional[LLMProvider], prompt_for: Callable[[int], str],
+                      parse: Callable[[Dict[str, Any], LLMResult], Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+            if provider is None:
+                return {}
+            picked = [i for i, text in enumerate(texts) if self._should_use_premium(country_code, feature, text)]
+            results = await self._run_premium_batch(feature, provider, [prompt_for(i) for i in picked], parse)
+            return {i: result for i, result in zip(picked, results) if result is not None}
         
+        summaries, sentiments, biases = await asyncio.gather(
+            run("summarization", self._provider("openai"),
+                lambda i: SUMMARY_PROMPT.format(text=texts[i]), self._generate_premium_summary),
+            run("sentiment", self._provider("openai"),
+                lambda i: SENTIMENT_PROMPT.format(text=texts[i]), self._analyze_premium_sentiment),
+            run("bias_analysis", self._provider("anthropic") or self._provider("openai"),
+                lambda i: BIAS_PROMPT.format(text=texts[i], source=items[i][0].get("source") or ""), self._analyze_premium_bias),
+        )
+        
+        upgraded: List[Optional[Dict[str, Any]]] = []
+        for i, (_, analysis) in enumerate(items):
+            if i not in summaries and i not in sentiments and i not in biases:
+                upgraded.append(None)
+                continue
+            upgraded.append({
+                "summary": summaries.get(i, analysis["summary"]),
+                "sentiment": sentiments.get(i, analysis["sentiment"]),
+                "bias": biases.get(i, analysis["bias"]),
+            })
+        return upgraded
+    
+    @staticmethod
+    def _spend_key(month: Optional[str] = None) -> str:
+        return f"ai:spend:{month or datetime.now().strftime('%Y-%m')}"
+    
+    async def generate_layered_summary(self, text: str, country_code: str = None) -> Dict[str, Any]:
+        """Generate summary using cost-aware model selection"""
+        
+        result = await self._run_premium(
+            "summarization", text, country_code, self._provider("openai"),
+            SUMMARY_PROMPT.format(text=text), self._generate_premium_summary
+        )
         # Use free service
-        return await free_ai_service.generate_layered_summary(text)
+        return result if result is not None else await free_ai_service.generate_layered_summary(text)
     
     async def analyze_sentiment(self, text: str, country_code: str = None) -> Dict[str, Any]:
         """Sentiment analysis with smart model selection"""
         
-        use_premium = self._should_use_premium(country_code, "sentiment")
-        
-        if use_premium and self.openai_available:
-            try:
-                return await self._analyze_premium_sentiment(text)
-            except Exception:
-                pass
-        
-        return await free_ai_service.analyze_sentiment(text)
+        result = await self._run_premium(
+            "sentiment", text, country_code, self._provider("openai"),
+            SENTIMENT_PROMPT.format(text=text), self._analyze_premium_sentiment
+        )
+        return result if result is not None else await free_ai_service.analyze_sentiment(text)
     
     async def analyze_bias(self, text: str, source: str, country_code: str = None) -> Dict[str, Any]:
         """Bias analysis with enhanced premium features"""
         
-        use_premium = self._should_use_premium(country_code, "bias_analysis")
+        result = await self._run_premium(
+            "bias_analysis", text, country_code, self._provider("anthropic") or self._provider("openai"),
+            BIAS_PROMPT.format(text=text, source=source), self._analyze_premium_bias
+        )
+        return result if result is not None else await free_ai_service.analyze_bias(text, source)
+    
+    @staticmethod
+    def _provider(name: str) -> Optional[LLMProvider]:
+        provider = get_llm_provider(name)
+        return provider if provider.available else None
+    
+    async def _run_premium(self, feature: str, text: str, country_code: Optional[str], provider: Optional[LLMProvider],
+                           prompt: str, parse: Callable[[Dict[str, Any], LLMResult], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Run a premium call if this request qualifies and budget / rate limits allow, None means use the free tier"""
+        if provider is None or not self._should_use_premium(country_code, feature, text):
+            return None
+        return (await self._run_premium_batch(feature, provider, [prompt], parse))[0]
+    
+    async def _run_premium_batch(self, feature: str, provider: LLMProvider, prompts: List[str],
+                                 parse: Callable[[Dict[str, Any], LLMResult], Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Premium results for prompts that already qualify, sent as one complete_batch; None where the free tier has to do"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        if not prompts:
+            return results
         
-        if use_premium and (self.openai_available or self.anthropic_available):
-            try:
-                return await self._analyze_premium_bias(text, source)
-            except Exception:
-                pass
+        max_tokens = PREMIUM_MAX_TOKENS[feature]
+        prompts = [provider.fit_prompt(prompt, max_tokens)[0] for prompt in prompts]
+        _, max_tokens = provider.fit_prompt("", max_tokens)
+        try:
+            async with self._premium_throttle.slot(timeout=settings.premium_ai_queue_timeout):
+                granted = await self._take_rate_slots(len(prompts))
+                if granted < len(prompts):
+                    logger.info(f"Premium AI rate limit reached, using free tier for {len(prompts) - granted} {feature} calls")
+                # reserve the worst case of each call up front, then settle to what the calls actually cost
+                estimates = []
+                for prompt in prompts[:granted]:
+                    estimate = estimate_cost(provider.model, prompt, max_tokens)
+                    if not await self._reserve_budget(estimate):
+                        break
+                    estimates.append(estimate)
+                if not estimates:
+                    return results
+                try:
+                    # failed calls come back as None (complete_batch only lets non-LLMError exceptions through)
+                    llm_results = await provider.complete_batch(prompts[:len(estimates)], max_tokens, system=SYSTEM_PROMPT)
+                except BaseException:
+                    # anything else (a bug, cancellation) still gives the reservations back before propagating
+                    await asyncio.shield(self._refund(sum(estimates)))
+                    raise
+        except asyncio.TimeoutError:
+            logger.info(f"Premium AI queue full, using free tier for {feature}")
+            return results
         
-        return await free_ai_service.analyze_bias(text, source)
+        # failed calls give back their whole reservation, the rest whatever they didn't use
+        await self._refund(sum(estimates) - sum(llm_result.cost for llm_result in llm_results if llm_result is not None))
+        for i, llm_result in enumerate(llm_results):
+            if llm_result is None:
+                continue
+            try:
+                result = parse(_parse_json(llm_result.text), llm_result)
+            except (ValueError, KeyError, TypeError) as e:
+                # the tokens are spent either way, but a malformed answer is worse than the free tier
+                logger.warning(f"Unusable {provider.name} response for {feature}, falling back to free: {e}")
+                continue
+            result["quality_tier"] = "premium"
+            result["model_used"] = llm_result.model
+            result["processing_cost"] = round(llm_result.cost, 6)
+            results[i] = result
+        return results
     
-    def _should_use_premium(self, country_code: str, feature: str) -> bool:
-        """Decide whether to use premium AI for this request"""
-        
-        # Budget check
-        if self.current_month_spend >= self.monthly_budget:
-            return False
+    def _should_use_premium(self, country_code: str, feature: str, text: str = "") -> bool:
+        """Decide whether to use premium AI for this request (budget is checked when the call is made)"""
         
         # Country priority
-        if country_code and country_code in self.premium_countries:
+        if country_code and country_code.upper() in self.premium_countries:
             return True
         
         # Feature-specific logic
         if feature == "bias_analysis" and self.premium_features_enabled:
             return True
         
-        # Random sampling for demo purposes (10% of requests)
-        import random
-        return random.random() < 0.1
+        # Deterministic sampling: the same article always lands in the same tier, so its cached analysis is stable
+        bucket = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16) % 100
+        return bucket < settings.premium_sample_percent
     
-    async def _generate_premium_summary(self, text: str, country_code: str) -> Dict[str, Any]:
-        """Generate high-quality summary using paid API"""
-        
-        # Implementation would use OpenAI/Anthropic here
-        # For now, return enhanced free version
-        free_result = await free_ai_service.generate_layered_summary(text)
-        
-        # Add premium indicators
-        free_result["quality_tier"] = "premium"
-        free_result["model_used"] = "gpt-3.5-turbo"
-        free_result["processing_cost"] = 0.002  # Estimated cost
-        
-        # Track spend
-        self.current_month_spend += 0.002
-        
-        return free_result
+    async def _reserve_budget(self, cost: float) -> bool:
+        """Atomically add the cost to this month's shared spend, undo it if that would exceed the budget"""
+        key = self._spend_key()
+        total = await cache_manager.incr_float(key, cost, expire=40 * 24 * 3600)
+        if total is None:
+            return False  # can't account for the spend without Redis, so don't spend
+        if total > self.monthly_budget:
+            await cache_manager.incr_float(key, -cost, expire=40 * 24 * 3600)
+            logger.info(f"Monthly AI budget of ${self.monthly_budget:.2f} reached, using free tier")
+            return False
+        return True
     
-    async def _analyze_premium_sentiment(self, text: str) -> Dict[str, Any]:
+    async def _refund(self, cost: float):
+        await cache_manager.incr_float(self._spend_key(), -cost, expire=40 * 24 * 3600)
+    
+    async def _take_rate_slots(self, count: int) -> int:
+        """Per-minute cap on premium calls across all workers, returns how many of `count` calls fit"""
+        minute = int(time.time() // 60)
+        calls = await cache_manager.incr_float(f"ai:premium:calls:{minute}", count, expire=120)
+        if calls is None:
+            return 0
+        return max(0, min(count, settings.premium_ai_calls_per_minute - int(calls - count)))
+    
+    @staticmethod
+    def _generate_premium_summary(data: Dict[str, Any], llm_result: LLMResult) -> Dict[str, Any]:
+        """High-quality summary from the paid API, same shape as the free summary"""
+        bullets = [bullet if bullet.startswith("•") else f"• {bullet}" for bullet in data["bullets"]][:3]
+        return {"tweet": str(data["tweet"])[:280], "bullets": bullets, "brief": str(data.get("brief", data["tweet"]))}
+    
+    @staticmethod
+    def _analyze_premium_sentiment(data: Dict[str, Any], llm_result: LLMResult) -> Dict[str, Any]:
         """Premium sentiment analysis"""
-        
-        free_result = await free_ai_service.analyze_sentiment(text)
-        
-        # Enhance with premium features
-        free_result["confidence_score"] = free_result.get("confidence", 0.8) * 1.1
-        free_result["quality_tier"] = "premium"
-        
-        return free_result
+        label = data["label"] if data["label"] in ("positive", "negative", "neutral") else "neutral"
+        return {
+            "label": label,
+            "compound": max(-1.0, min(1.0, float(data["compound"]))),
+            "confidence_score": max(0.0, min(1.0, float(data.get("confidence", 0.8)))),
+        }
     
-    async def _analyze_premium_bias(self, text: str, source: str) -> Dict[str, Any]:
+    @staticmethod
+    def _analyze_premium_bias(data: Dict[str, Any], llm_result: LLMResult) -> Dict[str, Any]:
         """Advanced bias analysis with premium models"""
-        
-        free_result = await free_ai_service.analyze_bias(text, source)
-        
-        # Add premium bias detection features
-        free_result["advanced_bias_indicators"] = {
-            "political_framing": "neutral",
-            "emotional_manipulation": "low", 
-            "factual_accuracy_score": 0.85,
-            "source_reputation": "high"
+        label = data["bias_label"] if data["bias_label"] in ("liberal", "conservative", "neutral") else "neutral"
+        return {
+            "bias_label": label,
+            "credibility_score": max(0.0, min(1.0, float(data["credibility_score"]))),
+            "advanced_bias_indicators": {
+                "political_framing": data.get("political_framing", "neutral"),
+                "emotional_manipulation": data.get("emotional_manipulation", "low"),
+                "factual_accuracy_score": data.get("factual_accuracy_score"),
+                "source_reputation": data.get("source_reputation"),
+            },
         }
-        free_result["quality_tier"] = "premium"
-        
-        return free_result
     
-    def get_usage_stats(self) -> Dict[str, Any]:
-        """Get current usage and cost information"""
+    async def get_usage_stats(self) -> Dict[str, Any]:
+        """Get current usage and cost information (spend is shared by every worker)"""
+        current_month_spend = await cache_manager.get_float(self._spend_key())
         return {
-            "current_month_spend": self.current_month_spend,
+            "month": datetime.now().strftime('%Y-%m'),
+            "current_month_spend": round(current_month_spend, 4) if current_month_spend is not None else None,
             "monthly_budget": self.monthly_budget,
-            "budget_remaining": self.monthly_budget - self.current_month_spend,
+            "budget_remaining": round(self.monthly_budget - current_month_spend, 4) if current_month_spend is not None else None,
             "premium_countries": self.premium_countries,
+            "premium_sample_percent": settings.premium_sample_percent,
+            "premium_calls_per_minute": settings.premium_ai_calls_per_minute,
             "services_available": {
                 "openai": self.openai_available,
                 "anthropic": self.anthropic_available,
                 "free_models": True
-            }
+            },
+            # this worker's provider calls, retries and token usage
+            "providers": {name: provider.usage for name, provider in llm_providers.items()},
         }
 
+def _parse_json(text: str) -> Dict[str, Any]:
+    """The JSON object in a model reply, tolerating markdown code fences around it"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in response")
+    return json.loads(text[start:end + 1])
+
 # Global instance
 hybrid_smart_service = HybridSmartService()
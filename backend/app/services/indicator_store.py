@@ -0,0 +1,168 @@
+"""
+Postgres-backed store for World Bank economic indicators
+
+Indicators are annual and change a few times a year at most, so WorldBankService reads
+them from the economic_indicators table and only goes to the World Bank when a country
+is missing (cold) or its rows are older than Settings.economic_data_stale_days (refreshed
+in the background). New values are bulk-upserted with INSERT ... ON CONFLICT.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.country_service import country_service
+
+logger = logging.getLogger(__name__)
+
+# Latest value per (country, indicator), DISTINCT ON keeps the first row of each group
+LOAD_SQL = text("""
+    SELECT DISTINCT ON (c.iso_code, ei.indicator_type)
+        c.iso_code, ei.indicator_type, ei.indicator_name, ei.value, ei.date, ei.fetched_at
+    FROM economic_indicators ei
+    JOIN countries c ON c.id = ei.country_id
+    WHERE c.iso_code IN :codes
+    ORDER BY c.iso_code, ei.indicator_type, ei.date DESC
+""").bindparams(bindparam("codes", expanding=True))
+
+# economic_indicators / news_articles country_id references countries, so make sure the country row exists
+ENSURE_COUNTRY_SQL = text("""
+    INSERT INTO countries (id, iso_code, iso_code_2, name, currency_code, latitude, longitude)
+    VALUES (:id, :iso_code, :iso_code_2, :name, :currency_code, :latitude, :longitude)
+    ON CONFLICT DO NOTHING
+""")
+
+UPSERT_SQL = text("""
+    INSERT INTO economic_indicators (id, country_id, indicator_type, indicator_name, value, date, source, fetched_at)
+    SELECT :id, c.id, :indicator_type, :indicator_name, :value, :date, 'World Bank', NOW()
+    FROM countries c
+    WHERE c.iso_code = :iso_code
+    ON CONFLICT (country_id, indicator_type, date)
+    DO UPDATE SET value = EXCLUDED.value, indicator_name = EXCLUDED.indicator_name, fetched_at = NOW()
+""")
+
+
+@dataclass
+class StoredIndicators:
+    indicators: Dict[str, Any]  # same {name: {value, year, indicator}} shape as WorldBankService
+    fetched_at: datetime  # oldest refresh time across the country's indicators
+
+    @property
+    def is_stale(self) -> bool:
+        age = datetime.now(timezone.utc) - self.fetched_at
+        return age > timedelta(days=settings.economic_data_stale_days)
+
+
+class IndicatorStore:
+    def __init__(self):
+        # when the database is unreachable we skip it for a while instead of paying a timeout per request
+        self._unavailable_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _mark_unavailable(self, error: Exception):
+        logger.warning(f"Indicator store unavailable, falling back to the World Bank API: {error}")
+        self._unavailable_until = time.monotonic() + settings.indicator_store_retry_seconds
+
+    async def load(self, country_codes: List[str]) -> Dict[str, StoredIndicators]:
+        """Read the latest stored indicators for each country, missing countries are left out"""
+        codes = [code.upper() for code in country_codes]
+        if not codes or not self.available:
+            return {}
+
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await asyncio.wait_for(
+                    session.execute(LOAD_SQL, {"codes": codes}),
+                    timeout=settings.indicator_store_timeout
+                )
+                rows = result.all()
+        except Exception as e:
+            self._mark_unavailable(e)
+            return {}
+
+        stored: Dict[str, StoredIndicators] = {}
+        for iso_code, indicator_type, indicator_name, value, row_date, fetched_at in rows:
+            entry = stored.setdefault(iso_code, StoredIndicators(indicators={}, fetched_at=fetched_at))
+            entry.indicators[indicator_type] = {
+                'value': _to_number(value),
+                'year': str(row_date.year),
+                'indicator': indicator_name
+            }
+            entry.fetched_at = min(entry.fetched_at, fetched_at)
+        return stored
+
+    async def upsert(self, results: Dict[str, Dict[str, Any]]):
+        """Bulk-upsert {country_code: {name: {value, year, indicator}}} into economic_indicators"""
+        countries = []
+        rows = []
+        for code, indicators in results.items():
+            country = country_row(code)
+            if not country or not indicators:
+                continue
+            countries.append(country)
+            for indicator_type, entry in indicators.items():
+                rows.append({
+                    'id': uuid.uuid4(),
+                    'iso_code': code.upper(),
+                    'indicator_type': indicator_type,
+                    'indicator_name': entry['indicator'],
+                    'value': Decimal(str(entry['value'])),
+                    'date': date(int(entry['year']), 1, 1)
+                })
+
+        if not rows or not self.available:
+            return
+
+        async def write():
+            async with AsyncSessionLocal() as session:
+                # a list of parameter dicts runs as one batched executemany
+                await session.execute(ENSURE_COUNTRY_SQL, countries)
+                await session.execute(UPSERT_SQL, rows)
+                await session.commit()
+
+        try:
+            # bounded like the reads, callers await this on the response path
+            await asyncio.wait_for(write(), timeout=settings.indicator_store_timeout)
+            logger.info(f"Stored {len(rows)} economic indicators for {len(countries)} countries")
+        except Exception as e:
+            self._mark_unavailable(e)
+
+
+def country_row(country_code: str) -> Optional[Dict[str, Any]]:
+    """ENSURE_COUNTRY_SQL parameters for a country from CountryService (None if unknown)"""
+    info = country_service.get_country_info(country_code)
+    if not info:
+        return None
+    return {
+        'id': uuid.uuid4(),
+        'iso_code': country_code.upper(),
+        'iso_code_2': info['wb_code'],
+        'name': info['name'],
+        'currency_code': info.get('currency'),
+        'latitude': Decimal(str(info['coords'][1])),
+        'longitude': Decimal(str(info['coords'][0]))
+    }
+
+
+def _to_number(value: Optional[Decimal]) -> Any:
+    """DECIMAL columns come back as Decimal, turn them back into plain JSON numbers"""
+    if value is None:
+        return None
+    if value == value.to_integral_value():
+        return int(value)
+    return float(value)
+
+
+# Global instance
+indicator_store = IndicatorStore()
@@ -0,0 +1,191 @@
+"""
+Background ingestion: keep news, economic indicators and FX rates warm for every country
+
+Without this, data is only fetched when someone clicks a country, so the first viewer pays
+the full cold-fetch cost. The scheduler periodically walks every country in CountryService,
+refreshes each source into the cache / economic_indicators table with bounded concurrency
+and per-upstream spacing, and records when each country was last refreshed.
+News is the exception: NewsAPI's daily quota can't cover every country every cycle, so each
+cycle refreshes the stalest countries its share of the quota allows.
+
+Runs as an asyncio task in the app lifespan (Settings.enable_background_ingestion) or as a
+separate worker: python scripts/run_ingestion.py
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.throttle import UpstreamThrottle, background_priority
+from app.services.country_service import country_service
+from app.services.fx_history import fx_history
+from app.services.fx_rates import fx_rate_engine
+from app.services.indicator_store import indicator_store
+from app.services.news_service import news_service
+from app.services.worldbank_service import worldbank_service
+
+logger = logging.getLogger(__name__)
+
+# Redis hash, field "<source>:<country code>" -> ISO timestamp of the last successful refresh.
+# Every worker only adds the fields it refreshed, so workers running different sources don't overwrite each other
+FRESHNESS_KEY = "ingestion:last_refreshed"
+
+
+class IngestionScheduler:
+    SOURCES = ("economic", "currency", "news")
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        # {country_code: {source: ISO timestamp of the last successful refresh}} by this worker, used while Redis is down
+        self.freshness: Dict[str, Dict[str, Optional[str]]] = {}
+        self._last_run: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._throttles = {
+            # NewsAPI's free tier is tiny, so news is always refreshed one country at a time
+            "news": UpstreamThrottle(1, settings.news_api_min_interval_seconds),
+        }
+
+    def _interval_seconds(self, source: str) -> int:
+        return {
+            "economic": settings.ingestion_economic_interval_hours * 3600,
+            "currency": settings.ingestion_currency_interval_minutes * 60,
+            "news": settings.ingestion_news_interval_minutes * 60,
+        }[source]
+
+    def start(self):
+        """Start the periodic loop (called from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info(f"Background ingestion started on {self.worker_id}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_due()
+            except Exception as e:
+                logger.error(f"Ingestion cycle failed: {e}")
+            await asyncio.sleep(settings.ingestion_tick_seconds)
+
+    async def run_due(self, force: bool = False):
+        """Refresh every source whose interval has elapsed"""
+        for source in self.SOURCES:
+            interval = self._interval_seconds(source)
+            if interval <= 0 or (source == "news" and not settings.news_api_key):
+                continue
+            if not force and time.monotonic() - self._last_run.get(source, float("-inf")) < interval:
+                continue
+            # The lease doubles as a cross-worker "last run" marker: with several uvicorn workers
+            # (or the standalone worker) only whoever grabs it refreshes this source this interval
+            if not force and not await cache_manager.set_if_absent(f"ingestion:lease:{source}", self.worker_id, expire=interval):
+                self._last_run[source] = time.monotonic()
+                continue
+            self._last_run[source] = time.monotonic()
+            await self.refresh_source(source)
+
+    async def refresh_source(self, source: str):
+        started = time.perf_counter()
+        # nobody is waiting on ingestion, so it only uses upstream quota interactive requests leave over
+        with background_priority():
+            refreshed = await {
+                "economic": self._refresh_economic,
+                "currency": self._refresh_currency,
+                "news": self._refresh_news,
+            }[source]()
+
+        now = datetime.now().isoformat()
+        for code in refreshed:
+            self.freshness.setdefault(code, {})[source] = now
+        await cache_manager.set_fields(FRESHNESS_KEY, {f"{source}:{code}": now for code in refreshed}, expire=7 * 24 * 3600)
+        logger.info(f"Ingested {source} for {len(refreshed)} countries in {time.perf_counter() - started:.1f}s")
+
+    async def _refresh_economic(self) -> List[str]:
+        # batched: every indicator for 50 countries per World Bank call
+        codes = [country['code'] for country in country_service.get_all_countries()]
+        fetched = await worldbank_service.fetch_indicators_from_api(codes)
+        await indicator_store.upsert(fetched)
+        await worldbank_service.cache_indicators(fetched)
+        return [code for code, indicators in fetched.items() if indicators]
+
+    async def _refresh_currency(self) -> List[str]:
+        # one call for the whole base table, every country's cross rates come from it
+        table = await fx_rate_engine.refresh()
+        if table is None:
+            return []
+        await fx_history.record(table)
+        return [country['code'] for country in country_service.get_all_countries() if country['currency'] in table]
+
+    def _news_countries_per_cycle(self) -> Optional[int]:
+        """Countries one news cycle may refresh (one NewsAPI request each) so that ingestion stays within
+        the share of the daily quota not reserved for interactive requests, None if there is no quota"""
+        if not settings.news_api_daily_quota:
+            return None
+        cycles_per_day = max(1.0, 1440 / settings.ingestion_news_interval_minutes)
+        budget = settings.news_api_daily_quota * (1 - settings.upstream_interactive_reserve)
+        return max(1, int(budget / cycles_per_day))
+
+    async def _refresh_news(self) -> List[str]:
+        # NewsAPI's daily quota covers a fraction of the countries per cycle, so each cycle takes the
+        # ones refreshed longest ago (never refreshed first) and the whole list rotates over a few cycles
+        freshness = await self._load_freshness()
+        countries = sorted(
+            country_service.get_all_countries(),
+            key=lambda country: freshness.get(country['code'], {}).get("news") or ""
+        )
+        limit = self._news_countries_per_cycle()
+        refreshed = []
+        for country in countries[:limit]:
+            async with self._throttles["news"].slot():
+                news_data = await news_service.refresh_country_news(country['name'], country['code'])
+            if news_data.get("articles"):
+                refreshed.append(country['code'])
+            elif "rate limited" in news_data.get("message", ""):
+                # no point burning the rest of the cycle against a limit we already hit
+                # (or the share of the daily quota kept for interactive requests)
+                logger.warning("NewsAPI rate limited, stopping this news ingestion cycle")
+                break
+        return refreshed
+
+    async def _load_freshness(self) -> Dict[str, Dict[str, str]]:
+        """{country_code: {source: ISO timestamp}} across all workers, this worker's own record if Redis is down"""
+        fields = await cache_manager.get_fields(FRESHNESS_KEY)
+        if fields is None:
+            return self.freshness
+        freshness: Dict[str, Dict[str, str]] = {}
+        for field, refreshed_at in fields.items():
+            source, _, code = field.partition(":")
+            freshness.setdefault(code, {})[source] = refreshed_at
+        return freshness
+
+    async def get_freshness(self) -> Dict[str, Any]:
+        """Per-country freshness, shared across workers through the cache"""
+        freshness = await self._load_freshness()
+        countries = {
+            country['code']: {source: freshness.get(country['code'], {}).get(source) for source in self.SOURCES}
+            for country in country_service.get_all_countries()
+        }
+        return {
+            "enabled": settings.enable_background_ingestion,
+            "countries": countries,
+            "warm_countries": {
+                source: sum(1 for sources in countries.values() if sources[source]) for source in self.SOURCES
+            },
+            "total_countries": len(countries),
+        }
+
+
+# Global instance
+ingestion_scheduler = IngestionScheduler()
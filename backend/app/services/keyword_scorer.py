@@ -0,0 +1,101 @@
+"""
+Single-pass keyword scoring for the keyword sentiment / bias analysis (app/services/hybrid_ai_service.py)
+
+Lexicons are compiled once into a token -> categories table (multi-word terms are indexed by
+their first token), so scoring a text is one tokenizer pass plus a set intersection with the
+table, counting every category at once. Matching is on whole words: "up" no longer matches
+"support" and "ap" no longer matches "happen". A word inside a matched phrase is part of that
+phrase, not a hit of its own ("wall street journal" doesn't also count "street").
+Lexicons live in app/data/lexicons/*.json as {"category": ["term", "multi word term", ...]}
+and can be swapped for larger ones via Settings.lexicon_dir without slowing scoring down.
+Benchmark: python scripts/benchmark_keyword_scoring.py
+"""
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from app.core.config import settings
+
+# apostrophes split words ("country's" -> country, s); lexicon terms are tokenized the same way so they still line up
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+DEFAULT_LEXICON_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "lexicons")
+
+
+def _lexicon_path(name: str) -> str:
+    return os.path.join(settings.lexicon_dir or DEFAULT_LEXICON_DIR, f"{name}.json")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class KeywordScorer:
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        self.categories = list(lexicons)
+        # single-token terms: token -> categories
+        self._words: Dict[str, Tuple[str, ...]] = {}
+        # multi-word terms: first token -> [(remaining tokens, term, categories)]
+        self._phrases: Dict[str, List[Tuple[List[str], str, Tuple[str, ...]]]] = {}
+
+        term_categories: Dict[str, List[str]] = {}
+        for category, terms in lexicons.items():
+            for term in terms:
+                normalized = " ".join(tokenize(term))
+                if normalized and category not in term_categories.setdefault(normalized, []):
+                    term_categories[normalized].append(category)
+
+        for term, categories in term_categories.items():
+            tokens = term.split()
+            if len(tokens) == 1:
+                self._words[term] = tuple(categories)
+            else:
+                self._phrases.setdefault(tokens[0], []).append((tokens[1:], term, tuple(categories)))
+        self._word_set = frozenset(self._words)
+        self._phrase_starts = frozenset(self._phrases)
+
+    @classmethod
+    def from_file(cls, name: str) -> "KeywordScorer":
+        """Load app/data/lexicons/<name>.json (or from Settings.lexicon_dir when set)"""
+        return cls.from_files(name)
+
+    @classmethod
+    def from_files(cls, *names: str) -> "KeywordScorer":
+        """One scorer over several lexicon files, so a single pass counts all their categories"""
+        lexicons = {}
+        for name in names:
+            with open(_lexicon_path(name), encoding="utf-8") as f:
+                lexicons.update(json.load(f))
+        return cls(lexicons)
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Number of distinct lexicon terms found in the text, for every category"""
+        tokens = tokenize(text)
+        distinct = set(tokens)
+        counts = dict.fromkeys(self.categories, 0)
+
+        # multi-word terms: only look at positions whose token starts some phrase
+        starts = distinct.intersection(self._phrase_starts)
+        covered = set()  # token positions inside a matched phrase
+        if starts:
+            matched = {}
+            for i, token in enumerate(tokens):
+                if token in starts:
+                    for rest, term, categories in self._phrases[token]:
+                        if tokens[i + 1:i + 1 + len(rest)] == rest:
+                            matched[term] = categories
+                            covered.update(range(i, i + 1 + len(rest)))
+            for categories in matched.values():
+                for category in categories:
+                    counts[category] += 1
+
+        # single words: one C-level set intersection instead of a Python loop over tokens
+        words = distinct.intersection(self._word_set)
+        if covered and words:
+            # a word only counts if it also appears outside every matched phrase
+            words = {token for i, token in enumerate(tokens) if i not in covered and token in words}
+        for word in words:
+            for category in self._words[word]:
+                counts[category] += 1
+        return counts
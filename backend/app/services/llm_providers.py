@@ -0,0 +1,236 @@
+"""
+Async LLM provider adapters behind one interface (used by the premium tier in
+app/services/hybrid_smart_service.py)
+
+    provider = get_llm_provider("openai")   # or "anthropic"
+    result = await provider.complete(prompt, max_tokens=300)
+    results = await provider.complete_batch(prompts, max_tokens=300)
+
+Requests go through the pooled upstream clients (app/core/http_client.py), retry 429 / 5xx /
+timeouts with exponential backoff and full jitter (honouring Retry-After), and are sized so
+prompt + completion stay within Settings.max_tokens_per_request. Every result carries its token
+usage and cost, and per-provider totals are kept for /status and load tests.
+Neither API has a synchronous multi-prompt endpoint, so complete_batch fans out concurrently
+(bounded by Settings.llm_max_concurrency) over the same pooled connections.
+For offline testing run scripts/llm_stub_server.py and point OPENAI_API_URL / ANTHROPIC_API_URL at it.
+"""
+import asyncio
+import logging
+import random
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.http_client import upstream_clients
+
+logger = logging.getLogger(__name__)
+
+# USD per 1k tokens (input, output)
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "claude-3-sonnet-20240229": (0.003, 0.015),
+    "claude-3-haiku-20240307": (0.00025, 0.00125),
+}
+DEFAULT_PRICE = (0.01, 0.03)  # unknown models are costed conservatively
+
+
+def model_price(model: str) -> Tuple[float, float]:
+    """(input, output) price for a model, dated snapshots ("gpt-4-0613") use their family's longest listed prefix"""
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    family = max((name for name in MODEL_PRICES if model.startswith(name)), key=len, default=None)
+    return MODEL_PRICES[family] if family else DEFAULT_PRICE
+
+CHARS_PER_TOKEN = 4  # rough estimate for English text, good enough for sizing requests
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class LLMError(Exception):
+    pass
+
+
+@dataclass
+class LLMResult:
+    text: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    # the model we asked for: the response may name a dated snapshot, pricing by the requested
+    # model keeps the settled cost on the same price as the budget reservation
+    requested_model: Optional[str] = None
+
+    @property
+    def cost(self) -> float:
+        input_price, output_price = model_price(self.requested_model or self.model)
+        return self.input_tokens / 1000 * input_price + self.output_tokens / 1000 * output_price
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_cost(model: str, prompt: str, max_tokens: int) -> float:
+    """Upper bound for a call, used to reserve budget before making it"""
+    return LLMResult("", model, estimate_tokens(prompt), max_tokens).cost
+
+
+class LLMProvider(ABC):
+    name = ""
+    upstream = ""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        self.usage = {"requests": 0, "retries": 0, "failures": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+
+    @property
+    @abstractmethod
+    def available(self) -> bool:
+        ...
+
+    @abstractmethod
+    def _build_request(self, prompt: str, max_tokens: int, system: Optional[str]) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """(path, headers, json body)"""
+
+    @abstractmethod
+    def _parse_response(self, data: Dict[str, Any]) -> LLMResult:
+        """LLMResult from a decoded 200 response, may raise KeyError / TypeError / ValueError on a malformed one"""
+
+    def fit_prompt(self, prompt: str, max_tokens: int) -> Tuple[str, int]:
+        """Trim the prompt and completion budget so both fit in max_tokens_per_request"""
+        limit = settings.max_tokens_per_request
+        max_tokens = min(max_tokens, limit // 2)
+        available_chars = (limit - max_tokens) * CHARS_PER_TOKEN
+        if len(prompt) > available_chars:
+            prompt = prompt[:available_chars]
+        return prompt, max_tokens
+
+    async def complete(self, prompt: str, max_tokens: int = 300, system: Optional[str] = None) -> LLMResult:
+        prompt, max_tokens = self.fit_prompt(prompt, max_tokens)
+        path, headers, body = self._build_request(prompt, max_tokens, system)
+        async with self._semaphore:
+            data = await self._post_with_retries(path, headers, body)
+        try:
+            result = self._parse_response(data)
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            # a 200 with an unexpected body is a failed call like any other, callers only handle LLMError
+            self.usage["failures"] += 1
+            raise LLMError(f"{self.name} returned an unexpected response: {e!r}") from e
+        self.usage["requests"] += 1
+        self.usage["input_tokens"] += result.input_tokens
+        self.usage["output_tokens"] += result.output_tokens
+        self.usage["cost"] += result.cost
+        return result
+
+    async def complete_batch(self, prompts: List[str], max_tokens: int = 300,
+                             system: Optional[str] = None) -> List[Optional[LLMResult]]:
+        """Complete many prompts concurrently, failed ones come back as None"""
+        async def one(prompt: str) -> Optional[LLMResult]:
+            try:
+                return await self.complete(prompt, max_tokens, system)
+            except LLMError as e:
+                logger.warning(f"{self.name} completion failed: {e}")
+                return None
+        return list(await asyncio.gather(*(one(prompt) for prompt in prompts)))
+
+    async def _post_with_retries(self, path: str, headers: Dict[str, str], body: Dict[str, Any]) -> Dict[str, Any]:
+        client = upstream_clients.get(self.upstream)
+        for attempt in range(settings.llm_max_retries + 1):
+            retry_after = None
+            try:
+                response = await client.post(path, headers=headers, json=body)
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError as e:
+                        self.usage["failures"] += 1
+                        raise LLMError(f"{self.name} returned invalid JSON: {response.text[:200]}") from e
+                if response.status_code not in RETRY_STATUS_CODES:
+                    self.usage["failures"] += 1
+                    raise LLMError(f"{self.name} returned {response.status_code}: {response.text[:200]}")
+                error = f"HTTP {response.status_code}"
+                retry_after = _retry_after_seconds(response)
+            except httpx.TransportError as e:  # timeouts, connection resets
+                error = repr(e)
+
+            if attempt == settings.llm_max_retries:
+                self.usage["failures"] += 1
+                raise LLMError(f"{self.name} failed after {attempt + 1} attempts: {error}")
+            self.usage["retries"] += 1
+            # full jitter: sleep a random amount up to the exponential backoff, spreads out retry storms
+            delay = random.uniform(0, settings.llm_retry_base_delay * 2 ** attempt)
+            await asyncio.sleep(max(delay, retry_after or 0))
+        raise LLMError(f"{self.name} failed")  # unreachable, keeps type checkers happy
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    upstream = "openai"
+
+    @property
+    def available(self) -> bool:
+        return bool(settings.openai_api_key)
+
+    def _build_request(self, prompt, max_tokens, system):
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        headers = {"Authorization": f"Bearer {settings.openai_api_key}"}
+        return "/chat/completions", headers, {"model": self.model, "messages": messages, "max_tokens": max_tokens}
+
+    def _parse_response(self, data):
+        usage = data.get("usage", {})
+        return LLMResult(
+            text=data["choices"][0]["message"]["content"],
+            model=data.get("model", self.model),
+            requested_model=self.model,
+            input_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0),
+        )
+
+
+class AnthropicProvider(LLMProvider):
+    name = "anthropic"
+    upstream = "anthropic"
+
+    @property
+    def available(self) -> bool:
+        return bool(settings.anthropic_api_key)
+
+    def _build_request(self, prompt, max_tokens, system):
+        headers = {"x-api-key": settings.anthropic_api_key, "anthropic-version": "2023-06-01"}
+        body = {"model": self.model, "max_tokens": max_tokens, "messages": [{"role": "user", "content": prompt}]}
+        if system:
+            body["system"] = system
+        return "/messages", headers, body
+
+    def _parse_response(self, data):
+        usage = data.get("usage", {})
+        return LLMResult(
+            text="".join(block.get("text", "") for block in data.get("content", []) if block.get("type") == "text"),
+            model=data.get("model", self.model),
+            requested_model=self.model,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+        )
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+# Global instances, one per provider
+llm_providers: Dict[str, LLMProvider] = {
+    "openai": OpenAIProvider(settings.openai_model_basic),
+    "anthropic": AnthropicProvider(settings.anthropic_model),
+}
+
+
+def get_llm_provider(name: str) -> LLMProvider:
+    return llm_providers[name]
@@ -0,0 +1,277 @@
+"""
+NewsAPI integration: find recent articles about a country and run them through the AI service
+(app/services/hybrid_smart_service.py: the free tier, upgraded to premium APIs where configured)
+"""
+import asyncio
+import logging
+import httpx
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from app.core.cache import cache_manager
+from app.core.config import settings
+from app.core.http_client import upstream_clients
+from app.core.rate_limiter import UpstreamLimitExceeded, upstream_limits
+from app.core.singleflight import single_flight
+from app.services.analysis_cache import content_hash
+from app.services.article_store import article_store
+from app.services.country_service import country_service
+from app.services.embedding_service import embedding_service
+from app.services.hybrid_smart_service import hybrid_smart_service
+
+logger = logging.getLogger(__name__)
+
+class NewsService:
+    async def get_country_news(self, country_name: str, country_code: str) -> Dict[str, Any]:
+        """Get processed news for a country, served stale-while-revalidate from the cache
+        (kept warm by the ingestion scheduler)"""
+        key = self.cache_key(country_code)
+        # concurrent misses for the same country share one NewsAPI fetch
+        return await cache_manager.get_or_refresh(key, lambda: single_flight.do(
+            f"news:{country_code.upper()}",
+            lambda: self.load_or_refresh_country_news(country_name, country_code),
+            recheck=lambda: cache_manager.get_fresh(key)
+        ))
+    
+    async def load_or_refresh_country_news(self, country_name: str, country_code: str) -> Dict[str, Any]:
+        """Serve from news_articles when the stored articles are recent, otherwise go to NewsAPI
+        (and fall back to whatever is stored if NewsAPI comes back empty)"""
+        stored = await article_store.load(country_code, limit=self.ARTICLES_PER_COUNTRY)
+        if stored and not stored.is_stale:
+            news_data = {"articles": stored.articles}
+            await cache_manager.set_fresh(self.cache_key(country_code), news_data, soft_ttl=settings.news_cache_ttl_minutes * 60)
+            return news_data
+        
+        news_data = await self.refresh_country_news(country_name, country_code)
+        if not news_data.get("articles") and stored:
+            logger.info(f"Serving stored articles for {country_code}: {news_data.get('message')}")
+            return {"articles": stored.articles}
+        return news_data
+    
+    async def refresh_country_news(self, country_name: str, country_code: str) -> Dict[str, Any]:
+        """Fetch news from NewsAPI, persist it to news_articles (embeddings follow in the background)
+        and store it in the cache (only when articles were found)"""
+        news_data = await self.fetch_country_news(country_name, country_code)
+        if news_data.get("articles"):
+            await article_store.upsert(country_code, news_data["articles"])
+            embedding_service.schedule_index(country_code, news_data["articles"])
+            await cache_manager.set_fresh(self.cache_key(country_code), news_data, soft_ttl=settings.news_cache_ttl_minutes * 60)
+        return news_data
+    
+    @staticmethod
+    def cache_key(country_code: str) -> str:
+        return f"intel:news:{country_code.upper()}"
+    
+    ARTICLES_PER_COUNTRY = 3
+    
+    async def fetch_country_news(self, country_name: str, country_code: str) -> Dict[str, Any]:
+        """Fetch and process news data with enhanced error handling"""
+        
+        try:
+            # Alternative names tried alongside the country name for better NewsAPI coverage
+            aliases = country_service.get_aliases(country_code)
+            # Search terms for better coverage, sent to NewsAPI as one OR query
+            search_terms = [country_name, f'"{country_name}"'] + aliases  # plain, exact match, aliases
+            
+            best_articles = await self._search_all_terms(country_name, search_terms, aliases)
+            if best_articles is None:
+                logger.warning(f"NewsAPI rate limited for {country_name}")
+                return {"articles": [], "message": "News API rate limited or daily quota spent - try again later"}
+            
+            if not best_articles:
+                return {
+                    "articles": [], 
+                    "message": f"No recent news found for {country_name}. This could be due to limited English-language coverage or recent API restrictions."
+                }
+            
+            # Process articles with AI, the whole batch in one call (worker pool, batched model inference)
+            candidates = []
+            for article in best_articles:
+                content = article['content'] or article.get('description', '')
+                if len(content) > 50:
+                    candidates.append(article)
+            
+            batch = [
+                {"content": article['content'] or article.get('description', ''), "source": article['source']['name']}
+                for article in candidates
+            ]
+            analyses = await hybrid_smart_service.analyze_articles(batch, country_code)
+            
+            processed_articles = []
+            
+            for article, item, analysis in zip(candidates, batch, analyses):
+                try:
+                    ai_summary = analysis['summary']
+                    sentiment = analysis['sentiment']
+                    bias_analysis = analysis['bias']
+                    
+                    processed_article = {
+                        "title": article['title'],
+                        "source": article['source']['name'],
+                        "published_at": article['publishedAt'],
+                        "url": article['url'],
+                        "description": article.get('description', ''),
+                        "ai_analysis": {
+                            "summary_tweet": ai_summary.get('tweet', ''),
+                            "summary_bullets": ai_summary.get('bullets', []),
+                            "sentiment": {
+                                "label": sentiment.get('label', 'neutral'),
+                                "score": sentiment.get('compound', 0)
+                            },
+                            "bias": {
+                                "label": bias_analysis.get('bias_label', 'neutral'),
+                                "credibility": bias_analysis.get('credibility_score', 0.5)
+                            },
+                            # links the stored article row to its cached analysis (app/services/analysis_cache.py)
+                            "content_hash": content_hash(item['content'], item['source']),
+                            "version": analysis["version"]
+                        }
+                    }
+                    
+                    processed_articles.append(processed_article)
+                    
+                except Exception as e:
+                    logger.error(f"Error processing article for {country_name}: {e}")
+                    continue
+            
+            return {"articles": processed_articles}
+            
+        except Exception as e:
+            logger.error(f"News processing failed for {country_name}: {e}")
+            return {"articles": [], "message": f"News processing failed: {str(e)}"}
+
+    async def _search_all_terms(self, country_name: str, search_terms: List[str], aliases: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Search NewsAPI for all terms at once and keep the first relevant articles, deduped by URL
+        
+        The terms are OR-ed into as few queries as NewsAPI accepts (normally one), so a country
+        view costs one request of the daily quota instead of one per term. If several queries are
+        needed they run concurrently, and once the queries answered so far (without gaps) yield
+        enough articles, the remaining requests are cancelled.
+        A rate-limited query counts as empty; returns None only if every query was rate limited.
+        """
+        from_date = datetime.now().replace(day=1).strftime('%Y-%m-%d')  # Last month
+        tasks = [asyncio.create_task(self._search_term(query, from_date)) for query in self._build_queries(search_terms)]
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        limited = 0
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    articles = task.result()
+                    if articles is None:
+                        limited += 1
+                        articles = []
+                    results[tasks.index(task)] = articles
+                
+                best_articles = self._pick_articles(country_name, aliases, results, len(tasks))
+                if len(best_articles) >= self.ARTICLES_PER_COUNTRY:
+                    return best_articles
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        if limited == len(tasks):
+            return None
+        return self._pick_articles(country_name, aliases, results, len(tasks))
+    
+    # NewsAPI rejects longer q parameters
+    MAX_QUERY_LENGTH = 500
+    
+    @classmethod
+    def _build_queries(cls, search_terms: List[str]) -> List[str]:
+        """Search terms OR-ed together, split only where a query would exceed MAX_QUERY_LENGTH"""
+        queries, current = [], []
+        for term in dict.fromkeys(search_terms):
+            # keep a multi-word name's words together: (United States) OR "United States" OR USA
+            part = f"({term})" if " " in term and not term.startswith('"') else term
+            if current and len(" OR ".join(current + [part])) > cls.MAX_QUERY_LENGTH:
+                queries.append(" OR ".join(current))
+                current = []
+            current.append(part)
+        if current:
+            queries.append(" OR ".join(current))
+        return queries
+    
+    async def _search_term(self, query: str, from_date: str) -> Optional[List[Dict[str, Any]]]:
+        """Raw NewsAPI articles for one query ([] on errors, None when rate limited)"""
+        try:
+            # shared rate limit / daily quota: refused here without spending a NewsAPI request
+            await upstream_limits.acquire("news")
+        except UpstreamLimitExceeded as e:
+            logger.info(f"Skipping NewsAPI search for {query}: {e}")
+            return None
+        
+        try:
+            client = upstream_clients.get("news")
+            response = await client.get(
+                "/everything",
+                params={
+                    'q': query,
+                    'sortBy': 'publishedAt',
+                    'language': 'en',
+                    'pageSize': 20,  # every term in one query, get more to filter better ones
+                    'apiKey': settings.news_api_key,
+                    'from': from_date,
+                }
+            )
+            
+            if response.status_code == 429:  # Rate limited, every worker backs off
+                await upstream_limits.get("news").report_limited(response.headers.get("retry-after"))
+                return None
+            
+            if response.status_code != 200:
+                logger.warning(f"NewsAPI error {response.status_code} for {query}")
+                return []
+            
+            return response.json().get('articles', [])
+        
+        except httpx.TimeoutException:
+            logger.warning(f"Timeout fetching news for {query}")
+            return []
+        except Exception as e:
+            logger.error(f"Error fetching news for {query}: {e}")
+            return []
+    
+    def _pick_articles(self, country_name: str, aliases: List[str],
+                       results: Dict[int, List[Dict[str, Any]]], term_count: int) -> List[Dict[str, Any]]:
+        """Relevant articles from the terms answered so far, stopping at the first term still in flight"""
+        best_articles = []
+        seen_urls = set()
+        for index in range(term_count):
+            if index not in results:
+                break
+            for article in results[index]:
+                if len(best_articles) >= self.ARTICLES_PER_COUNTRY:
+                    return best_articles
+                
+                # the same story usually comes back for several terms
+                if article.get('url') in seen_urls:
+                    continue
+                
+                # Skip articles without content
+                if (not article.get('content') or 
+                    article['content'] in ['[Removed]', None] or
+                    len(article.get('content', '')) < 100):
+                    continue
+                
+                # Skip articles that don't seem relevant
+                title_lower = (article.get('title') or '').lower()
+                desc_lower = (article.get('description') or '').lower()
+                
+                # Check if article is actually about the country
+                country_mentioned = (
+                    country_name.lower() in title_lower or
+                    country_name.lower() in desc_lower or
+                    any(alias.lower() in title_lower or alias.lower() in desc_lower 
+                        for alias in aliases)
+                )
+                
+                if not country_mentioned:
+                    continue
+                
+                seen_urls.add(article.get('url'))
+                best_articles.append(article)
+        return best_articles
+
+# Global instance
+news_service = NewsService()
@@ -0,0 +1,151 @@
+"""
+Pluggable sentiment backends for SimpleAIService (app/services/hybrid_ai_service.py)
+
+    keyword      - lexicon counts from app/data/lexicons/sentiment.json, no dependencies
+    vader        - NLTK's VADER lexicon (nltk.download('vader_lexicon'), see scripts/download_models_working.py)
+    transformer  - a Hugging Face sentiment model (Settings.ai_sentiment_model), batched forward passes
+
+Settings.ai_sentiment_backend picks one by name. The default is keyword scoring, so VADER and
+the transformer change labels and scores only where a deployment opts in. Backends are loaded once, in the app lifespan, and scored on SimpleAIService's worker pool,
+so score_batch is plain blocking code. If a backend can't load, the keyword backend is used.
+Other backends can be added with register_sentiment_backend().
+"""
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+
+from app.core.config import settings
+from app.services.keyword_scorer import KeywordScorer
+
+logger = logging.getLogger(__name__)
+
+
+class SentimentBackend(ABC):
+    name = ""
+
+    def load(self):
+        """Load models / lexicons, raise if the backend can't be used"""
+
+    @property
+    def version(self) -> str:
+        """Identifies the scoring behaviour, part of the analysis cache key"""
+        return self.name
+
+    @abstractmethod
+    def score_batch(self, texts: List[str], keyword_counts: Optional[List[Dict[str, int]]] = None) -> List[Dict[str, float]]:
+        """[{"label": positive|negative|neutral, "compound": -1..1}] in input order
+
+        keyword_counts are KeywordScorer counts the caller already has for these texts, if any
+        """
+
+
+class KeywordSentimentBackend(SentimentBackend):
+    name = "keyword"
+
+    def __init__(self):
+        self.scorer: Optional[KeywordScorer] = None
+
+    def load(self):
+        self.scorer = KeywordScorer.from_file("sentiment")
+
+    def score_batch(self, texts, keyword_counts=None):
+        counts = keyword_counts or [self.scorer.count(text) for text in texts]
+        return [self._score(text_counts['positive'], text_counts['negative']) for text_counts in counts]
+
+    @staticmethod
+    def _score(pos_count: int, neg_count: int) -> Dict[str, float]:
+        if pos_count > neg_count:
+            label = 'positive'
+            score = 0.6 + (pos_count * 0.1)
+        elif neg_count > pos_count:
+            label = 'negative' 
+            score = -(0.6 + (neg_count * 0.1))
+        else:
+            label = 'neutral'
+            score = 0.0
+        
+        return {
+            "label": label,
+            "compound": max(-1.0, min(1.0, score))  # Keep between -1 and 1
+        }
+
+
+class VaderSentimentBackend(SentimentBackend):
+    name = "vader"
+
+    def __init__(self):
+        self.analyzer = None
+
+    def load(self):
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer  # raises LookupError without vader_lexicon
+        self.analyzer = SentimentIntensityAnalyzer()
+
+    def score_batch(self, texts, keyword_counts=None):
+        results = []
+        for text in texts:
+            compound = self.analyzer.polarity_scores(text)['compound']
+            # VADER's recommended thresholds
+            label = 'positive' if compound >= 0.05 else 'negative' if compound <= -0.05 else 'neutral'
+            results.append({"label": label, "compound": compound})
+        return results
+
+
+class TransformerSentimentBackend(SentimentBackend):
+    name = "transformer"
+
+    def __init__(self):
+        self.pipeline = None
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{settings.ai_sentiment_model}"
+
+    def load(self):
+        from transformers import pipeline  # heavy import, only when this backend is selected
+        self.pipeline = pipeline("sentiment-analysis", model=settings.ai_sentiment_model, device=-1)
+
+    def score_batch(self, texts, keyword_counts=None):
+        # one batched forward pass over every text
+        predictions = self.pipeline(texts, batch_size=settings.ai_batch_size, truncation=True)
+        results = []
+        for prediction in predictions:
+            label = prediction["label"].lower()
+            score = float(prediction["score"])
+            if label.startswith("neg"):
+                results.append({"label": "negative", "compound": -score})
+            elif label.startswith("pos"):
+                results.append({"label": "positive", "compound": score})
+            else:
+                results.append({"label": "neutral", "compound": 0.0})
+        return results
+
+
+SENTIMENT_BACKENDS: Dict[str, Type[SentimentBackend]] = {
+    "keyword": KeywordSentimentBackend,
+    "vader": VaderSentimentBackend,
+    "transformer": TransformerSentimentBackend,
+}
+
+def register_sentiment_backend(name: str, backend: Type[SentimentBackend]):
+    SENTIMENT_BACKENDS[name] = backend
+
+
+def load_sentiment_backend(name: str) -> SentimentBackend:
+    """Create and load the backend for Settings.ai_sentiment_backend, falling back to keywords (blocking, call off the event loop)"""
+    backend_class = SENTIMENT_BACKENDS.get(name)
+    if backend_class is None:
+        logger.warning(f"Unknown sentiment backend '{name}', using keyword scoring")
+        backend_class = KeywordSentimentBackend
+
+    backend = backend_class()
+    try:
+        backend.load()
+        logger.info(f"Sentiment backend ready: {backend.version}")
+        return backend
+    except Exception as e:
+        if backend_class is KeywordSentimentBackend:
+            raise
+        logger.error(f"Could not load {name} sentiment backend, using keyword scoring: {e}")
+    backend = KeywordSentimentBackend()
+    backend.load()
+    return backend
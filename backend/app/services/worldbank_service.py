@@ -1,74 +1,229 @@
 """
 World Bank API integration for economic indicators
 """
-import httpx
 import asyncio
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Set
+from app.core.cache import cache_manager
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.config import settings
+from app.core.http_client import upstream_clients
+from app.core.rate_limiter import UpstreamLimitExceeded, upstream_limits
+from app.core.throttle import background_priority
+from app.core.singleflight import single_flight
 from app.services.country_service import country_service
+from app.services.indicator_store import indicator_store
 
 class WorldBankService:
+    # Key indicators we want to fetch
+    INDICATORS = {
+        'GDP': 'NY.GDP.MKTP.CD',  # GDP (current US$)
+        'GDP_PER_CAPITA': 'NY.GDP.PCAP.CD',  # GDP per capita
+        'INFLATION': 'FP.CPI.TOTL.ZG',  # Inflation rate
+        'UNEMPLOYMENT': 'SL.UEM.TOTL.ZS',  # Unemployment rate
+        'POPULATION': 'SP.POP.TOTL',  # Total population
+        'INTERNET_USERS': 'IT.NET.USER.ZS',  # Internet users (% of population)
+        'LIFE_EXPECTANCY': 'SP.DYN.LE00.IN',  # Life expectancy
+        'TRADE_BALANCE': 'NE.RSB.GNFS.CD'  # Trade balance
+    }
+    
+    # World Development Indicators; the v2 API needs a source to combine indicators with ';'
+    SOURCE_ID = '2'
+    DATE_RANGE = '2020:2023'  # Expand date range for better coverage
+    PER_PAGE = 1000
+    # keeps the country list in the URL path a sane length
+    MAX_COUNTRIES_PER_CALL = 50
+    # how the API answers a query with an unknown country or indicator code (besides a 200 with an error message)
+    REJECTED_STATUS_CODES = {400, 404}
+    
     def __init__(self):
-        self.base_url = "https://api.worldbank.org/v2"
+        # countries with a background refresh in flight, and the tasks themselves so they aren't garbage collected
+        self._refreshing: Set[str] = set()
+        self._background_tasks: Set[asyncio.Task] = set()
     
     async def get_country_indicators(self, country_code: str) -> Dict[str, Any]:
-        """Get key economic indicators for a country"""
+        """Get key economic indicators for a country, served stale-while-revalidate from the cache"""
+        code = country_code.upper()
+        return await cache_manager.get_or_refresh(self.cache_key(code), lambda: self.refresh_cached_indicators([code]))
+    
+    async def refresh_cached_indicators(self, country_codes: List[str]) -> Dict[str, Any]:
+        """Load indicators through the store and write them to the cache, returns the first country's"""
+        results = await self.get_indicators_for_countries(country_codes)
+        await self.cache_indicators(results)
+        return results.get(country_codes[0].upper(), {}) if country_codes else {}
+    
+    async def cache_indicators(self, results: Dict[str, Dict[str, Any]]):
+        for code, indicators in results.items():
+            if indicators:
+                await cache_manager.set_fresh(self.cache_key(code), indicators, soft_ttl=settings.worldbank_cache_ttl_days * 86400)
+    
+    @staticmethod
+    def cache_key(country_code: str) -> str:
+        return f"intel:economic:{country_code.upper()}"
+    
+    async def get_indicators_for_countries(self, country_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get key economic indicators for many countries, read through the Postgres indicator store
         
-        wb_code = country_service.get_wb_code(country_code)
-        if not wb_code:
-            return {}
+        Stored countries are served straight from the economic_indicators table (stale ones are
+        refreshed in the background), only countries the store has never seen hit the World Bank.
+        """
+        codes = [code.upper() for code in country_codes]
+        stored = await indicator_store.load(codes)
         
-        # Key indicators we want to fetch
-        indicators = {
-            'GDP': 'NY.GDP.MKTP.CD',  # GDP (current US$)
-            'GDP_PER_CAPITA': 'NY.GDP.PCAP.CD',  # GDP per capita
-            'INFLATION': 'FP.CPI.TOTL.ZG',  # Inflation rate
-            'UNEMPLOYMENT': 'SL.UEM.TOTL.ZS',  # Unemployment rate
-            'POPULATION': 'SP.POP.TOTL',  # Total population
-            'INTERNET_USERS': 'IT.NET.USER.ZS',  # Internet users (% of population)
-            'LIFE_EXPECTANCY': 'SP.DYN.LE00.IN',  # Life expectancy
-            'TRADE_BALANCE': 'NE.RSB.GNFS.CD'  # Trade balance
-        }
+        results = {code: stored[code].indicators for code in codes if code in stored}
+        stale = [code for code in results if stored[code].is_stale]
+        if stale:
+            self._schedule_refresh(stale)
         
-        results = {}
+        missing = [code for code in codes if code not in results]
+        if missing:
+            # concurrent cold requests for the same countries share one World Bank fetch
+            fetched = await single_flight.do(
+                f"worldbank:{','.join(sorted(missing))}",
+                lambda: self._fetch_and_store(missing)
+            )
+            results.update(fetched)
         
-        try:
-            async with httpx.AsyncClient() as client:
-                # Fetch each indicator
-                for name, indicator_code in indicators.items():
-                    try:
-                        response = await client.get(
-                            f"{self.base_url}/country/{wb_code}/indicator/{indicator_code}",
-                            params={
-                                'format': 'json',
-                                'date': '2020:2023',  # Expand date range for better coverage
-                                'per_page': '10'
-                            },
-                            timeout=15
-                        )
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            if len(data) > 1 and data[1]:  # World Bank returns [metadata, data]
-                                # Get most recent non-null value
-                                for entry in data[1]:
-                                    if entry['value'] is not None:
-                                        results[name] = {
-                                            'value': entry['value'],
-                                            'year': entry['date'],
-                                            'indicator': indicator_code
-                                        }
-                                        break
-                        
-                    except Exception as e:
-                        print(f"Error fetching {name} for {country_code}: {e}")
-                        continue
-            
+        return results
+    
+    async def _fetch_and_store(self, country_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        fetched = await self.fetch_indicators_from_api(country_codes)
+        self._run_in_background(indicator_store.upsert(fetched))
+        return fetched
+    
+    def _schedule_refresh(self, country_codes: List[str]):
+        """Refresh stale countries from the World Bank without blocking the caller"""
+        codes = [code for code in country_codes if code not in self._refreshing]
+        if not codes:
+            return
+        self._refreshing.update(codes)
+        
+        async def refresh():
+            try:
+                with background_priority():
+                    fetched = await self.fetch_indicators_from_api(codes)
+                await indicator_store.upsert(fetched)
+            finally:
+                self._refreshing.difference_update(codes)
+        
+        self._run_in_background(refresh())
+    
+    def _run_in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def fetch_indicators_from_api(self, country_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get key economic indicators for many countries in as few World Bank calls as possible
+        
+        All indicators (and up to MAX_COUNTRIES_PER_CALL countries) go into a single
+        `/country/US;FR/indicator/A;B` request, extra pages are fetched concurrently.
+        Returns {country_code: {indicator_name: {value, year, indicator}}}
+        """
+        # map World Bank 2-letter codes back to the codes our callers use
+        wb_to_code = {}
+        for code in country_codes:
+            wb_code = country_service.get_wb_code(code)
+            if wb_code:
+                wb_to_code[wb_code] = code.upper()
+        
+        results: Dict[str, Dict[str, Any]] = {code: {} for code in wb_to_code.values()}
+        if not wb_to_code:
             return results
-            
+        
+        wb_codes = list(wb_to_code)
+        chunks = [
+            wb_codes[i:i + self.MAX_COUNTRIES_PER_CALL]
+            for i in range(0, len(wb_codes), self.MAX_COUNTRIES_PER_CALL)
+        ]
+        chunk_entries = await asyncio.gather(*(self._fetch_indicator_entries(chunk) for chunk in chunks))
+        
+        code_to_name = {code: name for name, code in self.INDICATORS.items()}
+        for entries in chunk_entries:
+            for entry in entries:
+                if entry.get('value') is None:
+                    continue
+                country_code = wb_to_code.get((entry.get('country') or {}).get('id'))
+                name = code_to_name.get((entry.get('indicator') or {}).get('id'))
+                if not country_code or not name:
+                    continue
+                # keep the most recent non-null value per indicator
+                current = results[country_code].get(name)
+                if current is None or entry['date'] > current['year']:
+                    results[country_code][name] = {
+                        'value': entry['value'],
+                        'year': entry['date'],
+                        'indicator': self.INDICATORS[name]
+                    }
+        
+        return results
+    
+    async def _fetch_indicator_entries(self, wb_codes: List[str]) -> List[Dict[str, Any]]:
+        """Fetch every indicator for a group of countries, following pagination"""
+        client = upstream_clients.get("worldbank")
+        path = f"/country/{';'.join(wb_codes)}/indicator/{';'.join(self.INDICATORS.values())}"
+        params = {
+            'format': 'json',
+            'source': self.SOURCE_ID,
+            'date': self.DATE_RANGE,
+            'per_page': str(self.PER_PAGE)
+        }
+        
+        try:
+            first_page = await self._get_page(client, path, params, 1)
+        except (UpstreamLimitExceeded, CircuitOpenError) as e:
+            # splitting the batch would only make more calls that get refused
+            print(f"World Bank API limited for {', '.join(wb_codes)}: {e}")
+            return []
         except Exception as e:
-            print(f"World Bank API error for {country_code}: {e}")
-            return {}
+            # timeouts, connection errors, 5xx: the API is having trouble, not our codes,
+            # and splitting would turn one failing call into ~2N of them
+            print(f"World Bank API error for {', '.join(wb_codes)}: {e}")
+            return []
+        
+        if first_page is None:
+            # One unknown code makes the API reject the whole batch, so split and retry
+            if len(wb_codes) > 1:
+                middle = len(wb_codes) // 2
+                halves = await asyncio.gather(
+                    self._fetch_indicator_entries(wb_codes[:middle]),
+                    self._fetch_indicator_entries(wb_codes[middle:])
+                )
+                return halves[0] + halves[1]
+            return []
+        
+        metadata, entries = first_page
+        pages = int(metadata.get('pages') or 1)
+        if pages > 1:
+            rest = await asyncio.gather(
+                *(self._get_page(client, path, params, page) for page in range(2, pages + 1)),
+                return_exceptions=True
+            )
+            for page in rest:
+                if isinstance(page, Exception) or page is None:
+                    print(f"World Bank API page error for {', '.join(wb_codes)}: {page}")
+                    continue
+                entries.extend(page[1])
+        
+        return entries
+    
+    async def _get_page(self, client, path: str, params: Dict[str, str], page: int):
+        """Fetch one page, returns (metadata, entries) or None if the API rejected the query
+        (raises UpstreamLimitExceeded when rate limited, httpx errors on timeouts and 5xx)"""
+        await upstream_limits.acquire("worldbank")
+        response = await client.get(path, params={**params, 'page': str(page)})
+        if response.status_code == 429:
+            limiter = upstream_limits.get("worldbank")
+            await limiter.report_limited(response.headers.get("retry-after"))
+            limiter.check()
+        if response.status_code in self.REJECTED_STATUS_CODES:
+            return None
+        response.raise_for_status()  # anything else that isn't a 200 is an outage, not a bad code
+        
+        data = response.json()
+        # World Bank returns [metadata, data], or [{"message": [...]}] on errors
+        if not isinstance(data, list) or len(data) < 2 or 'message' in data[0]:
+            return None
+        return data[0], data[1] or []
     
     async def get_basic_country_info(self, country_code: str) -> Dict[str, Any]:
         """Get basic country information"""
@@ -78,27 +233,27 @@ class WorldBankService:
             return {}
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/country/{wb_code}",
-                    params={'format': 'json'},
-                    timeout=15
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if len(data) > 1 and data[1]:
-                        country_info = data[1][0]
-                        return {
-                            'name': country_info.get('name'),
-                            'capital': country_info.get('capitalCity'),
-                            'region': country_info.get('region', {}).get('value'),
-                            'income_level': country_info.get('incomeLevel', {}).get('value'),
-                            'lending_type': country_info.get('lendingType', {}).get('value'),
-                            'longitude': country_info.get('longitude'),
-                            'latitude': country_info.get('latitude')
-                        }
-        
+            await upstream_limits.acquire("worldbank")
+            client = upstream_clients.get("worldbank")
+            response = await client.get(
+                f"/country/{wb_code}",
+                params={'format': 'json'}
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                if len(data) > 1 and data[1]:
+                    country_info = data[1][0]
+                    return {
+                        'name': country_info.get('name'),
+                        'capital': country_info.get('capitalCity'),
+                        'region': country_info.get('region', {}).get('value'),
+                        'income_level': country_info.get('incomeLevel', {}).get('value'),
+                        'lending_type': country_info.get('lendingType', {}).get('value'),
+                        'longitude': country_info.get('longitude'),
+                        'latitude': country_info.get('latitude')
+                    }
+    
         except Exception as e:
             print(f"Country info error for {country_code}: {e}")
             return {}
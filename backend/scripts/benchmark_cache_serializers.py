@@ -0,0 +1,114 @@
+"""
+Benchmark: cache serializer codecs and compression on realistic intelligence payloads
+
+Builds payloads shaped like what the cache actually holds (processed article lists,
+economic indicators, FX rates, SWR envelopes) and reports encode / decode time and the
+bytes stored in Redis for every installed codec x compression combination.
+Usage: python scripts/benchmark_cache_serializers.py [--articles 20] [--iterations 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.serializers import CacheSerializer, _codecs, _compressors
+
+SAMPLE_TEXT = (
+    "The central bank held interest rates steady on Thursday as inflation eased for a third "
+    "consecutive month, while officials signalled that further cuts would depend on wage growth "
+    "and energy prices through the winter. Analysts said the decision supports a soft landing. "
+)
+
+
+def build_news_payload(article_count: int) -> dict:
+    now = datetime.now()
+    articles = []
+    for i in range(article_count):
+        content = SAMPLE_TEXT * 4
+        articles.append({
+            "id": uuid.uuid4(),
+            "title": f"Central bank holds rates as inflation eases ({i})",
+            "source": "Reuters",
+            "published_at": now - timedelta(hours=i),
+            "url": f"https://example.com/world/article-{i}",
+            "description": SAMPLE_TEXT,
+            "ai_analysis": {
+                "summary_tweet": " ".join(content.split()[:10]) + "...",
+                "summary_bullets": [f"• {SAMPLE_TEXT[:120]}..."] * 3,
+                "sentiment": {"label": "positive", "score": Decimal("0.70")},
+                "bias": {"label": "neutral", "credibility": Decimal("0.90")},
+            },
+        })
+    return {"swr_value": {"articles": articles}, "fresh_until": time.time() + 1800}
+
+
+def build_economic_payload() -> dict:
+    indicators = {
+        name: {"value": Decimal("25462700000000.123456"), "year": "2022", "indicator": code}
+        for name, code in (
+            ("GDP", "NY.GDP.MKTP.CD"), ("GDP_PER_CAPITA", "NY.GDP.PCAP.CD"),
+            ("INFLATION", "FP.CPI.TOTL.ZG"), ("UNEMPLOYMENT", "SL.UEM.TOTL.ZS"),
+            ("POPULATION", "SP.POP.TOTL"), ("INTERNET_USERS", "IT.NET.USER.ZS"),
+            ("LIFE_EXPECTANCY", "SP.DYN.LE00.IN"), ("TRADE_BALANCE", "NE.RSB.GNFS.CD"),
+        )
+    }
+    return {"swr_value": indicators, "fresh_until": time.time() + 86400}
+
+
+def build_currency_payload() -> dict:
+    rates = {"USD": 1.0842, "EUR": 1.0, "GBP": 0.8571, "JPY": 162.31, "CNY": 7.8412}
+    return {
+        "swr_value": {"base_currency": "EUR", "usd_rate": 1.0842, "eur_rate": 1.0,
+                      "last_updated": datetime.now().date(), "rates": rates},
+        "fresh_until": time.time() + 3600,
+    }
+
+
+def measure(serializer: CacheSerializer, payload, iterations: int):
+    data = serializer.dumps(payload)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.dumps(payload)
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.loads(data)
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+    return encode_us, decode_us, len(data)
+
+
+def main(article_count: int, iterations: int):
+    payloads = {
+        f"news ({article_count} articles)": build_news_payload(article_count),
+        "economic indicators": build_economic_payload(),
+        "currency rates": build_currency_payload(),
+    }
+    # baseline: what CacheManager stored before the serializer layer
+    legacy = lambda value: json.dumps(value, default=str)
+
+    for label, payload in payloads.items():
+        legacy_bytes = len(legacy(payload).encode())
+        print(f"\n📦 {label}: legacy json.dumps(default=str) = {legacy_bytes} bytes")
+        print(f"  {'codec':<8} {'compression':<12} {'encode µs':>10} {'decode µs':>10} {'bytes':>8} {'vs legacy':>10}")
+        for codec in _codecs():
+            for compression in _compressors():
+                serializer = CacheSerializer(codec=codec, compression=compression, compression_threshold=0)
+                encode_us, decode_us, size = measure(serializer, payload, iterations)
+                print(
+                    f"  {codec:<8} {compression:<12} {encode_us:10.1f} {decode_us:10.1f} "
+                    f"{size:8d} {size / legacy_bytes:9.0%}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.articles, args.iterations)
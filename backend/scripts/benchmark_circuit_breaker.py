@@ -0,0 +1,109 @@
+"""
+Demo / benchmark: an upstream outage with and without the circuit breaker
+
+Runs a local HTTP server standing in for exchangerate-api and points the pooled "currency"
+client at it. Phase 1 is healthy traffic (--latency-ms), which the adaptive timeout learns
+from; phase 2 the server stops answering (accepts connections, never responds), the way a
+hung upstream looks. Shows how long each failed request takes, with the breaker (timeout
+adapted to the p99, then failing fast once the circuit opens) and with the old fixed timeout
+(--fixed-timeout, default Settings.currency_api_timeout), and a half-open probe closing the
+circuit once the server recovers.
+Usage: python scripts/benchmark_circuit_breaker.py [--latency-ms 80] [--outage-requests 20] [--fixed-timeout 15]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.core.config import settings
+from app.core.http_client import upstream_clients
+
+BODY = b'{"base": "EUR", "date": "2024-01-01", "rates": {"USD": 1.09, "EUR": 1.0, "GBP": 0.86}}'
+
+
+class FlakyServer:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.down = False
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                if self.down:
+                    await asyncio.sleep(3600)  # hung upstream: connection open, no answer
+                await asyncio.sleep(self.latency)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: "
+                             + str(len(BODY)).encode() + b"\r\n\r\n" + BODY)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+async def timed_get(client: httpx.AsyncClient):
+    started = time.perf_counter()
+    try:
+        await client.get("/latest/EUR")
+        outcome = "ok"
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    return time.perf_counter() - started, outcome
+
+
+async def main(latency_ms: float, healthy_requests: int, outage_requests: int, fixed_timeout: float):
+    server = FlakyServer(latency_ms / 1000)
+    tcp = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = tcp.sockets[0].getsockname()[1]
+    settings.currency_api_url = f"http://127.0.0.1:{port}"
+    settings.breaker_open_seconds = 2.0
+    settings.upstream_http2 = False
+    client = upstream_clients.get("currency")
+    breaker = upstream_clients.breakers["currency"]
+
+    print(f"Healthy phase: {healthy_requests} requests at ~{latency_ms:.0f}ms")
+    for _ in range(healthy_requests):
+        await timed_get(client)
+    status = breaker.status()
+    print(f"  p99 {status['p99_latency_seconds']}s -> adaptive timeout {status['timeout_seconds']}s "
+          f"(configured ceiling {breaker.max_timeout}s)\n")
+
+    server.down = True
+    print(f"Outage, with circuit breaker: {outage_requests} requests")
+    durations = []
+    for i in range(outage_requests):
+        duration, outcome = await timed_get(client)
+        durations.append(duration)
+        print(f"  #{i + 1:<3} {duration * 1000:9.1f}ms  {outcome:<18} circuit {breaker.state}")
+    print(f"  total {sum(durations):.2f}s\n")
+
+    plain = upstream_clients._build_client(settings.currency_api_url, fixed_timeout)
+    print(f"Outage, fixed {fixed_timeout:.0f}s timeout and no breaker: 2 requests "
+          f"(projected total for {outage_requests}: {outage_requests * fixed_timeout:.0f}s)")
+    for i in range(2):
+        duration, outcome = await timed_get(plain)
+        print(f"  #{i + 1:<3} {duration * 1000:9.1f}ms  {outcome}")
+    await plain.aclose()
+
+    server.down = False
+    await asyncio.sleep(settings.breaker_open_seconds)
+    duration, outcome = await timed_get(client)
+    print(f"\nRecovered: half-open probe {duration * 1000:.1f}ms {outcome}, circuit {breaker.state}")
+
+    await upstream_clients.close()
+    tcp.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--healthy-requests", type=int, default=50)
+    parser.add_argument("--outage-requests", type=int, default=20)
+    parser.add_argument("--fixed-timeout", type=float, default=settings.currency_api_timeout)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency_ms, args.healthy_requests, args.outage_requests, args.fixed_timeout))
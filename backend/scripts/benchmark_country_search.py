@@ -0,0 +1,91 @@
+"""
+Benchmark: indexed country search vs the old linear substring scan, as the country table grows
+
+The frontend search box queries on every keystroke. The old search_countries lowercased and
+substring-checked every country per query, so latency grew with the table; CountrySearchIndex
+answers prefixes with one dict lookup and only falls back to trigram fuzzy matching for typos.
+The table is padded with synthetic subdivisions / regions to show how both scale.
+Usage: python scripts/benchmark_country_search.py [--sizes 0,2000,20000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.country_service import CountryService
+
+SYLLABLES = ["ka", "lo", "ri", "an", "ten", "mar", "sul", "bo", "vi", "dre", "nor", "es", "ul", "tha", "gro", "pen"]
+REGION_WORDS = ["Province", "Region", "State", "Oblast", "County", "District"]
+
+
+def synthetic_regions(countries, count: int, rng: random.Random):
+    """Subdivision-like entries: a made-up name plus the parent country, e.g. "Marbovi Region, France" """
+    parents = list(countries.values())
+    regions = {}
+    for i in range(count):
+        parent = rng.choice(parents)
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        regions[f"R{i:05d}"] = {
+            'name': f"{name} {rng.choice(REGION_WORDS)}, {parent['name']}",
+            'coords': parent['coords'], 'currency': parent['currency'], 'wb_code': f"X{i:05d}",
+        }
+    return regions
+
+
+def make_queries(countries, count: int, rng: random.Random):
+    """What the search box sends: growing prefixes of names and codes, and names with a typo"""
+    names = [data['name'] for data in countries.values()]
+    typed, typos = [], []
+    for _ in range(count):
+        name = rng.choice(names)
+        typed.append(name[:rng.randint(1, len(name))] if rng.random() < 0.75 else rng.choice(list(countries)))
+        i = rng.randrange(len(name))
+        typos.append(name[:i] + rng.choice("aeiourst") + name[i + 1:])
+    return {"typed": typed, "typos": typos}
+
+
+def linear_search(countries, query: str):
+    """The previous implementation"""
+    query_lower = query.lower()
+    return [
+        {'code': code, 'name': data['name'], 'coords': data['coords']}
+        for code, data in countries.items()
+        if query_lower in data['name'].lower() or query_lower in code.lower()
+    ]
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main(sizes, query_count: int):
+    rng = random.Random(42)
+    base = CountryService().countries
+    # the same queries at every size, drawn from real country names
+    queries = make_queries(base, query_count, rng)
+    print(f"{query_count} queries per kind: typed = name / code prefixes, typos = a name with one wrong letter")
+    print("(the linear scan finds nothing for most typos, the index still returns the country)\n")
+    print(f"{'entries':>8} {'build':>8} {'kind':>6} {'linear us/q':>12} {'index us/q':>11} {'speedup':>8}")
+    for extra in sizes:
+        countries = {**base, **synthetic_regions(base, extra, rng)}
+        start = time.perf_counter()
+        index = CountryService.build_search_index(countries)
+        build = time.perf_counter() - start
+        for kind, kind_queries in queries.items():
+            linear = timed(lambda q: linear_search(countries, q), kind_queries)
+            indexed = timed(lambda q: index.search(q, 10), kind_queries)
+            print(f"{len(countries):>8} {build:>7.2f}s {kind:>6} {linear:>12.1f} {indexed:>11.1f} {linear / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="0,2000,20000", help="synthetic regions added on top of the country table")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    main([int(size) for size in args.sizes.split(",")], args.queries)
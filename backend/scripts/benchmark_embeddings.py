@@ -0,0 +1,78 @@
+"""
+Benchmark: article embedding throughput and related-article search latency
+
+Targets (2 vCPU container, all-MiniLM-L6-v2, no GPU):
+    encoding   >= 100 articles/s at embedding_batch_size=32, so a full news ingestion cycle
+               (~200 countries x 3 articles) embeds in under 10 s of background CPU
+    search     NumPy brute-force fallback p95 < 5 ms up to 10k articles, < 50 ms at 100k;
+               past that, related-article search should go through pgvector's ivfflat index
+The encoding part needs sentence-transformers and the downloaded model (scripts/download_models.py);
+the search part only needs NumPy.
+Usage: python scripts/benchmark_embeddings.py [--articles 256] [--queries 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.embedding_service import SENTENCE_TRANSFORMERS_AVAILABLE, NumpyVectorIndex
+
+SAMPLE_TITLES = [
+    "Central bank holds rates as inflation eases",
+    "Elections set for spring after coalition collapses",
+    "Drought hits wheat harvest, prices climb",
+    "Tech exports surge on chip demand",
+    "Protests over fuel subsidies spread to the capital",
+]
+
+
+def benchmark_encoding(article_count: int):
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        print("⚠️ sentence-transformers not installed, skipping the encoding benchmark")
+        return
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(settings.embedding_model, device="cpu")
+    texts = [f"{SAMPLE_TITLES[i % len(SAMPLE_TITLES)]} ({i}). Officials said more details would follow." for i in range(article_count)]
+    print(f"\n🧠 Encoding {article_count} articles with {settings.embedding_model}")
+    print(f"  {'batch':>6} {'articles/s':>11} {'ms/article':>11}")
+    for batch_size in (1, 8, 32, 64):
+        start = time.perf_counter()
+        model.encode(texts, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False)
+        elapsed = time.perf_counter() - start
+        print(f"  {batch_size:>6} {article_count / elapsed:11.1f} {elapsed / article_count * 1000:11.2f}")
+
+
+def benchmark_search(query_count: int):
+    rng = np.random.default_rng(0)
+    dimensions = settings.embedding_dimensions
+    print(f"\n🔎 NumPy brute-force search, {dimensions} dims, top 10, {query_count} queries")
+    print(f"  {'articles':>9} {'build ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in (1_000, 10_000, 100_000):
+        vectors = rng.standard_normal((size, dimensions)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index = NumpyVectorIndex(dimensions, max_items=size)
+        start = time.perf_counter()
+        index.add([str(i) for i in range(size)], vectors, [{"country_code": "USA" if i % 2 else "FRA"} for i in range(size)])
+        build_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for query in vectors[rng.integers(0, size, query_count)]:
+            start = time.perf_counter()
+            index.search(query, 10, exclude=lambda item: item["country_code"] == "USA")
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"  {size:>9} {build_ms:9.1f} {np.percentile(timings, 50):8.2f} {np.percentile(timings, 95):8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    benchmark_encoding(args.articles)
+    benchmark_search(args.queries)
@@ -0,0 +1,164 @@
+"""
+Benchmark: FX history range queries over a year of hourly snapshots x ~160 currencies
+
+Compares the columnar FXRingBuffer (one float32 matrix, rows = snapshots) against the
+straightforward alternative of keeping every snapshot as a {currency: rate} dict and scanning
+them per query. Both return the same series, downsampled to 90 points like the endpoint.
+With --postgres the same snapshots are also written to a temporary copy of fx_rate_snapshots
+(migration 006 layout, monthly partitions) on Settings.database_url and queried with the
+store's LOAD_RANGE_SQL, nothing is written to the real table.
+Usage: python scripts/benchmark_fx_history.py [--days 365] [--currencies 160] [--queries 200] [--postgres]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.fx_history import FXRingBuffer, LOAD_RANGE_SQL, INSERT_SQL, _month_partition_sql, downsample
+
+QUOTES = ["USD", "EUR", "GBP", "JPY", "CNY"]
+RANGES_DAYS = [7, 30, 90, 365]
+POINTS = 90
+
+
+def synthetic_snapshots(days: int, currency_count: int, rng: np.random.Generator):
+    """Hourly snapshots against USD, each currency a random walk in log space"""
+    currencies = sorted(set(QUOTES) | {f"C{i:02d}" for i in range(currency_count - len(QUOTES))})
+    hours = days * 24
+    start = time.time() - hours * 3600
+    times = start + np.arange(hours) * 3600.0
+    walk = np.cumsum(rng.normal(0, 0.002, size=(hours, len(currencies))), axis=0)
+    rates = np.exp(walk + rng.uniform(-3, 6, size=len(currencies)))
+    rates[:, currencies.index("USD")] = 1.0
+    return currencies, times, rates.astype(np.float32)
+
+
+def dict_series(snapshots, base, quotes, start, end):
+    """The list-of-dicts alternative: scan every snapshot, look each currency up"""
+    times, values = [], []
+    for captured_at, rates in snapshots:
+        if start <= captured_at < end:
+            base_rate = rates.get(base)
+            times.append(captured_at)
+            values.append([rates[quote] / base_rate if base_rate and quote in rates else np.nan for quote in quotes])
+    return np.array(times), np.array(values, dtype=np.float64).reshape(len(times), len(quotes))
+
+
+def timed(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1e3
+
+
+def bench_memory(currencies, times, rates, query_count: int, rng: random.Random):
+    started = time.perf_counter()
+    ring = FXRingBuffer(len(times))
+    for captured_at, row in zip(times, rates):
+        ring.append(captured_at, currencies, row)
+    append_us = (time.perf_counter() - started) / len(times) * 1e6
+    snapshots = [(captured_at, dict(zip(currencies, row.tolist()))) for captured_at, row in zip(times, rates)]
+
+    dict_bytes = sum(sys.getsizeof(rates) + len(rates) * (sys.getsizeof(1.0)) for _, rates in snapshots)
+    print(f"{len(times)} snapshots x {len(currencies)} currencies, {append_us:.1f} us per ring append")
+    print(f"memory: ring {(ring.rates.nbytes + ring.times.nbytes) / 1e6:.1f} MB, "
+          f"list of dicts ~{dict_bytes / 1e6:.1f} MB (values only, keys are shared)\n")
+    print(f"{'range':>6} {'snapshots':>10} {'dicts ms/q':>11} {'ring ms/q':>10} {'speedup':>8}")
+
+    end = times[-1] + 1
+    for days in RANGES_DAYS:
+        start = end - days * 86400
+        bases = [rng.choice(currencies) for _ in range(query_count)]
+        queries = iter(bases * 2)
+
+        def run_dicts():
+            base = next(queries)
+            downsample(*dict_series(snapshots, base, QUOTES, start, end), start, end, POINTS)
+
+        def run_ring():
+            base = next(queries)
+            downsample(*ring.series(base, QUOTES, start, end), start, end, POINTS)
+
+        repeats = max(1, query_count // 10)
+        dicts_ms = timed(run_dicts, repeats)
+        ring_ms = timed(run_ring, query_count)
+        in_range = int(np.sum(times >= start))
+        print(f"{days:>5}d {in_range:>10} {dicts_ms:>11.2f} {ring_ms:>10.3f} {dicts_ms / ring_ms:>7.0f}x")
+
+        # same answer both ways
+        base = bases[0]
+        expected = dict_series(snapshots, base, QUOTES, start, end)[1]
+        assert np.allclose(ring.series(base, QUOTES, start, end)[1], expected, equal_nan=True)
+
+
+async def bench_postgres(currencies, times, rates, query_count: int, rng: random.Random):
+    from sqlalchemy import text
+    from app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        # temp tables shadow the real one for this session only
+        await session.execute(text(
+            "CREATE TEMP TABLE fx_rate_snapshots (captured_at TIMESTAMP WITH TIME ZONE NOT NULL, "
+            "base_currency VARCHAR(3) NOT NULL, rate_date DATE, currencies VARCHAR(3)[] NOT NULL, "
+            "rates REAL[] NOT NULL, PRIMARY KEY (captured_at)) PARTITION BY RANGE (captured_at)"
+        ))
+        months = {}
+        for captured_at in times:
+            name, create_sql = _month_partition_sql(datetime.fromtimestamp(captured_at, timezone.utc))
+            months[name] = create_sql
+        for create_sql in months.values():
+            await session.execute(text(create_sql.text.replace("CREATE TABLE IF NOT EXISTS", "CREATE TEMP TABLE")))
+
+        started = time.perf_counter()
+        await session.execute(INSERT_SQL, [
+            {"captured_at": datetime.fromtimestamp(captured_at, timezone.utc), "base_currency": "USD",
+             "rate_date": None, "currencies": currencies, "rates": row.tolist()}
+            for captured_at, row in zip(times, rates)
+        ])
+        await session.execute(text("ANALYZE fx_rate_snapshots"))
+        print(f"\npostgres: {len(times)} snapshots into {len(months)} monthly partitions in {time.perf_counter() - started:.1f}s")
+        size = (await session.execute(text(
+            "SELECT sum(pg_total_relation_size(inhrelid)) FROM pg_inherits WHERE inhparent = 'fx_rate_snapshots'::regclass"
+        ))).scalar()
+        print(f"table size {size / 1e6:.1f} MB\n")
+        print(f"{'range':>6} {'postgres ms/q':>14}")
+
+        end = times[-1] + 1
+        for days in RANGES_DAYS:
+            start = end - days * 86400
+            params = {
+                "start": datetime.fromtimestamp(start, timezone.utc),
+                "end": datetime.fromtimestamp(end, timezone.utc),
+            }
+            repeats = max(1, query_count // 10)
+            started = time.perf_counter()
+            for _ in range(repeats):
+                rows = (await session.execute(LOAD_RANGE_SQL, {**params, "codes": [rng.choice(currencies), *QUOTES]})).all()
+                picked = np.array([picked for _, picked in rows], dtype=np.float64)
+                downsample(np.array([row[0].timestamp() for row in rows]), picked[:, 1:] / picked[:, :1], start, end, POINTS)
+            print(f"{days:>5}d {(time.perf_counter() - started) / repeats * 1e3:>14.2f}")
+        await session.rollback()
+
+
+def main(days: int, currency_count: int, query_count: int, postgres: bool):
+    currencies, times, rates = synthetic_snapshots(days, currency_count, np.random.default_rng(42))
+    bench_memory(currencies, times, rates, query_count, random.Random(42))
+    if postgres:
+        asyncio.run(bench_postgres(currencies, times, rates, query_count, random.Random(42)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--currencies", type=int, default=160)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--postgres", action="store_true", help="also benchmark the Postgres table (needs DATABASE_URL)")
+    args = parser.parse_args()
+    main(args.days, args.currencies, args.queries, args.postgres)
@@ -0,0 +1,169 @@
+"""
+Benchmark: fresh httpx client per request vs the shared pooled upstream client
+
+Starts a local stub HTTPS server (self-signed cert, so the TLS handshake cost is real)
+that counts accepted connections, then fires the same requests both ways.
+Usage: python scripts/benchmark_http_client.py [--requests 200] [--concurrency 10] [--no-tls]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import ssl
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.http_client import UpstreamClients
+
+# Small World Bank-like payload so the body cost stays negligible next to the handshake
+STUB_BODY = json.dumps([{"page": 1, "pages": 1}, [{"value": 1.0, "date": "2023"}]]).encode()
+
+
+class StubServer:
+    """Minimal HTTP/1.1 keep-alive server that counts TCP connections"""
+
+    def __init__(self, use_tls: bool):
+        self.use_tls = use_tls
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+        self.port = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                # read request line + headers, the stub only serves GETs so there is no body
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    + f"Content-Length: {len(STUB_BODY)}\r\n\r\n".encode()
+                    + STUB_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        ssl_context = _self_signed_context() if self.use_tls else None
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=ssl_context)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.use_tls else "http"
+        return f"{scheme}://127.0.0.1:{self.port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def _self_signed_context() -> ssl.SSLContext:
+    """Generate a throwaway self-signed certificate for the stub server"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+    tmpdir = tempfile.mkdtemp()
+    cert_path = os.path.join(tmpdir, "cert.pem")
+    key_path = os.path.join(tmpdir, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+async def run_fresh_clients(url: str, total: int, concurrency: int) -> float:
+    """The old pattern: `async with httpx.AsyncClient()` around every request"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            async with httpx.AsyncClient(verify=False, timeout=10) as client:
+                response = await client.get(f"{url}/country/US/indicator/NY.GDP.MKTP.CD")
+                response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start
+
+
+async def run_pooled_client(url: str, total: int, concurrency: int) -> float:
+    """The new pattern: one long-lived client per upstream from UpstreamClients"""
+    clients = UpstreamClients()
+    # the stub uses a self-signed cert, so skip verification (the handshake itself still happens)
+    client = clients._build_client(url, settings.world_bank_timeout, verify=False)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get("/country/US/indicator/NY.GDP.MKTP.CD")
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed
+
+
+async def main(total: int, concurrency: int, use_tls: bool):
+    print(f"🧪 {total} requests, concurrency {concurrency}, TLS {'on' if use_tls else 'off'}")
+
+    for label, runner in (("fresh client per request", run_fresh_clients), ("shared pooled client", run_pooled_client)):
+        server = StubServer(use_tls)
+        await server.start()
+        elapsed = await runner(server.url, total, concurrency)
+        await server.stop()
+        print(
+            f"  {label:<26} {elapsed * 1000:8.1f} ms total  "
+            f"{elapsed * 1000 / total:6.2f} ms/request  "
+            f"{server.connections:4d} connections opened"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--no-tls", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, not args.no_tls))
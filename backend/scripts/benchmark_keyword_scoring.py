@@ -0,0 +1,82 @@
+"""
+Benchmark: single-pass keyword scoring vs the old per-keyword substring scan
+
+The old sentiment / bias code ran `word in text_lower` once per keyword, rescanning the whole
+article for every term, so cost grew with lexicon size. KeywordScorer tokenizes once and does a
+dict lookup per token. Both are run over the same article batch with the shipped lexicons and
+with a lexicon inflated to --extra-terms synthetic terms.
+Usage: python scripts/benchmark_keyword_scoring.py [--articles 2000] [--extra-terms 5000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.keyword_scorer import DEFAULT_LEXICON_DIR, KeywordScorer
+
+SAMPLE_TEXT = (
+    "The central bank held interest rates steady on Thursday as inflation eased for a third "
+    "consecutive month, while officials signalled that further cuts would depend on wage growth "
+    "and energy prices through the winter. Opposition leaders called for reform and stronger "
+    "border security, and protests over fuel subsidies continued in the capital. Analysts said "
+    "the decision supports a soft landing despite the risk of recession in the coming year. "
+)
+
+
+def load_lexicons(extra_terms: int):
+    lexicons = {}
+    for name in ("sentiment", "bias"):
+        with open(os.path.join(DEFAULT_LEXICON_DIR, f"{name}.json"), encoding="utf-8") as f:
+            lexicons.update(json.load(f))
+    if extra_terms:
+        per_category = extra_terms // len(lexicons)
+        lexicons = {
+            category: terms + [f"{category}term{i}" for i in range(per_category)]
+            for category, terms in lexicons.items()
+        }
+    return lexicons
+
+
+def legacy_count(lexicons, text):
+    # what SimpleAIService did before: one substring scan of the text per keyword
+    text_lower = text.lower()
+    return {category: sum(1 for word in terms if word in text_lower) for category, terms in lexicons.items()}
+
+
+def run(label, count, articles):
+    start = time.perf_counter()
+    for article in articles:
+        count(article)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {len(articles) / elapsed:12.0f} articles/s {elapsed / len(articles) * 1e6:10.1f} µs/article")
+    return elapsed
+
+
+def main(article_count: int, extra_terms: int):
+    articles = [SAMPLE_TEXT * 3 + f" Story {i}." for i in range(article_count)]
+    for extra in (0, extra_terms):
+        lexicons = load_lexicons(extra)
+        total_terms = sum(len(terms) for terms in lexicons.values())
+        scorer = KeywordScorer(lexicons)
+        print(f"\n📚 {total_terms} lexicon terms, {article_count} articles of ~{len(articles[0])} chars")
+        legacy = run("substring per keyword", lambda text: legacy_count(lexicons, text), articles)
+        single_pass = run("KeywordScorer", scorer.count, articles)
+        print(f"  speedup: {legacy / single_pass:.1f}x")
+
+    # the old matching was also wrong on word boundaries
+    lexicons = load_lexicons(0)
+    sample = "Officials support the plan, which could happen soon."
+    print(f"\n🔤 '{sample}'")
+    print(f"  substring per keyword: {legacy_count(lexicons, sample)}")
+    print(f"  KeywordScorer:         {KeywordScorer(lexicons).count(sample)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--extra-terms", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.articles, args.extra_terms)
@@ -0,0 +1,79 @@
+"""
+Load test: LLM provider adapters against the local stub server (no API keys or network needed)
+
+Starts scripts/llm_stub_server.py in-process, points both providers at it and pushes a batch of
+article-sized prompts through complete_batch, reporting throughput, latency, retries, token
+usage and what the same traffic would cost at the configured models' prices.
+Usage: python scripts/benchmark_llm_providers.py [--requests 200] [--concurrency 8] [--latency-ms 300] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.http_client import upstream_clients
+from llm_stub_server import create_stub_app
+
+ARTICLE = (
+    "The central bank held interest rates steady on Thursday as inflation eased for a third "
+    "consecutive month, while officials signalled that further cuts would depend on wage growth. "
+) * 8
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def main(request_count: int, concurrency: int, latency_ms: float, error_rate: float):
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        create_stub_app(latency_ms, error_rate), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    settings.openai_api_url = settings.anthropic_api_url = f"http://127.0.0.1:{port}/v1"
+    settings.openai_api_key = settings.anthropic_api_key = "stub"
+    settings.llm_max_concurrency = concurrency
+    settings.llm_retry_base_delay = 0.05
+    # imported after the settings change so the providers pick up the stub and concurrency
+    from app.services.llm_providers import OpenAIProvider, AnthropicProvider
+
+    try:
+        for provider in (OpenAIProvider(settings.openai_model_basic), AnthropicProvider(settings.anthropic_model)):
+            prompts = [f"Summarize article {i} as JSON.\n{ARTICLE}" for i in range(request_count)]
+            start = time.perf_counter()
+            results = await provider.complete_batch(prompts, max_tokens=300)
+            elapsed = time.perf_counter() - start
+            ok = [result for result in results if result]
+            usage = provider.usage
+            print(f"\n🤖 {provider.name} ({provider.model}) via stub, {request_count} requests, concurrency {concurrency}")
+            print(f"  throughput   {len(ok) / elapsed:8.1f} completions/s ({elapsed:.2f}s total)")
+            print(f"  completed    {len(ok)}/{request_count}, retries {usage['retries']}, failures {usage['failures']}")
+            print(f"  tokens       {usage['input_tokens']} in / {usage['output_tokens']} out")
+            print(f"  cost         ${usage['cost']:.4f} (${usage['cost'] / max(len(ok), 1):.5f} per completion)")
+    finally:
+        server.should_exit = True
+        await server_task
+        await upstream_clients.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency_ms, args.error_rate))
@@ -11,6 +11,8 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from app.core.database import Base
 from app.core.config import settings
 from app.models.country import Country  # Import to register the model
+from app.models.economic_indicator import EconomicIndicator
+from app.models.news_article import NewsArticle
 
 async def create_tables():
     """Create all tables"""
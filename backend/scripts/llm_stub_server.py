@@ -0,0 +1,103 @@
+"""
+Local stub of the OpenAI chat completions and Anthropic messages APIs, for offline load tests
+
+Answers POST /v1/chat/completions and POST /v1/messages with well-formed responses (a JSON
+object the premium tier can parse) and token usage counted from the request, after a
+configurable latency, and injects 429 / 529 errors at a configurable rate so retries and
+budget accounting can be exercised.
+Usage:
+    python scripts/llm_stub_server.py --port 8090 --latency-ms 300 --error-rate 0.05
+    OPENAI_API_KEY=stub ANTHROPIC_API_KEY=stub \\
+    OPENAI_API_URL=http://localhost:8090/v1 ANTHROPIC_API_URL=http://localhost:8090/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_app(latency_ms: float = 300, error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+    stats = {"requests": 0, "errors": 0}
+    app.state.stats = stats
+
+    def count_tokens(text: str) -> int:
+        return max(1, len(text) // 4)
+
+    def answer(prompt: str) -> str:
+        words = prompt.split()
+        excerpt = " ".join(words[-30:])
+        return json.dumps({
+            "tweet": excerpt[:200],
+            "bullets": [" ".join(words[-10 * (i + 1):][:10]) for i in range(3)],
+            "brief": excerpt,
+            "label": "neutral", "compound": 0.0, "confidence": 0.9,
+            "bias_label": "neutral", "credibility_score": 0.8,
+            "political_framing": "neutral", "emotional_manipulation": "low",
+            "factual_accuracy_score": 0.85, "source_reputation": "medium",
+        })
+
+    async def respond(error_status: int):
+        stats["requests"] += 1
+        # jittered latency, roughly like a real model API under load
+        await asyncio.sleep(random.uniform(0.5, 1.5) * latency_ms / 1000)
+        if random.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"type": "overloaded", "message": "stub overload"}},
+                                status_code=error_status, headers={"retry-after": "0"})
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = await respond(429)
+        if error:
+            return error
+        prompt = " ".join(message["content"] for message in body["messages"])
+        text = answer(prompt)
+        return {
+            "id": f"chatcmpl-stub-{stats['requests']}",
+            "object": "chat.completion",
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": count_tokens(prompt),
+                "completion_tokens": min(count_tokens(text), body.get("max_tokens", 1024)),
+                "total_tokens": count_tokens(prompt) + count_tokens(text),
+            },
+        }
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        error = await respond(529)
+        if error:
+            return error
+        prompt = (body.get("system") or "") + " ".join(message["content"] for message in body["messages"])
+        text = answer(prompt)
+        return {
+            "id": f"msg_stub_{stats['requests']}",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": count_tokens(prompt), "output_tokens": min(count_tokens(text), body["max_tokens"])},
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.latency_ms, args.error_rate), host=args.host, port=args.port, log_level="warning")
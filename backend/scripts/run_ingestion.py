@@ -0,0 +1,44 @@
+"""
+Standalone ingestion worker: keeps news, economic and FX data warm for every country
+
+Run this instead of the in-app scheduler (set ENABLE_BACKGROUND_INGESTION=false for the API)
+when you want ingestion in its own process.
+Usage: python scripts/run_ingestion.py [--once]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.http_client import upstream_clients
+from app.services.ingestion_service import ingestion_scheduler
+
+async def main(once: bool):
+    await upstream_clients.start()
+    try:
+        if once:
+            # refresh every source right now, ignoring intervals and leases
+            await ingestion_scheduler.run_due(force=True)
+            freshness = await ingestion_scheduler.get_freshness()
+            print(f"✅ Warm countries per source: {freshness['warm_countries']} of {freshness['total_countries']}")
+        else:
+            print("🔄 Ingestion worker running, Ctrl+C to stop")
+            ingestion_scheduler.start()
+            await asyncio.Event().wait()
+    finally:
+        await ingestion_scheduler.stop()
+        await upstream_clients.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Background ingestion worker")
+    parser.add_argument("--once", action="store_true", help="run one full refresh and exit")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.once))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,24 @@
+"""
+Shared fixtures: an in-memory Redis (fakeredis, Lua scripts through lupa) behind the global
+cache_manager, so caching and rate limiting run their real code paths without a server or network
+"""
+import fakeredis.aioredis
+import pytest_asyncio
+
+from app.core.cache import cache_manager
+
+
+@pytest_asyncio.fixture
+async def redis_cache():
+    cache_manager.redis_client = fakeredis.aioredis.FakeRedis()
+    cache_manager.local.clear()
+    cache_manager._scripts.clear()
+    yield cache_manager
+    for task in list(cache_manager._background_tasks):
+        await task
+    await cache_manager.redis_client.aclose()
+    cache_manager.redis_client = None
+    cache_manager.local.clear()
+    cache_manager._scripts.clear()
+    cache_manager._revalidating.clear()
+
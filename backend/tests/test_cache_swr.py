@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.cache import _split_entry
+from app.core.throttle import BACKGROUND, current_priority
+
+
+def test_split_entry():
+    assert _split_entry({"swr_value": [1, 2], "fresh_until": time.time() + 60}) == ([1, 2], True)
+    assert _split_entry({"swr_value": [1, 2], "fresh_until": time.time() - 1}) == ([1, 2], False)
+    # written with plain set(): served, but stale so it gets refreshed
+    assert _split_entry({"a": 1}) == ({"a": 1}, False)
+
+
+@pytest.mark.asyncio
+async def test_get_fresh_only_returns_fresh_values(redis_cache):
+    await redis_cache.set_fresh("intel:news:USA", {"articles": 3}, soft_ttl=60)
+    assert await redis_cache.get_fresh("intel:news:USA") == {"articles": 3}
+
+    await redis_cache.set_fresh("intel:news:FRA", {"articles": 1}, soft_ttl=-1)
+    assert await redis_cache.get_fresh("intel:news:FRA") is None
+    assert await redis_cache.get_fresh("intel:news:DEU") is None
+
+
+@pytest.mark.asyncio
+async def test_fresh_survives_the_local_tier(redis_cache):
+    await redis_cache.set_fresh("intel:news:USA", "value", soft_ttl=60)
+    redis_cache.local.clear()  # another worker: only Redis has it
+    assert await redis_cache.get_fresh("intel:news:USA") == "value"
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_miss_awaits_refresh(redis_cache):
+    async def refresh():
+        await redis_cache.set_fresh("intel:news:USA", "fetched", soft_ttl=60)
+        return "fetched"
+
+    assert await redis_cache.get_or_refresh("intel:news:USA", refresh) == "fetched"
+    assert await redis_cache.get_fresh("intel:news:USA") == "fetched"
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_fresh_hit_does_not_refresh(redis_cache):
+    await redis_cache.set_fresh("intel:news:USA", "cached", soft_ttl=60)
+
+    async def refresh():
+        raise AssertionError("fresh entries must not be refreshed")
+
+    assert await redis_cache.get_or_refresh("intel:news:USA", refresh) == "cached"
+    assert not redis_cache._background_tasks
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_serves_stale_and_refreshes_once_in_background(redis_cache):
+    await redis_cache.set_fresh("intel:news:USA", "old", soft_ttl=-1)
+    calls = []
+    release = asyncio.Event()
+
+    async def refresh():
+        calls.append(current_priority())
+        await release.wait()
+        await redis_cache.set_fresh("intel:news:USA", "new", soft_ttl=60)
+        return "new"
+
+    # every stale read returns at once, only the first one starts a refresh
+    assert await redis_cache.get_or_refresh("intel:news:USA", refresh) == "old"
+    assert await redis_cache.get_or_refresh("intel:news:USA", refresh) == "old"
+    await asyncio.sleep(0)
+    assert calls == [BACKGROUND]
+
+    release.set()
+    await asyncio.gather(*redis_cache._background_tasks)
+    assert await redis_cache.get_fresh("intel:news:USA") == "new"
+    assert await redis_cache.get("swr:intel:news:USA") is None  # refresh lease released
+
+
+@pytest.mark.asyncio
+async def test_failed_background_refresh_keeps_stale_value(redis_cache):
+    await redis_cache.set_fresh("intel:news:USA", "old", soft_ttl=-1)
+
+    async def refresh():
+        raise RuntimeError("upstream down")
+
+    assert await redis_cache.get_or_refresh("intel:news:USA", refresh) == "old"
+    await asyncio.gather(*redis_cache._background_tasks)
+    assert await redis_cache.get_or_refresh("intel:news:USA", refresh) == "old"
+
+
+@pytest.mark.asyncio
+async def test_get_many_or_refresh_leaves_misses_out(redis_cache):
+    await redis_cache.set_fresh("intel:news:USA", "usa", soft_ttl=60)
+    await redis_cache.set_fresh("intel:news:FRA", "fra", soft_ttl=-1)
+    refreshed = []
+
+    def refresh_for(key):
+        async def refresh():
+            refreshed.append(key)
+        return refresh
+
+    values = await redis_cache.get_many_or_refresh(["intel:news:USA", "intel:news:FRA", "intel:news:DEU"], refresh_for)
+    assert values == {"intel:news:USA": "usa", "intel:news:FRA": "fra"}
+    await asyncio.gather(*redis_cache._background_tasks)
+    assert refreshed == ["intel:news:FRA"]
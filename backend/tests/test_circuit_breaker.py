@@ -0,0 +1,111 @@
+import httpx
+import pytest
+
+from app.core.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerTransport, CircuitOpenError,
+)
+from app.core.config import settings
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 3)
+    monkeypatch.setattr(settings, "breaker_open_seconds", 30.0)
+    return CircuitBreaker("test", max_timeout=10.0)
+
+
+def expire_open_period(breaker):
+    breaker.opened_at -= settings.breaker_open_seconds
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        assert breaker.before_request() is False
+        breaker.record_failure(probe=False)
+    assert breaker.state == CLOSED
+    breaker.record_failure(probe=False)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    assert breaker.stats["rejected"] == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure(probe=False)
+    breaker.record_failure(probe=False)
+    breaker.record_success(0.1, probe=False)
+    breaker.record_failure(probe=False)
+    breaker.record_failure(probe=False)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_probe_through(breaker):
+    for _ in range(3):
+        breaker.record_failure(probe=False)
+    expire_open_period(breaker)
+    assert breaker.before_request() is True
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_probe_success_closes(breaker):
+    for _ in range(3):
+        breaker.record_failure(probe=False)
+    expire_open_period(breaker)
+    probe = breaker.before_request()
+    breaker.record_success(0.2, probe)
+    assert breaker.state == CLOSED
+    assert breaker.before_request() is False
+
+
+def test_probe_failure_reopens(breaker):
+    for _ in range(3):
+        breaker.record_failure(probe=False)
+    expire_open_period(breaker)
+    probe = breaker.before_request()
+    breaker.record_failure(probe)
+    assert breaker.state == OPEN
+    assert breaker.stats["opened"] == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_cancelled_probe_frees_the_slot(breaker):
+    for _ in range(3):
+        breaker.record_failure(probe=False)
+    expire_open_period(breaker)
+    breaker.release_probe(breaker.before_request())
+    assert breaker.before_request() is True
+
+
+def test_adaptive_timeout_stays_within_bounds(breaker, monkeypatch):
+    monkeypatch.setattr(settings, "adaptive_timeout_min_samples", 5)
+    monkeypatch.setattr(settings, "adaptive_timeout_multiplier", 3.0)
+    monkeypatch.setattr(settings, "adaptive_timeout_min", 1.0)
+    assert breaker.timeout() == 10.0  # not enough samples yet
+    for _ in range(10):
+        breaker.record_success(0.5, probe=False)
+    assert breaker.timeout() == pytest.approx(1.5)
+    assert breaker.timeout(probe=True) == 10.0
+    for _ in range(10):
+        breaker.record_success(8.0, probe=False)
+    assert breaker.timeout() == 10.0
+
+
+@pytest.mark.asyncio
+async def test_transport_counts_5xx_and_fails_fast(breaker):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    transport = CircuitBreakerTransport(breaker, httpx.MockTransport(handler))
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(3):
+            assert (await client.get("https://upstream.test/")).status_code == 503
+        with pytest.raises(httpx.TransportError):
+            await client.get("https://upstream.test/")
+    assert len(calls) == 3
+    assert breaker.state == OPEN
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from app.services.fx_history import FXRingBuffer, downsample
+from app.services.fx_rates import FXRateTable
+
+
+@pytest.fixture
+def table():
+    return FXRateTable("USD", {"EUR": 0.9, "GBP": 0.8, "JPY": 150.0, "BAD": 0, "NAN": None}, date="2024-03-01")
+
+
+def test_drops_unusable_rates(table):
+    assert table.currencies == ["EUR", "GBP", "JPY", "USD"]
+    assert "BAD" not in table and "NAN" not in table
+    assert "USD" in table
+
+
+def test_rate(table):
+    assert table.rate("USD", "EUR") == pytest.approx(0.9)
+    assert table.rate("EUR", "USD") == pytest.approx(1 / 0.9)
+    assert table.rate("EUR", "GBP") == pytest.approx(0.8 / 0.9)
+    assert table.rate("EUR", "XXX") is None
+
+
+def test_cross_rates(table):
+    rates = table.cross_rates("GBP", ["USD", "JPY", "XXX", "GBP"])
+    assert rates["USD"] == pytest.approx(1.25)
+    assert rates["JPY"] == pytest.approx(187.5)
+    assert rates["XXX"] is None
+    assert rates["GBP"] == pytest.approx(1.0)
+    assert table.cross_rates("XXX", ["USD"]) == {"USD": None}
+
+
+def test_matrix_agrees_with_rate(table):
+    matrix = table.matrix()
+    for i, a in enumerate(table.currencies):
+        for j, b in enumerate(table.currencies):
+            assert matrix[i, j] == pytest.approx(table.rate(a, b))
+    assert table.matrix(["JPY", "XXX", "EUR"]).shape == (2, 2)
+
+
+def test_dict_round_trip(table):
+    copy = FXRateTable.from_dict(table.to_dict())
+    assert copy.currencies == table.currencies
+    assert copy.date == table.date and copy.fetched_at == table.fetched_at
+    assert np.array_equal(copy.rates, table.rates)
+
+
+def test_downsample_means_per_bucket():
+    times = np.arange(10, dtype=np.float64)
+    values = np.column_stack([times * 2, np.full(10, 1.0)])
+    values[0, 1] = np.nan
+    out_times, out_values = downsample(times, values, start=0, end=10, points=5)
+    assert out_times.tolist() == [0.5, 2.5, 4.5, 6.5, 8.5]
+    assert out_values[:, 0].tolist() == [1.0, 5.0, 9.0, 13.0, 17.0]
+    assert out_values[:, 1].tolist() == [1.0] * 5  # NaNs ignored, not propagated
+
+
+def test_downsample_drops_empty_buckets_and_keeps_short_series():
+    times = np.array([0.0, 1.0, 9.0])
+    values = np.array([[1.0], [3.0], [5.0]])
+    out_times, out_values = downsample(times, values, start=0, end=10, points=2)
+    assert out_times.tolist() == [0.5, 9.0]
+    assert out_values[:, 0].tolist() == [2.0, 5.0]
+    same_times, same_values = downsample(times, values, start=0, end=10, points=5)
+    assert same_times is times and same_values is values
+
+
+def test_downsample_all_nan_bucket():
+    times = np.arange(4, dtype=np.float64)
+    values = np.array([[np.nan], [np.nan], [1.0], [2.0]])
+    _, out_values = downsample(times, values, start=0, end=4, points=2)
+    assert np.isnan(out_values[0, 0])
+    assert out_values[1, 0] == 1.5
+
+
+def test_ring_buffer_series_across_wraparound():
+    buffer = FXRingBuffer(capacity=3)
+    buffer.append(1.0, ["USD", "EUR"], [1.0, 0.9])
+    buffer.append(2.0, ["USD", "EUR"], [1.0, 0.8])
+    buffer.append(3.0, ["USD", "EUR", "GBP"], [1.0, 0.5, 0.4])
+    buffer.append(4.0, ["USD", "GBP"], [1.0, 0.5])  # overwrites t=1
+    assert len(buffer) == 3
+    assert buffer.oldest == 2.0 and buffer.latest == 4.0
+    times, values = buffer.series("EUR", ["GBP", "USD"], start=0, end=10)
+    assert times.tolist() == [2.0, 3.0, 4.0]
+    assert np.isnan(values[0, 0])  # no GBP yet
+    assert values[1, 0] == pytest.approx(0.8)
+    assert values[1, 1] == pytest.approx(2.0)
+    assert np.isnan(values[2]).all()  # no EUR in the last snapshot
+    assert buffer.latest_rates() == {"USD": 1.0, "GBP": 0.5}
@@ -0,0 +1,65 @@
+import pytest
+
+from app.services.keyword_scorer import KeywordScorer, tokenize
+
+# the word lists hybrid_ai_service used to hard-code, scoring must agree with them
+BASELINE = {
+    "positive": ["good", "great", "excellent", "positive", "success", "growth", "up", "rise"],
+    "negative": ["bad", "terrible", "negative", "crisis", "down", "fall", "decline", "problem"],
+    "liberal": ["progressive", "reform", "climate", "diversity"],
+    "conservative": ["traditional", "security", "freedom", "defense"],
+    "trusted": ["reuters", "ap", "bbc", "npr", "pbs", "wall street journal"],
+}
+
+
+def baseline_count(text, terms):
+    """The old scoring: distinct terms found as substrings of the lowercased text"""
+    return sum(1 for term in terms if term in text.lower())
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return KeywordScorer.from_files("sentiment", "bias", "sources")
+
+
+def test_shipped_lexicons_match_the_baseline(scorer):
+    assert set(scorer.categories) == set(BASELINE)
+    for category, terms in BASELINE.items():
+        assert scorer.count(" ".join(terms))[category] == len(terms)
+
+
+@pytest.mark.parametrize("text", [
+    "Great growth and success as markets rise",
+    "Crisis deepens: prices fall, output down and decline expected. Bad news, a terrible problem",
+    "Progressive climate reform meets traditional security and defense concerns",
+    "Good and bad: growth up, crisis down",
+    "Reuters and BBC report; NPR and PBS follow",
+    "GOOD good Good. Growth, growth!",
+])
+def test_counts_agree_with_the_baseline_on_whole_words(scorer, text):
+    counts = scorer.count(text)
+    for category, terms in BASELINE.items():
+        assert counts[category] == baseline_count(text, terms), category
+
+
+def test_matches_whole_words_only(scorer):
+    # the baseline counted "up" in "support", "ap" in "happen" and "rise" in "surprise"
+    counts = scorer.count("Officials support what may happen next, to no one's surprise")
+    assert counts["positive"] == 0
+    assert counts["trusted"] == 0
+
+
+def test_words_inside_a_matched_phrase_do_not_count_twice():
+    scorer = KeywordScorer({"trusted": ["wall street journal"], "finance": ["street", "journal"]})
+    assert scorer.count("The Wall Street Journal reported") == {"trusted": 1, "finance": 0}
+    # ...but still count where they appear on their own
+    assert scorer.count("The Wall Street Journal reported on the street") == {"trusted": 1, "finance": 1}
+
+
+def test_term_in_several_categories():
+    scorer = KeywordScorer({"a": ["rise", "rally"], "b": ["Rise"]})
+    assert scorer.count("Shares rise in a late rally") == {"a": 2, "b": 1}
+
+
+def test_tokenize_splits_on_punctuation():
+    assert tokenize("Country's GDP-growth: 3.5%") == ["country", "s", "gdp", "growth", "3", "5"]
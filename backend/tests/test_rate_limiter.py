@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limiter import UpstreamLimitExceeded, UpstreamRateLimiter
+from app.core.throttle import background_priority
+
+
+async def acquire_background(limiter, max_wait=None):
+    with background_priority():
+        await limiter.acquire(max_wait)
+
+
+@pytest.mark.asyncio
+async def test_daily_quota_is_enforced(redis_cache):
+    limiter = UpstreamRateLimiter("test", rate_per_minute=6000, burst=10, daily_quota=3)
+    for _ in range(3):
+        await limiter.acquire()
+    with pytest.raises(UpstreamLimitExceeded, match="daily quota of 3 requests spent"):
+        await limiter.acquire()
+    # remembered locally: the next caller is refused without a Redis round trip
+    with pytest.raises(UpstreamLimitExceeded):
+        limiter.check()
+    assert (await limiter.status())["used_today"] == 3
+
+
+@pytest.mark.asyncio
+async def test_quota_is_shared_between_workers(redis_cache):
+    first = UpstreamRateLimiter("test", rate_per_minute=6000, burst=10, daily_quota=2)
+    second = UpstreamRateLimiter("test", rate_per_minute=6000, burst=10, daily_quota=2)
+    await first.acquire()
+    await second.acquire()
+    with pytest.raises(UpstreamLimitExceeded):
+        await first.acquire()
+
+
+@pytest.mark.asyncio
+async def test_background_leaves_the_quota_reserve_to_interactive(redis_cache, monkeypatch):
+    monkeypatch.setattr(settings, "upstream_interactive_reserve", 0.2)
+    limiter = UpstreamRateLimiter("test", rate_per_minute=6000, burst=100, daily_quota=10)
+    for _ in range(8):
+        await acquire_background(limiter)
+    with pytest.raises(UpstreamLimitExceeded, match="reserved for interactive"):
+        await acquire_background(limiter)
+    # background hitting the reserve doesn't block interactive callers
+    await limiter.acquire()
+    await limiter.acquire()
+    with pytest.raises(UpstreamLimitExceeded, match="daily quota"):
+        await limiter.acquire()
+
+
+@pytest.mark.asyncio
+async def test_background_leaves_the_burst_reserve_to_interactive(redis_cache, monkeypatch):
+    monkeypatch.setattr(settings, "upstream_interactive_reserve", 0.2)
+    # practically no refill: 10 tokens, background needs 1 + 2 reserved
+    limiter = UpstreamRateLimiter("test", rate_per_minute=0.06, burst=10)
+    for _ in range(8):
+        await limiter.acquire()
+    with pytest.raises(UpstreamLimitExceeded, match="rate limit reached"):
+        await acquire_background(limiter, max_wait=0.1)
+    await limiter.acquire()
+    await limiter.acquire()
+    with pytest.raises(UpstreamLimitExceeded, match="rate limit reached"):
+        await limiter.acquire(max_wait=0.1)
+
+
+@pytest.mark.asyncio
+async def test_interactive_callers_go_first(redis_cache, monkeypatch):
+    monkeypatch.setattr(settings, "upstream_interactive_reserve", 0.0)
+    limiter = UpstreamRateLimiter("test", rate_per_minute=600, burst=1)  # one token every 0.1s
+    await limiter.acquire()
+    granted = []
+
+    async def background():
+        await acquire_background(limiter, max_wait=5)
+        granted.append("background")
+
+    async def interactive():
+        await limiter.acquire(max_wait=5)
+        granted.append("interactive")
+
+    # background queued first, interactive arrives while it waits for the next token
+    waiting = asyncio.create_task(background())
+    await asyncio.sleep(0.01)
+    await asyncio.gather(interactive(), waiting)
+    assert granted == ["interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_upstream_429_blocks_every_worker(redis_cache):
+    first = UpstreamRateLimiter("test", rate_per_minute=6000, burst=10)
+    second = UpstreamRateLimiter("test", rate_per_minute=6000, burst=10)
+    await first.report_limited("30")
+    with pytest.raises(UpstreamLimitExceeded, match="429"):
+        first.check()
+    with pytest.raises(UpstreamLimitExceeded, match="429"):
+        await second.acquire()
+
+
+@pytest.mark.asyncio
+async def test_local_fallback_without_redis(monkeypatch):
+    async def no_redis(*args):
+        return None
+
+    from app.core.cache import cache_manager
+    monkeypatch.setattr(cache_manager, "run_script", no_redis)
+    limiter = UpstreamRateLimiter("test", rate_per_minute=6000, burst=10, daily_quota=2)
+    await limiter.acquire()
+    await limiter.acquire()
+    with pytest.raises(UpstreamLimitExceeded, match="this worker"):
+        await limiter.acquire()
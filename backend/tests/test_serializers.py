@@ -0,0 +1,63 @@
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.core.serializers import COMPRESSION_IDS, MAGIC, CacheSerializer
+
+
+VALUE = {"country": "USA", "score": 0.25, "tags": ["economy", "fx"], "nested": {"count": 3, "missing": None}}
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson", "msgpack"])
+def test_round_trip(codec):
+    serializer = CacheSerializer(codec=codec, compression="none")
+    data = serializer.dumps(VALUE)
+    assert data[0] == MAGIC
+    assert serializer.loads(data) == VALUE
+
+
+def test_msgpack_keeps_rich_types():
+    serializer = CacheSerializer(codec="msgpack", compression="none")
+    value = {
+        "at": datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc),
+        "day": date(2024, 3, 1),
+        "amount": Decimal("12.345"),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    }
+    assert serializer.loads(serializer.dumps(value)) == value
+
+
+def test_compresses_only_above_threshold():
+    serializer = CacheSerializer(codec="json", compression="zlib", compression_threshold=256)
+    small = serializer.dumps({"a": 1})
+    large = serializer.dumps({"text": "headline " * 500})
+    assert small[3] == COMPRESSION_IDS["none"]
+    assert large[3] == COMPRESSION_IDS["zlib"]
+    assert len(large) < len(json.dumps({"text": "headline " * 500}))
+    assert serializer.loads(large) == {"text": "headline " * 500}
+
+
+def test_missing_optional_package_falls_back():
+    serializer = CacheSerializer(codec="no-such-codec", compression="no-such-compression")
+    assert serializer.codec in ("msgpack", "orjson", "json")
+    assert serializer.compression in ("zstd", "lz4", "zlib")
+
+
+def test_reads_entries_written_by_another_codec():
+    written = CacheSerializer(codec="orjson", compression="zlib", compression_threshold=0).dumps(VALUE)
+    assert CacheSerializer(codec="msgpack", compression="none").loads(written) == VALUE
+
+
+@pytest.mark.parametrize("legacy", [json.dumps(VALUE), json.dumps(VALUE).encode()])
+def test_reads_legacy_plain_json(legacy):
+    assert CacheSerializer().loads(legacy) == VALUE
+
+
+def test_rejects_unknown_format_version():
+    data = bytearray(CacheSerializer(codec="json", compression="none").dumps(VALUE))
+    data[1] = 99
+    with pytest.raises(ValueError, match="version 99"):
+        CacheSerializer().loads(bytes(data))
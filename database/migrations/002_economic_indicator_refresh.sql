@@ -0,0 +1,6 @@
+-- Track when each economic indicator row was last refreshed from the World Bank
+-- created_at only tells us when the row first appeared, the indicator store needs the last upsert time to decide what is stale
+ALTER TABLE economic_indicators ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+-- Speeds up the staleness scan: SELECT ... WHERE fetched_at < NOW() - INTERVAL '7 days'
+CREATE INDEX IF NOT EXISTS idx_economic_indicators_fetched_at ON economic_indicators(fetched_at);
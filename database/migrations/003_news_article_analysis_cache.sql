@@ -0,0 +1,7 @@
+-- Content-addressed AI analyses (app/services/analysis_cache.py)
+-- content_hash = sha256 of the normalized article text + source, analysis_version = model/tier that produced the summary/scores,
+-- so an article is analyzed at most once per model version no matter how many countries or views it shows up in
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS analysis_version VARCHAR(100);
+
+CREATE INDEX IF NOT EXISTS idx_news_articles_content_hash ON news_articles(content_hash);
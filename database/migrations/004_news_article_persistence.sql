@@ -0,0 +1,6 @@
+-- Persist fetched articles (app/services/article_store.py) so repeat views can be served from Postgres instead of NewsAPI
+-- url_hash = sha256 of the article URL, one row per (country, article), this is the ON CONFLICT target for upserts
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS url_hash VARCHAR(64);
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS description TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_news_articles_country_url_hash ON news_articles(country_id, url_hash);
@@ -0,0 +1,7 @@
+-- Article embeddings come from all-MiniLM-L6-v2 (scripts/download_models.py, app/services/embedding_service.py), which is 384-dimensional
+-- The 1536 placeholder matched OpenAI embeddings and nothing was ever written to the column, so it is resized in place
+DROP INDEX IF EXISTS news_articles_embedding_idx;
+ALTER TABLE news_articles ALTER COLUMN embedding TYPE VECTOR(384) USING NULL;
+
+-- same cosine ivfflat index as 001, rebuilt for the new dimension
+CREATE INDEX IF NOT EXISTS idx_news_articles_embedding ON news_articles USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
@@ -0,0 +1,16 @@
+-- FX rate history for trend sparklines (app/services/fx_history.py)
+-- One row per rate table snapshot rather than one per (snapshot, currency): currencies / rates are aligned arrays
+-- against base_currency (~160 values), so a year of hourly snapshots is ~9k rows and a range query reads one element per row
+-- Partitioned by month on captured_at: range queries only scan the months they cover and old months can be dropped whole
+CREATE TABLE IF NOT EXISTS fx_rate_snapshots (
+    captured_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    base_currency VARCHAR(3) NOT NULL,
+    rate_date DATE,
+    currencies VARCHAR(3)[] NOT NULL,
+    rates REAL[] NOT NULL,
+    PRIMARY KEY (captured_at)
+) PARTITION BY RANGE (captured_at);
+
+-- Monthly partitions (fx_rate_snapshots_YYYY_MM) are created by the store before it writes into a new month,
+-- the default partition only catches rows inserted by hand outside those ranges
+CREATE TABLE IF NOT EXISTS fx_rate_snapshots_default PARTITION OF fx_rate_snapshots DEFAULT;
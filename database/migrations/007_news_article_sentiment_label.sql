@@ -0,0 +1,4 @@
+-- Sentiment label as the analysis produced it (app/services/analysis_cache.py)
+-- emotional_tone only keeps the rounded compound score, and each sentiment backend draws the
+-- positive / neutral / negative lines differently, so the label can't be rebuilt from it reliably
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS sentiment_label VARCHAR(10);